@@ -0,0 +1,274 @@
+"""
+Makes deterministic synthetic SV VCFs and a reference for benchmarking
+
+The reference is random sequence with tandem repeats. The base VCF holds SVs of every sample and the comp
+VCF holds the base's calls perturbed as a caller would make them: missed calls, shifted breakpoints, sequence
+errors, and false calls. Outputs only depend on the parameters and seed, so runs are comparable across commits.
+
+Outputs in the directory are reference.fa, base.vcf.gz, comp.vcf.gz, tr.bed of the tandem repeats, and
+params.json of the parameters.
+"""
+import os
+import sys
+import json
+import math
+import random
+import argparse
+
+import pysam
+
+# Use the current truvari, not any installed libraries
+sys.path.insert(0, os.getcwd())
+
+import truvari
+
+DEFAULTS = {"calls": 1000,
+            "density": 500,
+            "contigs": 2,
+            "samples": 1,
+            "sizemin": 50,
+            "sizemax": 10000,
+            "size_dist": "loguniform",
+            "del_pct": 0.5,
+            "tr_pct": 0.3,
+            "tr_cluster": 3,
+            "symbolic_pct": 0.0,
+            "recall": 0.9,
+            "fp_pct": 0.1,
+            "jitter": 20,
+            "size_jitter": 0.05,
+            "seq_error": 0.02,
+            "seed": 42}
+
+NUCS = "ACGT"
+# Random bytes to nucleotides
+NUC_TABLE = bytes(ord(NUCS[_ % 4]) for _ in range(256))
+COMPLEMENT = str.maketrans(NUCS, "TGCA")
+
+
+def random_seq(rng, length):
+    """
+    Random nucleotide sequence
+    """
+    # randbytes can only make up to 2**28 bytes at a time
+    step = 1 << 27
+    return b''.join(rng.randbytes(min(step, length - pos)) for pos in range(0, length, step)) \
+        .translate(NUC_TABLE).decode()
+
+
+def draw_size(rng, params):
+    """
+    SV length from the size distribution. lognormal peaks at ~300bp like Alu insertions
+    """
+    low, high = params["sizemin"], params["sizemax"]
+    if params["size_dist"] == "lognormal":
+        return int(min(max(rng.lognormvariate(math.log(300), 1), low), high))
+    return int(math.exp(rng.uniform(math.log(low), math.log(high))))
+
+
+def make_reference(rng, params):
+    """
+    Returns the sequence of every contig and the tandem repeats' (chrom, start, end, motif)
+    """
+    genome_len = max(int(params["calls"] / params["density"] * 1e6), 100000)
+    contig_len = genome_len // params["contigs"]
+    num_trs = math.ceil(params["calls"] * params["tr_pct"] / params["tr_cluster"])
+    trs_per_contig = math.ceil(num_trs / params["contigs"])
+    contigs = {}
+    trs = []
+    for ctg_idx in range(params["contigs"]):
+        chrom = f"chr{ctg_idx + 1}"
+        seq = bytearray(random_seq(rng, contig_len).encode())
+        # Each repeat is alone in an equal slice of the contig
+        slot = contig_len // max(trs_per_contig, 1)
+        for tr_idx in range(trs_per_contig if slot > 2500 else 0):
+            motif = random_seq(rng, rng.choice([2, 3, 4, 5, 6, rng.randint(7, 50)]))
+            copies = rng.randint(200, 2000) // len(motif) + 1
+            start = tr_idx * slot + rng.randint(100, slot - len(motif) * copies - 100)
+            seq[start:start + len(motif) * copies] = (motif * copies).encode()
+            trs.append((chrom, start, start + len(motif) * copies, motif))
+        contigs[chrom] = seq.decode()
+    return contigs, trs
+
+
+def make_gts(rng, samples):
+    """
+    Genotypes of a call with at least one carrier
+    """
+    freq = rng.uniform(0.05, 0.9)
+    gts = [(int(rng.random() < freq), int(rng.random() < freq)) for _ in range(samples)]
+    if not any(a or b for a, b in gts):
+        gts[rng.randrange(samples)] = (0, 1)
+    return gts
+
+
+def random_call(rng, params, contigs, trs):
+    """
+    Returns a call as a dict. Calls in tandem repeats are expansions or contractions of the motif
+    """
+    size = draw_size(rng, params)
+    svtype = "DEL" if rng.random() < params["del_pct"] else "INS"
+    if trs and rng.random() < params["tr_pct"]:
+        chrom, start, end, motif = rng.choice(trs)
+        copies = max(1, min(size, end - start - 1) // len(motif))
+        pos = start + rng.randrange(0, len(motif) * 3)
+        return {"chrom": chrom, "pos": pos, "svtype": svtype, "size": copies * len(motif),
+                "seq": motif * copies, "symbolic": False}
+    chrom = rng.choice(list(contigs))
+    pos = rng.randint(1, len(contigs[chrom]) - size - 2)
+    if svtype == "DEL" and rng.random() < params["symbolic_pct"]:
+        return {"chrom": chrom, "pos": pos, "svtype": rng.choice(["DEL", "DEL", "DUP", "INV"]), "size": size,
+                "seq": None, "symbolic": True}
+    seq = random_seq(rng, size) if svtype == "INS" else None
+    return {"chrom": chrom, "pos": pos, "svtype": svtype, "size": size, "seq": seq, "symbolic": False}
+
+
+def perturb_call(rng, params, call, contigs):
+    """
+    A caller's version of a call with shifted breakpoints and sequence errors
+    """
+    ret = dict(call)
+    ctg_len = len(contigs[call["chrom"]])
+    ret["pos"] = min(max(1, call["pos"] + rng.randint(-params["jitter"], params["jitter"])),
+                     ctg_len - call["size"] - 2)
+    if call["seq"] is None:
+        jitter = int(call["size"] * params["size_jitter"])
+        ret["size"] = max(params["sizemin"], call["size"] + rng.randint(-jitter, jitter))
+        ret["pos"] = min(ret["pos"], ctg_len - ret["size"] - 2)
+    else:
+        seq = list(call["seq"])
+        for _ in range(int(len(seq) * params["seq_error"])):
+            seq[rng.randrange(len(seq))] = rng.choice(NUCS)
+        ret["seq"] = "".join(seq)
+    return ret
+
+
+def call_line(call, contigs, name, gts):
+    """
+    VCF line of a call
+    """
+    chrom, pos, size = call["chrom"], call["pos"], call["size"]
+    seq = contigs[chrom]
+    anchor = seq[pos - 1]
+    if call["symbolic"]:
+        ref, alt = anchor, f"<{call['svtype']}>"
+        info = f"SVTYPE={call['svtype']};SVLEN={size if call['svtype'] != 'DEL' else -size};END={pos + size}"
+    elif call["svtype"] == "DEL":
+        ref, alt = seq[pos - 1:pos + size], anchor
+        info = f"SVTYPE=DEL;SVLEN={-size}"
+    else:
+        ref, alt = anchor, anchor + call["seq"]
+        info = f"SVTYPE=INS;SVLEN={size}"
+    fmts = "\t".join(f"{a}/{b}" for a, b in gts)
+    return f"{chrom}\t{pos}\t{name}\t{ref}\t{alt}\t60\tPASS\t{info}\tGT\t{fmts}\n"
+
+
+def write_vcf(fn, contigs, samples, lines):
+    """
+    Write the lines to a sorted, compressed, and indexed VCF
+    """
+    with open(fn, 'w') as fout:
+        fout.write("##fileformat=VCFv4.2\n")
+        for chrom, seq in contigs.items():
+            fout.write(f"##contig=<ID={chrom},length={len(seq)}>\n")
+        fout.write('##INFO=<ID=SVTYPE,Number=1,Type=String,Description="SV type">\n')
+        fout.write('##INFO=<ID=SVLEN,Number=1,Type=Integer,Description="SV length">\n')
+        fout.write('##INFO=<ID=END,Number=1,Type=Integer,Description="End position">\n')
+        fout.write('##FORMAT=<ID=GT,Number=1,Type=String,Description="Genotype">\n')
+        fout.write("\t".join(["#CHROM", "POS", "ID", "REF", "ALT", "QUAL", "FILTER", "INFO", "FORMAT"] + samples))
+        fout.write("\n")
+        fout.writelines(lines)
+    truvari.compress_index_vcf(fn, fn + ".gz")
+
+
+def make_synthetic(out_dir, **kwargs):
+    """
+    Make the synthetic reference and VCFs in out_dir. kwargs override the `DEFAULTS`.
+    Returns the parameters
+    """
+    params = dict(DEFAULTS)
+    params.update(kwargs)
+    rng = random.Random(params["seed"])
+    os.makedirs(out_dir, exist_ok=True)
+
+    contigs, trs = make_reference(rng, params)
+    ref_fn = os.path.join(out_dir, "reference.fa")
+    with open(ref_fn, 'w') as fout:
+        for chrom, seq in contigs.items():
+            fout.write(f">{chrom}\n")
+            for i in range(0, len(seq), 60):
+                fout.write(seq[i:i + 60] + "\n")
+    pysam.faidx(ref_fn)
+    with open(os.path.join(out_dir, "tr.bed"), 'w') as fout:
+        for chrom, start, end, motif in trs:
+            fout.write(f"{chrom}\t{start}\t{end}\t{motif}\n")
+
+    samples = [f"SAMPLE{_}" for _ in range(params["samples"])]
+    base, comp = [], []
+    for idx in range(params["calls"]):
+        call = random_call(rng, params, contigs, trs)
+        gts = make_gts(rng, params["samples"])
+        base.append(call_line(call, contigs, f"base.{idx}", gts))
+        if rng.random() < params["recall"]:
+            comp.append(call_line(perturb_call(rng, params, call, contigs), contigs, f"comp.{idx}", gts))
+    for idx in range(int(params["calls"] * params["fp_pct"])):
+        call = random_call(rng, params, contigs, trs)
+        comp.append(call_line(call, contigs, f"false.{idx}", make_gts(rng, params["samples"])))
+
+    write_vcf(os.path.join(out_dir, "base.vcf"), contigs, samples, base)
+    write_vcf(os.path.join(out_dir, "comp.vcf"), contigs, samples, comp)
+    with open(os.path.join(out_dir, "params.json"), 'w') as fout:
+        json.dump(params, fout, indent=4)
+    return params
+
+
+def parse_args(args):
+    """
+    Pull the command line parameters
+    """
+    parser = argparse.ArgumentParser(prog="make_synthetic", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-o", "--output", type=str, required=True,
+                        help="Output directory")
+    parser.add_argument("-n", "--calls", type=int, default=DEFAULTS["calls"],
+                        help="Number of base calls (%(default)s)")
+    parser.add_argument("-d", "--density", type=float, default=DEFAULTS["density"],
+                        help="Calls per Mbp, which sets the reference's length (%(default)s)")
+    parser.add_argument("--contigs", type=int, default=DEFAULTS["contigs"],
+                        help="Number of contigs (%(default)s)")
+    parser.add_argument("--samples", type=int, default=DEFAULTS["samples"],
+                        help="Number of samples (%(default)s)")
+    parser.add_argument("--sizemin", type=int, default=DEFAULTS["sizemin"],
+                        help="Minimum SV length (%(default)s)")
+    parser.add_argument("--sizemax", type=int, default=DEFAULTS["sizemax"],
+                        help="Maximum SV length (%(default)s)")
+    parser.add_argument("--size-dist", type=str, choices=["loguniform", "lognormal"],
+                        default=DEFAULTS["size_dist"],
+                        help="SV length distribution (%(default)s)")
+    parser.add_argument("--del-pct", type=float, default=DEFAULTS["del_pct"],
+                        help="Fraction of deletions. The rest are insertions (%(default)s)")
+    parser.add_argument("--tr-pct", type=float, default=DEFAULTS["tr_pct"],
+                        help="Fraction of calls in tandem repeats (%(default)s)")
+    parser.add_argument("--tr-cluster", type=int, default=DEFAULTS["tr_cluster"],
+                        help="Average number of calls per tandem repeat (%(default)s)")
+    parser.add_argument("--symbolic-pct", type=float, default=DEFAULTS["symbolic_pct"],
+                        help="Fraction of deletions outside of repeats written as <DEL>, <DUP>, or <INV> "
+                             "(%(default)s)")
+    parser.add_argument("--recall", type=float, default=DEFAULTS["recall"],
+                        help="Fraction of base calls in the comp (%(default)s)")
+    parser.add_argument("--fp-pct", type=float, default=DEFAULTS["fp_pct"],
+                        help="Number of false comp calls as a fraction of --calls (%(default)s)")
+    parser.add_argument("--jitter", type=int, default=DEFAULTS["jitter"],
+                        help="Max shift of comp calls' positions (%(default)s)")
+    parser.add_argument("--size-jitter", type=float, default=DEFAULTS["size_jitter"],
+                        help="Max relative change of comp deletions' lengths (%(default)s)")
+    parser.add_argument("--seq-error", type=float, default=DEFAULTS["seq_error"],
+                        help="Fraction of comp insertions' bases changed (%(default)s)")
+    parser.add_argument("--seed", type=int, default=DEFAULTS["seed"],
+                        help="Random seed (%(default)s)")
+    return parser.parse_args(args)
+
+
+if __name__ == '__main__':
+    ARGS = vars(parse_args(sys.argv[1:]))
+    make_synthetic(ARGS.pop("output"), **ARGS)
@@ -0,0 +1,228 @@
+"""
+Times truvari commands on synthetic data at several scales
+
+Data is made by make_synthetic.py and kept in the workdir for reuse. Each task's command is run --repeat times
+in a new process and its fastest time is kept. Times don't include starting python and importing truvari.
+Throughput is the variants processed per second. Results are written as json, which can be compared to a
+previous run's with --compare, e.g.
+
+    python repo_utils/run_benchmarks.py -o new.json --compare old.json
+
+Only works when run from the repository's root directory.
+"""
+import os
+import sys
+import json
+import shutil
+import hashlib
+import logging
+import argparse
+import platform
+import subprocess
+
+import pysam
+
+# Use the current truvari, not any installed libraries
+sys.path.insert(0, os.getcwd())
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import truvari
+from make_synthetic import DEFAULTS, make_synthetic
+
+# Runs a truvari command and reports its time after the imports
+TIMER = """
+import sys, time
+from truvari.__main__ import TOOLS
+start = time.perf_counter()
+try:
+    TOOLS[sys.argv[1]](sys.argv[2:])
+finally:
+    sys.stderr.write(f"\\nBENCHMARK_SECONDS {time.perf_counter() - start}\\n")
+"""
+
+# Each task's truvari arguments, given the data directory and the task's output path, and the VCFs it processes
+TASKS = {
+    "bench": (lambda d, o: ["bench", "-b", f"{d}/base.vcf.gz", "-c", f"{d}/comp.vcf.gz",
+                            "-f", f"{d}/reference.fa", "-o", o], ["base", "comp"]),
+    "bench_short": (lambda d, o: ["bench", "-b", f"{d}/base.vcf.gz", "-c", f"{d}/comp.vcf.gz",
+                                  "-f", f"{d}/reference.fa", "--short", "-o", o], ["base", "comp"]),
+    "collapse": (lambda d, o: ["collapse", "-i", f"{d}/base.vcf.gz", "-f", f"{d}/reference.fa",
+                               "-o", f"{o}.vcf", "-c", f"{o}.redundant.vcf"], ["base"]),
+    "stratify": (lambda d, o: ["stratify", f"{d}/tr.bed", f"{d}/bench.out", "-o", o], ["base", "comp"]),
+    "vcf2df": (lambda d, o: ["vcf2df", "-b", "-i", "-f", f"{d}/bench.out", o], ["base", "comp"]),
+    "anno_svinfo": (lambda d, o: ["anno", "svinfo", "-o", o, f"{d}/base.vcf.gz"], ["base"]),
+    "anno_numneigh": (lambda d, o: ["anno", "numneigh", "-o", o, f"{d}/base.vcf.gz"], ["base"]),
+    "anno_gcpct": (lambda d, o: ["anno", "gcpct", "-r", f"{d}/reference.fa", "-o", o, f"{d}/base.vcf.gz"],
+                   ["base"]),
+    "anno_gtcnt": (lambda d, o: ["anno", "gtcnt", "-o", o, f"{d}/base.vcf.gz"], ["base"]),
+    "anno_hompct": (lambda d, o: ["anno", "hompct", "-i", f"{d}/base.vcf.gz", "-o", o], ["base"]),
+    "anno_lcr": (lambda d, o: ["anno", "lcr", "-o", o, f"{d}/base.vcf.gz"], ["base"]),
+}
+
+
+def parse_args(args):
+    """
+    Pull the command line parameters
+    """
+    parser = argparse.ArgumentParser(prog="run_benchmarks", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-o", "--output", type=str, default="benchmarks.json",
+                        help="Output json (%(default)s)")
+    parser.add_argument("-w", "--workdir", type=str, default="benchmark_data",
+                        help="Directory for the synthetic data and outputs (%(default)s)")
+    parser.add_argument("-s", "--scales", type=str, default="1000,10000",
+                        help="Comma-separated numbers of base calls to test (%(default)s)")
+    parser.add_argument("-t", "--tasks", type=str, default=",".join(TASKS),
+                        help="Comma-separated tasks to time (all)")
+    parser.add_argument("-r", "--repeat", type=int, default=3,
+                        help="Times to run each task (%(default)s)")
+    parser.add_argument("--synth", type=str, action="append", default=[],
+                        help="Override a make_synthetic.py parameter, e.g. 'tr_pct=0.5'. Repeatable")
+    parser.add_argument("--compare", type=str, default=None,
+                        help="Previous results json to compare against")
+    args = parser.parse_args(args)
+    args.scales = [int(_) for _ in args.scales.split(',')]
+    args.tasks = args.tasks.split(',')
+    unknown = [_ for _ in args.tasks if _ not in TASKS]
+    if unknown:
+        parser.error(f"Unknown tasks {', '.join(unknown)}. Choose from {', '.join(TASKS)}")
+    return args
+
+
+def parse_synth(overrides):
+    """
+    Make the make_synthetic parameters from key=value overrides
+    """
+    params = {"samples": 5}
+    for override in overrides:
+        key, value = override.split('=', 1)
+        if key not in DEFAULTS:
+            raise ValueError(f"Unknown make_synthetic parameter {key}")
+        params[key] = type(DEFAULTS[key])(value)
+    return params
+
+
+def count_calls(fn):
+    """
+    Number of records in a VCF
+    """
+    return sum(1 for _ in pysam.VariantFile(fn))
+
+
+def time_cmd(cmd):
+    """
+    Time in seconds of running the truvari command. Exits if it fails
+    """
+    ret = subprocess.run([sys.executable, "-c", TIMER] + cmd, stdout=subprocess.DEVNULL,
+                         stderr=subprocess.PIPE, check=False, text=True)
+    if ret.returncode != 0:
+        logging.error("Failed: truvari %s\n%s", " ".join(cmd), ret.stderr)
+        sys.exit(1)
+    return float(ret.stderr.rsplit("BENCHMARK_SECONDS ", 1)[1])
+
+
+def clean(path):
+    """
+    Remove a task's previous outputs
+    """
+    for fn in [path, f"{path}.vcf", f"{path}.redundant.vcf"]:
+        if os.path.isdir(fn):
+            shutil.rmtree(fn)
+        elif os.path.exists(fn):
+            os.remove(fn)
+
+
+def run_scale(args, params, scale):
+    """
+    Make the scale's data and time each task on it. Returns the results
+    """
+    params = dict(params, calls=scale)
+    key = hashlib.md5(json.dumps(params, sort_keys=True).encode()).hexdigest()[:8]
+    data_dir = os.path.join(args.workdir, f"synth_{scale}_{key}")
+    if not os.path.exists(os.path.join(data_dir, "params.json")):
+        logging.info("Making %d calls in %s", scale, data_dir)
+        make_synthetic(data_dir, **params)
+    counts = {"base": count_calls(os.path.join(data_dir, "base.vcf.gz")),
+              "comp": count_calls(os.path.join(data_dir, "comp.vcf.gz"))}
+
+    # stratify and vcf2df read bench's outputs
+    tasks = list(args.tasks)
+    bench_out = os.path.join(data_dir, "bench.out")
+    if any(_ in tasks for _ in ["stratify", "vcf2df"]):
+        clean(bench_out)
+        time_cmd(TASKS["bench"][0](data_dir, bench_out))
+
+    results = []
+    for task in tasks:
+        make_cmd, inputs = TASKS[task]
+        out_path = os.path.join(data_dir, f"{task}.out")
+        cmd = make_cmd(data_dir, out_path)
+        times = []
+        for _ in range(args.repeat):
+            clean(out_path)
+            times.append(time_cmd(cmd))
+        best = min(times)
+        variants = sum(counts[_] for _ in inputs)
+        results.append({"task": task, "scale": scale, "variants": variants, "seconds": round(best, 4),
+                        "variants_per_sec": round(variants / best, 1)})
+        logging.info("%s at %d: %.2fs, %.1f variants/sec", task, scale, best, variants / best)
+    return results
+
+
+def git_commit():
+    """
+    Current commit and if the tree has changes
+    """
+    ret = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=False)
+    commit = ret.stdout.strip() or None
+    ret = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True,
+                         text=True, check=False)
+    return commit, bool(ret.stdout.strip())
+
+
+def compare(old, new):
+    """
+    Print each result's throughput beside the previous run's
+    """
+    prev = {(_["task"], _["scale"]): _ for _ in old["results"]}
+    print(f"# {old['commit']} vs {new['commit']}")
+    print("\t".join(["task", "scale", "old_vps", "new_vps", "ratio"]))
+    for result in new["results"]:
+        before = prev.get((result["task"], result["scale"]))
+        if before is None:
+            continue
+        ratio = result["variants_per_sec"] / before["variants_per_sec"]
+        print(f"{result['task']}\t{result['scale']}\t{before['variants_per_sec']}\t"
+              f"{result['variants_per_sec']}\t{ratio:.2f}")
+
+
+def main(cmdargs):
+    """
+    Run the benchmarks
+    """
+    args = parse_args(cmdargs)
+    truvari.setup_logging()
+    params = parse_synth(args.synth)
+    os.makedirs(args.workdir, exist_ok=True)
+
+    commit, dirty = git_commit()
+    out = {"commit": commit,
+           "dirty": dirty,
+           "truvari": truvari.__version__,
+           "python": platform.python_version(),
+           "platform": platform.platform(),
+           "cpus": os.cpu_count(),
+           "synth": params,
+           "results": []}
+    for scale in args.scales:
+        out["results"].extend(run_scale(args, params, scale))
+
+    with open(args.output, 'w') as fout:
+        json.dump(out, fout, indent=4)
+    if args.compare:
+        with open(args.compare, 'r') as fh:
+            compare(json.load(fh), out)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
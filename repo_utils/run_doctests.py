@@ -10,8 +10,18 @@ sys.path.insert(0, os.getcwd())
 
 from truvari import (
     bench,
+    cohort,
+    collapse_pool,
     comparisons,
+    interval_index,
     msatovcf,
+    multicomp,
+    perf,
+    prepared,
+    refcache,
+    shards,
+    simcache,
+    sweep,
     utils,
     vcf2df,
 )
@@ -27,7 +37,17 @@ def tester(module):
     return ret.failed
 
 fails = 0
+fails += tester(cohort)
+fails += tester(collapse_pool)
 fails += tester(comparisons)
+fails += tester(interval_index)
+fails += tester(multicomp)
+fails += tester(perf)
+fails += tester(prepared)
+fails += tester(refcache)
+fails += tester(shards)
+fails += tester(simcache)
+fails += tester(sweep)
 fails += tester(utils)
 fails += tester(vcf2df)
 fails += tester(msatovcf)
@@ -3,6 +3,7 @@ One off unittests
 """
 import os
 import sys
+import pickle
 import pysam
 from collections import defaultdict
 from intervaltree import IntervalTree
@@ -85,3 +86,321 @@ for entry in vcf:
         assert matcher.filter_call(entry), f"Didn't filter {str(entry)}"
     except ValueError as e:
         assert e.args[0].startswith("Cannot compare multi-allelic"), f"Unknown exception {str(entry)}"
+
+"""
+Screened matrix is identical to short-circuited build_match
+"""
+base = list(pysam.VariantFile("repo_utils/test_files/variants/input1.vcf.gz"))[:200]
+comp = list(pysam.VariantFile("repo_utils/test_files/variants/input3.vcf.gz"))[:200]
+matcher = truvari.Matcher()
+matcher.params.sizemin = 0
+matcher.params.pctovl = 0.2
+screen = matcher.screen_matrix(base, comp)
+for bid, b in enumerate(base):
+    for cid, c in enumerate(comp):
+        expected = matcher.build_match(b, c, short_circuit=True)
+        observed = matcher.screened_match(screen, bid, cid)
+        for attr in truvari.MatchResult.__slots__:
+            assert getattr(expected, attr) == getattr(observed, attr), f"Bad screen {attr} {str(b)} {str(c)}"
+
+"""
+VariantViews match the same as their records, including after pickling
+"""
+views = [pickle.loads(pickle.dumps(truvari.VariantView(_))) for _ in base]
+for b, view in zip(base, views):
+    assert view.record is None, "VariantView pickled its record"
+    assert str(view) == "\t".join(str(b).split("\t")[:5]), f"Bad view {str(b)}"
+    for c in comp[:20]:
+        expected = matcher.build_match(b, c)
+        observed = matcher.build_match(view, truvari.VariantView(c))
+        for attr in truvari.MatchResult.__slots__:
+            if attr not in ("base", "comp"):
+                assert getattr(expected, attr) == getattr(observed, attr), f"Bad view {attr} {str(b)} {str(c)}"
+
+"""
+Lazily built MatchMatrix pairs pick the same as a fully built matrix
+"""
+m_bench = truvari.Bench(matcher, short_circuit=True)
+lazy = m_bench.build_matrix(views, [truvari.VariantView(_) for _ in comp], chunk_id=1)
+full = truvari.MatchMatrix(*lazy.shape)
+for bid in range(lazy.shape[0]):
+    for cid in range(lazy.shape[1]):
+        full.add(bid, cid, lazy.builder(bid, cid))
+for pick, picker in truvari.PICKERS.items():
+    expected = [(_.matid, _.state, _.multi, _.score) for _ in picker(full)]
+    observed = [(_.matid, _.state, _.multi, _.score) for _ in picker(lazy)]
+    assert expected == observed, f"Bad lazy MatchMatrix with {pick}"
+
+"""
+Candidate pairs/components of dense chunks are the pairs within refdist
+"""
+comp_views = [truvari.VariantView(_) for _ in comp]
+for refdist in [0, 100, 500]:
+    expected = sorted((bid, cid) for bid, b in enumerate(views) for cid, c in enumerate(comp_views)
+                      if truvari.overlaps(b.start - refdist, b.stop + refdist, c.start, c.stop))
+    assert sorted(truvari.candidate_pairs(views, comp_views, refdist)) == expected, f"Bad pairs at {refdist}"
+    paired = {bid for bid, _ in expected}
+    for g_base, g_comp in truvari.candidate_components(views, comp_views, refdist):
+        assert bool(g_base) == bool(g_comp) or not set(g_base) & paired, f"Bad group at {refdist}"
+
+"""
+Splitting dense chunks keeps the same TP/FP/FN
+"""
+def dense_stats(dense_size, pick):
+    truvari.DENSE_CHUNK_SIZE = dense_size
+    m = truvari.Matcher()
+    m.params.pick = pick
+    output = truvari.Bench(m, "repo_utils/test_files/variants/input1.vcf.gz",
+                           "repo_utils/test_files/variants/input2.vcf.gz", truvari.make_temp_filename(),
+                           short_circuit=True).run()
+    truvari.DENSE_CHUNK_SIZE = 5000
+    return [output.stats_box[_] for _ in ["TP-base", "TP-comp", "FP", "FN"]]
+
+for pick in truvari.PICKERS:
+    assert dense_stats(5000, pick) == dense_stats(10, pick), f"Bad split with {pick}"
+    # Short circuited pairs don't count genotypes, so ac drops calls from full matrices that sparse ones report alone
+    if pick != "ac":
+        assert dense_stats(5000, pick) == dense_stats(0, pick), f"Bad sparse split with {pick}"
+
+"""
+Without short_circuit dense chunks aren't split, so every FN/FP keeps its annotations
+"""
+def dense_fnfp(dense_size):
+    truvari.DENSE_CHUNK_SIZE = dense_size
+    outdir = truvari.make_temp_filename()
+    m = truvari.Matcher()
+    # A small refdist leaves calls without a candidate when split
+    m.params.refdist = 10
+    truvari.Bench(m, "repo_utils/test_files/variants/input1.vcf.gz",
+                  "repo_utils/test_files/variants/input3.vcf.gz", outdir).run()
+    truvari.DENSE_CHUNK_SIZE = 5000
+    return [[str(_) for _ in pysam.VariantFile(os.path.join(outdir, f"{kind}.vcf.gz"))] for kind in ["fn", "fp"]]
+
+assert dense_fnfp(5000) == dense_fnfp(2), "Bad unsplit dense chunk"
+
+"""
+file_zipper follows the header's contig order
+"""
+def zip_vcf(positions):
+    fn = truvari.make_temp_filename(suffix=".vcf")
+    with open(fn, 'w') as fout:
+        fout.write("##fileformat=VCFv4.2\n")
+        for ctg in ["chr1", "chr2", "chr10"]:
+            fout.write(f"##contig=<ID={ctg},length=1000>\n")
+        fout.write("#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\n")
+        for ctg, pos in positions:
+            fout.write(f"{ctg}\t{pos}\t.\tA\tT\t.\tPASS\t.\n")
+    return pysam.VariantFile(fn)
+
+zipped = [(key, e.chrom, e.pos) for key, e in truvari.file_zipper(
+           ('a', zip_vcf([("chr2", 5), ("chr10", 1)])),
+           ('b', zip_vcf([("chr1", 9), ("chr2", 5), ("chr10", 3)])),
+           ('c', zip_vcf([])))]
+assert zipped == [('b', "chr1", 9), ('a', "chr2", 5), ('b', "chr2", 5),
+                  ('a', "chr10", 1), ('b', "chr10", 3)], f"Bad zip order {zipped}"
+
+"""
+prefetch hands back the reader's items in order and re-raises its exceptions
+"""
+def bad_reader():
+    yield from range(10)
+    raise ValueError("bad reader")
+
+fetched = []
+try:
+    for item in truvari.prefetch(bad_reader(), 2):
+        fetched.append(item)
+    assert False, "prefetch didn't raise"
+except ValueError as e:
+    assert e.args[0] == "bad reader", f"Bad prefetch exception {e}"
+assert fetched == list(range(10)), f"Bad prefetch {fetched}"
+
+"""
+BenchOutput sorts outputs whose chunks were written out of order
+"""
+m_bench = truvari.Bench(truvari.Matcher(), "repo_utils/test_files/variants/input1.vcf.gz",
+                        "repo_utils/test_files/variants/input2.vcf.gz", truvari.make_temp_filename())
+output = truvari.BenchOutput(m_bench, m_bench.matcher)
+for chunk in [base[100:], base[:100]]:
+    output.pending["fn"].extend(chunk)
+    output.flush()
+output.close_outputs()
+observed = [truvari.vcf_sort_key(_) for _ in pysam.VariantFile(output.vcf_filenames["fn"])]
+assert observed == sorted(truvari.vcf_sort_key(_) for _ in base), "Bad BenchOutput sorting"
+
+"""
+region_filter yields contigs in the header order file_zipper expects
+"""
+def filtered_vcf(positions):
+    vcf = zip_vcf(positions)
+    fn = pysam.tabix_index(vcf.filename.decode(), preset="vcf", force=True)
+    vcf = pysam.VariantFile(fn)
+    return truvari.region_filter(vcf, truvari.build_region_tree(vcf))
+
+zipped = [(key, e.chrom, e.pos) for key, e in truvari.file_zipper(
+           ('a', filtered_vcf([("chr1", 5), ("chr2", 5), ("chr10", 1)])),
+           ('b', filtered_vcf([("chr2", 9), ("chr10", 3)])))]
+assert zipped == [('a', "chr1", 5), ('a', "chr2", 5), ('b', "chr2", 9),
+                  ('a', "chr10", 1), ('b', "chr10", 3)], f"Bad filtered zip order {zipped}"
+
+"""
+BenchServer requests on a prepared base match benching the VCF
+"""
+import json
+import threading
+import functools
+import http.server
+import urllib.request
+from truvari.serve import BenchRequestHandler
+
+base_fn = "repo_utils/test_files/variants/input1.vcf.gz"
+comp_fn = "repo_utils/test_files/variants/input2.vcf.gz"
+matcher = truvari.Matcher()
+matcher.params.pctseq = 0
+expected = truvari.Bench(matcher, base_fn, comp_fn, truvari.make_temp_filename()).run(write_vcfs=False)
+prepared = truvari.make_temp_filename()
+truvari.prepare_base(truvari.Bench(matcher, base_fn), prepared)
+bench_server = truvari.BenchServer([prepared])
+
+status, response = bench_server.bench({"args": ["-b", prepared, "-c", comp_fn, "-p", "0",
+                                                "-o", truvari.make_temp_filename()]})
+assert status == 200, f"Bad served bench {response}"
+assert response["stats"][0]["f1"] == expected.stats_box["f1"], "Bad served bench stats"
+assert bench_server.bench({"args": ["-b", prepared, "-c", comp_fn, "-o", truvari.make_temp_filename()]})[0] == 400, \
+       "Served bench with different pctseq than prepared"
+
+server = http.server.HTTPServer(("127.0.0.1", 0), functools.partial(BenchRequestHandler, bench_server=bench_server))
+threading.Thread(target=server.handle_request, daemon=True).start()
+request = urllib.request.Request(f"http://127.0.0.1:{server.server_port}/", method="POST",
+                                 data=json.dumps({"args": ["-b", prepared, "-c", comp_fn, "-p", "0", "--summary-only",
+                                                           "-o", truvari.make_temp_filename()]}).encode())
+with urllib.request.urlopen(request) as fh:
+    response = json.load(fh)
+server.server_close()
+assert response["stats"][0]["f1"] == expected.stats_box["f1"], "Bad served bench over http"
+
+"""
+A prepared base's records which don't match its columns fail loudly
+"""
+import shutil
+shifted = truvari.make_temp_filename()
+shutil.copytree(prepared, shifted)
+calls = pysam.VariantFile(os.path.join(prepared, "calls.vcf.gz"))
+with pysam.VariantFile(os.path.join(shifted, "calls.vcf.gz"), 'wz', header=calls.header) as fout:
+    for entry in list(calls)[1:]:
+        fout.write(entry)
+pysam.tabix_index(os.path.join(shifted, "calls.vcf.gz"), preset="vcf", force=True)
+try:
+    list(truvari.PreparedBase(shifted))
+    assert False, "Bad mismatched prepared base"
+except ValueError:
+    pass
+assert len(list(truvari.PreparedBase(prepared))) == len(truvari.PreparedBase(prepared)), "Bad prepared base"
+
+"""
+IntervalIndex answers the same as an IntervalTree
+"""
+import random
+rng = random.Random(19)
+intervals = []
+for _ in range(500):
+    start = rng.randint(0, 5000)
+    intervals.append((start, start + rng.randint(1, 200), rng.randint(0, 3)))
+tree = IntervalTree.from_tuples(intervals)
+index = truvari.IntervalIndex.from_tuples(intervals)
+for _ in range(200):
+    start = rng.randint(0, 5200)
+    end = start + rng.randint(1, 300)
+    assert sorted(index.overlap(start, end)) == sorted(tuple(_) for _ in tree.overlap(start, end)), "Bad overlap"
+    assert sorted(index.envelop(start, end)) == sorted(tuple(_) for _ in tree.envelop(start, end)), "Bad envelop"
+    assert sorted(index.at(start)) == sorted(tuple(_) for _ in tree.at(start)), "Bad at"
+index.chop(1000, 1500)
+tree.chop(1000, 1500)
+assert sorted(index) == sorted(tuple(_) for _ in tree), "Bad chop"
+index.merge_overlaps()
+tree.merge_overlaps()
+assert [(_.begin, _.end) for _ in index] == sorted((_.begin, _.end) for _ in tree), "Bad merge_overlaps"
+
+"""
+build_anno_tree's sidecar cache loads the same intervals as parsing
+"""
+from truvari import anno_cache
+anno_cache.CACHE_MIN_SIZE = 0
+bed_fn = truvari.make_temp_filename(suffix=".bed")
+with open("repo_utils/test_files/beds/include.bed") as fh, open(bed_fn, 'w') as fout:
+    fout.write(fh.read())
+parsed, parsed_cnt = truvari.build_anno_tree(bed_fn, idxfmt="")
+assert os.path.exists(anno_cache.cache_name(bed_fn)), "Cache not written"
+cached, cached_cnt = truvari.build_anno_tree(bed_fn, idxfmt="")
+assert parsed_cnt == cached_cnt, "Bad cached count"
+assert {k: list(v) for k, v in parsed.items()} == {k: list(v) for k, v in cached.items()}, "Bad cached intervals"
+with open(bed_fn, 'a') as fout:
+    fout.write("chr20\t1\t10\n")
+cached, cached_cnt = truvari.build_anno_tree(bed_fn)
+assert cached_cnt == parsed_cnt + 1, "Stale cache used"
+anno_cache.CACHE_MIN_SIZE = 1 << 20
+
+"""
+Fetching coalesced windows finds the same entries and regions as fetching each region
+"""
+from truvari import vcf_index
+vcf = pysam.VariantFile("repo_utils/test_files/variants/input1.vcf.gz")
+offsets = truvari.read_vcf_index("repo_utils/test_files/variants/input1.vcf.gz")
+assert offsets is not None and "chr20" in offsets, "Bad index read"
+tree, _ = truvari.build_anno_tree("repo_utils/test_files/beds/include.bed")
+truvari.merge_region_tree_overlaps(tree)
+for cost in [0, 1 << 15, 1 << 30]:
+    vcf_index.FETCH_COST_BYTES = cost
+    windows = {chrom: vcf_index.plan_fetches(offsets.get(chrom), index.begins, index.ends, index.max_ends)[0]
+               for chrom, index in tree.items()}
+    for overlap in [False, True]:
+        each = [(str(e), r) for e, r in truvari.region_filter_fetch(vcf, tree, True, overlap)]
+        coalesced = [(str(e), r) for e, r in truvari.region_filter_fetch(vcf, tree, True, overlap, windows=windows)]
+        assert each == coalesced, f"Bad coalesced fetch with cost {cost}"
+vcf_index.FETCH_COST_BYTES = 1 << 15
+
+"""
+plan_shards splits regions only where they're further apart than the gap
+"""
+tree = {"chr1": truvari.IntervalIndex.from_tuples([(0, 10), (20, 30), (100, 110), (120, 130)]),
+        "chr2": truvari.IntervalIndex.from_tuples([(0, 10)])}
+shards = truvari.plan_shards(tree, ["chr1", "chr2"], [None], 3, gap=50)
+assert [{k: [(_.begin, _.end) for _ in v] for k, v in s.items()} for s in shards] == \
+    [{"chr1": [(0, 10), (20, 30)]}, {"chr1": [(100, 110), (120, 130)]}, {"chr2": [(0, 10)]}], "Bad shards"
+assert len(truvari.plan_shards(tree, ["chr1", "chr2"], [None], 10)) == 2, "Bad shards without a gap"
+
+"""
+resolve_sv slices the same alleles from a ReferenceCache's windows as it fetches from the FastaFile
+"""
+from truvari.matching import resolve_sv
+ref_fn = "repo_utils/test_files/references/reference.fa"
+refs = [pysam.FastaFile(ref_fn), truvari.ReferenceCache(ref_fn), truvari.ReferenceCache(ref_fn, window=0),
+        truvari.ReferenceCache(ref_fn, window=None), truvari.ReferenceCache(ref_fn, window=100)]
+resolved = []
+for ref in refs:
+    resolved.append([])
+    for entry in pysam.VariantFile("repo_utils/test_files/variants/input1.vcf.gz"):
+        if entry.alts[0].startswith('<'):
+            resolved[-1].append((resolve_sv(entry, ref, dup_to_ins=True), entry.ref, entry.alts, entry.stop))
+assert len(resolved[0]) and all(_ == resolved[0] for _ in resolved), "Bad ReferenceCache resolve"
+
+"""
+SeqSimCache writes its results to the on-disk store in batches and when closed
+"""
+import tempfile
+with tempfile.TemporaryDirectory() as cache_dir:
+    cache = truvari.SeqSimCache(0, cache_dir, batch_size=2)
+    other = truvari.SeqSimCache(0, cache_dir)
+    cache.put(b"a", 0.9)
+    assert cache.get(b"a") == 0.9 and other.get(b"a") is None, "Bad unsaved SeqSimCache lookup"
+    cache.put(b"b", 0.5, exact=False)
+    assert other.get(b"a") == 0.9 and other.get(b"b", 0.7) == 0.5, "Bad SeqSimCache batch"
+    cache.put(b"c", 0.8)
+    cache.close()
+    assert other.get(b"c") == 0.8, "Bad SeqSimCache close"
+    other.close()
+    params = truvari.Matcher.make_match_params()
+    params.cache_dir = cache_dir
+    cache = truvari.SeqSimCache.from_params(params)
+    assert cache.max_size == 100000 and cache.db is not None, "Bad SeqSimCache from --cache-dir"
+    cache.close()
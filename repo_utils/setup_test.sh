@@ -20,6 +20,11 @@ sort_vcf() {
     mv tmp $fn
 }
 
+vcf_body() {
+    # vcf without its meta-information or the Match/CollapseIds which get shard prefixes
+    zcat -f $1 | grep -v "^##" | sed 's/\(MatchId\|CollapseId\)=[^;\t]*//g'
+}
+
 fn_md5() {
     fn=$1
     # simple md5sum checking
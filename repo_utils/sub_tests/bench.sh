@@ -16,8 +16,10 @@ bench() {
 
 bench_assert() {
     k=$1
+    # optionally check against a different answer key
+    ans=${2:-$k}
     assert_exit_code 0
-    for i in $ANSDIR/bench/bench${k}/*.vcf.gz
+    for i in $ANSDIR/bench/bench${ans}/*.vcf.gz
     do
         bname=$(basename $i | sed 's/[\.|\-]/_/g')
         result=$OD/bench${k}/$(basename $i)
@@ -53,6 +55,202 @@ if [ $test_bench_13_extend ]; then
 fi
 
 
+# --threads should match the single process answers and time the workers' stages
+run test_bench_13_threads bench 1 3 13_threads "--threads 2 --inflight 3"
+if [ $test_bench_13_threads ]; then
+    bench_assert 13_threads 13
+    assert_equal $(grep -c '"seqsim"' $OD/bench13_threads/perf.json) 1
+fi
+
+# --shards should match the single process answers apart from the MatchIds' shard prefixes
+run test_bench_13_shards bench 1 3 13_shards "--includebed $INDIR/beds/include.bed --shards 3"
+if [ $test_bench_13_shards ]; then
+    assert_exit_code 0
+    assert_equal $(fn_md5 $ANSDIR/bench/bench13_includebed/summary.json) $(fn_md5 $OD/bench13_shards/summary.json)
+    for i in tp-base tp-comp fn fp
+    do
+        assert_equal $(vcf_body $ANSDIR/bench/bench13_includebed/$i.vcf.gz | md5sum | cut -f1 -d\ ) \
+                     $(vcf_body $OD/bench13_shards/$i.vcf.gz | md5sum | cut -f1 -d\ )
+    done
+fi
+
+# Every --shard merged by merge-shards should match the single process answers
+for i in 1 2 3
+do
+    run test_bench_13_shard$i bench 1 3 13_shard$i "--includebed $INDIR/beds/include.bed --shard $i/3"
+done
+run test_bench_13_merge_shards $truv merge-shards -o $OD/bench13_merged $OD/bench13_shard3 $OD/bench13_shard1 \
+                                                  $OD/bench13_shard2
+if [ $test_bench_13_merge_shards ]; then
+    assert_exit_code 0
+    assert_equal $(fn_md5 $ANSDIR/bench/bench13_includebed/summary.json) $(fn_md5 $OD/bench13_merged/summary.json)
+    for i in tp-base tp-comp fn fp
+    do
+        assert_equal $(vcf_body $ANSDIR/bench/bench13_includebed/$i.vcf.gz | md5sum | cut -f1 -d\ ) \
+                     $(vcf_body $OD/bench13_merged/$i.vcf.gz | md5sum | cut -f1 -d\ )
+    done
+fi
+
+run test_bench_merge_missing_shard $truv merge-shards -o $OD/bench13_merged_missing $OD/bench13_shard1 \
+                                                      $OD/bench13_shard3
+if [ $test_bench_merge_missing_shard ]; then
+    assert_exit_code 100
+    assert_in_stderr "Missing"
+fi
+
+# --summary-only should match the answer's summary without making vcfs
+run test_bench_13_summary bench 1 3 13_summary "--summary-only"
+if [ $test_bench_13_summary ]; then
+    assert_exit_code 0
+    assert_equal $(fn_md5 $ANSDIR/bench/bench13/summary.json) $(fn_md5 $OD/bench13_summary/summary.json)
+    assert_equal $(ls $OD/bench13_summary/ | grep -c vcf) 0
+fi
+
+# --short should only annotate exact sequence similarities on the FN/FP
+inexact_seqsims() {
+    # Print the calls of $2 whose PctSeqSimilarity is set and differs from the same call's in $1
+    python3 -c """
+import sys, pysam
+exact = {(_.chrom, _.pos, _.ref, _.alts): _.info.get('PctSeqSimilarity') for _ in pysam.VariantFile(sys.argv[1])}
+for entry in pysam.VariantFile(sys.argv[2]):
+    short = entry.info.get('PctSeqSimilarity')
+    if short is not None and short != exact[(entry.chrom, entry.pos, entry.ref, entry.alts)]:
+        print(entry.chrom, entry.pos, short)
+""" $1 $2
+}
+# Without the size and overlap thresholds more pairs fail on sequence similarity alone
+run test_bench_13_long bench 1 3 13_long "--pctsize 0 --pctovl 0"
+run test_bench_13_short bench 1 3 13_short "--pctsize 0 --pctovl 0 --short"
+if [ $test_bench_13_short ]; then
+    assert_exit_code 0
+    for i in fn fp
+    do
+        assert_equal "$(inexact_seqsims $OD/bench13_long/$i.vcf.gz $OD/bench13_short/$i.vcf.gz)" ""
+    done
+fi
+
+# --profile should match the answers and add its stats next to the perf.json
+run test_bench_12_profile bench 1 2 12_profile "--profile"
+if [ $test_bench_12_profile ]; then
+    bench_assert 12_profile 12
+    assert_equal $(ls $OD/bench12_profile/ | grep -c "^perf.json$\|^profile.pstats$") 2
+fi
+
+# --sweep points should match their separate runs' summaries
+run test_bench_12_sweep bench 1 2 12_sweep "--sweep pick=single,ac"
+if [ $test_bench_12_sweep ]; then
+    assert_exit_code 0
+    assert_equal $(fn_md5 $ANSDIR/bench/bench12/summary.json) $(fn_md5 $OD/bench12_sweep/point_0/summary.json)
+    assert_equal $(fn_md5 $ANSDIR/bench/bench12_gtcomp/summary.json) $(fn_md5 $OD/bench12_sweep/point_1/summary.json)
+fi
+
+# A --sweep pick ac point filters the calls that aren't present like a separate --pick ac run
+run test_bench_sweep_ac_sep $truv bench -b $INDIR/variants/real_small_base.vcf.gz \
+                                        -c $INDIR/variants/real_small_comp.vcf.gz \
+                                        --pick ac --summary-only \
+                                        -o $OD/bench_sweep_ac_sep/
+run test_bench_sweep_ac $truv bench -b $INDIR/variants/real_small_base.vcf.gz \
+                                    -c $INDIR/variants/real_small_comp.vcf.gz \
+                                    --sweep pick=single,ac \
+                                    -o $OD/bench_sweep_ac/
+if [ $test_bench_sweep_ac ]; then
+    assert_exit_code 0
+    assert_equal $(fn_md5 $OD/bench_sweep_ac_sep/summary.json) $(fn_md5 $OD/bench_sweep_ac/point_1/summary.json)
+fi
+
+# A --prepare-base used as --base should match the VCF's answers
+run test_bench_prepare_base $truv bench -b $INDIR/variants/input1.vcf.gz \
+                                        -f $INDIR/references/reference.fa \
+                                        --dup-to-ins \
+                                        --prepare-base $OD/prepared1/
+if [ $test_bench_prepare_base ]; then
+    assert_exit_code 0
+fi
+
+run test_bench_12_prepared $truv bench -b $OD/prepared1/ \
+                                       -c $INDIR/variants/input2.vcf.gz \
+                                       -f $INDIR/references/reference.fa \
+                                       --dup-to-ins \
+                                       -o $OD/bench12_prepared/
+if [ $test_bench_12_prepared ]; then
+    bench_assert 12_prepared 12
+fi
+
+# Multiple --comp should each match their separate runs
+run test_bench_1_multicomp $truv bench -b $INDIR/variants/input1.vcf.gz \
+                                      -c $INDIR/variants/input2.vcf.gz $INDIR/variants/input3.vcf.gz \
+                                      -f $INDIR/references/reference.fa \
+                                      --dup-to-ins \
+                                      -o $OD/bench1_multicomp/
+if [ $test_bench_1_multicomp ]; then
+    assert_exit_code 0
+    for i in $ANSDIR/bench/bench12/*.vcf.gz
+    do
+        assert_equal $(fn_md5 $i) $(fn_md5 $OD/bench1_multicomp/input2/$(basename $i))
+    done
+    for i in $ANSDIR/bench/bench13/*.vcf.gz
+    do
+        assert_equal $(fn_md5 $i) $(fn_md5 $OD/bench1_multicomp/input3/$(basename $i))
+    done
+fi
+
+# --sample-map samples should each match their separate bench of the cohort
+printf "NA24385\t$INDIR/variants/input1.vcf.gz\nNA12878\t$INDIR/variants/input2.vcf.gz\n" > $OD/sample_map.txt
+run test_bench_cohort_sep $truv bench -b $INDIR/variants/input2.vcf.gz \
+                                      -c $INDIR/variants/multi.vcf.gz \
+                                      --cSample NA12878 --no-ref c \
+                                      -f $INDIR/references/reference.fa \
+                                      --dup-to-ins \
+                                      -o $OD/bench_cohort_sep/
+run test_bench_cohort $truv bench --sample-map $OD/sample_map.txt \
+                                  -c $INDIR/variants/multi.vcf.gz \
+                                  -f $INDIR/references/reference.fa \
+                                  --dup-to-ins \
+                                  -o $OD/bench_cohort/
+if [ $test_bench_cohort ]; then
+    assert_exit_code 0
+    for i in $OD/bench_cohort_sep/*.vcf.gz
+    do
+        assert_equal $(fn_md5 $i) $(fn_md5 $OD/bench_cohort/NA12878/$(basename $i))
+    done
+    assert_equal $(grep -c NA24385 $OD/bench_cohort/cohort.txt) 1
+fi
+
+# A comp whose header lists the contigs in another order should match the same comp
+reverse_contigs() {
+    # Write the VCF $1 with its ##contig lines reversed to $2.gz
+    python3 -c """
+import sys, gzip, pysam
+lines = gzip.open(sys.argv[1], 'rt').readlines()
+contigs = [_ for _ in lines if _.startswith('##contig')]
+others = [_ for _ in lines if not _.startswith('##contig')]
+with open(sys.argv[2], 'w') as fout:
+    fout.writelines(others[:1] + contigs[::-1] + others[1:])
+pysam.tabix_index(sys.argv[2], preset='vcf', force=True)
+""" $1 $2
+}
+summary_counts() {
+    python3 -c "import json; d = json.load(open('$1/summary.json')); print(d['TP-base'], d['FP'], d['FN'])"
+}
+python3 repo_utils/make_synthetic.py -o $OD/contig_order/ -n 300 --contigs 3 2> /dev/null
+reverse_contigs $OD/contig_order/comp.vcf.gz $OD/contig_order/comp_rev.vcf
+run test_bench_contig_order $truv bench -b $OD/contig_order/base.vcf.gz \
+                                        -c $OD/contig_order/comp.vcf.gz \
+                                        -o $OD/bench_contig_order/
+run test_bench_contig_order_rev $truv bench -b $OD/contig_order/base.vcf.gz \
+                                            -c $OD/contig_order/comp_rev.vcf.gz \
+                                            -o $OD/bench_contig_order_rev/
+if [ $test_bench_contig_order_rev ]; then
+    assert_exit_code 0
+    assert_equal "$(summary_counts $OD/bench_contig_order)" "$(summary_counts $OD/bench_contig_order_rev)"
+    for i in tp-base tp-comp fn fp
+    do
+        # comp outputs are sorted in the comp's header order
+        assert_equal $(vcf_body $OD/bench_contig_order/${i}.vcf.gz | sort | md5sum | cut -f1 -d\ ) \
+                     $(vcf_body $OD/bench_contig_order_rev/${i}.vcf.gz | sort | md5sum | cut -f1 -d\ )
+    done
+fi
+
 # --unroll
 run test_bench_unroll $truv bench -b $INDIR/variants/real_small_base.vcf.gz \
                                   -c $INDIR/variants/real_small_comp.vcf.gz \
@@ -61,6 +259,20 @@ if [ $test_bench_unroll ]; then
     bench_assert _unroll
 fi
 
+# --cache-dir results reused by a second run should match the answers
+rm -rf $OD/bench_seqsim_cache
+for k in _cache1 _cache2
+do
+    run test_bench${k} $truv bench -b $INDIR/variants/real_small_base.vcf.gz \
+                                   -c $INDIR/variants/real_small_comp.vcf.gz \
+                                   --cache-size 100 --cache-dir $OD/bench_seqsim_cache \
+                                   -o $OD/bench${k}/
+done
+if [ $test_bench_cache2 ]; then
+    assert_in_stderr "hits, 0 misses"
+    bench_assert _cache2 _unroll
+fi
+
 # --pick allele count
 run test_bench_12_gtcomp bench 1 2 12_gtcomp "--pick ac"
 if [ $test_bench_12_gtcomp ]; then
@@ -0,0 +1,23 @@
+# ------------------------------------------------------------
+#                                 benchmarks
+# ------------------------------------------------------------
+# The synthetic data should only depend on its parameters
+for k in 1 2
+do
+    run test_synthetic_${k} python3 repo_utils/make_synthetic.py -o $OD/synthetic_${k}/ -n 200 \
+                                    --samples 2 --symbolic-pct 0.2
+done
+if [ $test_synthetic_2 ]; then
+    assert_exit_code 0
+    for i in reference.fa base.vcf.gz comp.vcf.gz
+    do
+        assert_equal $(fn_md5 $OD/synthetic_1/$i) $(fn_md5 $OD/synthetic_2/$i)
+    done
+fi
+
+run test_benchmarks python3 repo_utils/run_benchmarks.py -w $OD/benchmark_data/ -o $OD/benchmarks.json \
+                                                         -s 200 -r 1 -t bench,collapse,stratify,vcf2df,anno_svinfo
+if [ $test_benchmarks ]; then
+    assert_exit_code 0
+    assert_equal $(python3 -c "import json; print(len(json.load(open('$OD/benchmarks.json'))['results']))") 5
+fi
@@ -111,3 +111,70 @@ if [ $test_collapse_chain ]; then
     collapse_assert issue196
 fi
 
+# --threads should match the single process answers
+run test_collapse_1_threads collapse 1 "--null-consolidate=PL,DP --threads 2"
+if [ $test_collapse_1_threads ]; then
+    collapse_assert 1
+fi
+
+run test_collapse_chain_threads $truv collapse -i $INDIR/variants/issue196_chain.vcf.gz \
+                        -o $OD/inputissue196_collapsed.vcf \
+                        -c $OD/inputissue196_removed.vcf \
+                        --chain --pctseq 0 --pctsize 0.35 --threads 2
+if [ $test_collapse_chain_threads ]; then
+    collapse_assert issue196
+fi
+
+run test_collapse_intragt_threads $truv collapse -i $INDIR/variants/bcftools_merged.vcf.gz \
+                        -o $OD/inputintragt_collapsed.vcf \
+                        -c $OD/inputintragt_removed.vcf \
+                        --intra --gt all --keep maxqual --threads 3
+if [ $test_collapse_intragt_threads ]; then
+    collapse_assert intragt
+fi
+
+run test_collapse_multi_common_threads $truv collapse -f $INDIR/references/reference.fa \
+                                               -i $INDIR/variants/multi.vcf.gz \
+                                               -o $OD/multi_collapsed_common.vcf \
+                                               -c $OD/multi_removed_common.vcf \
+                                               --keep common --threads 2
+if [ $test_collapse_multi_common_threads ]; then
+    collapse_multi_assert common
+fi
+
+# --profile should match the answers and write its stats beside the output
+run test_collapse_1_profile collapse 1 "--null-consolidate=PL,DP --profile"
+if [ $test_collapse_1_profile ]; then
+    collapse_assert 1
+    assert_equal $(ls $OD/ | grep -c "^input1_collapsed.vcf.perf.json$\|^input1_collapsed.vcf.pstats$") 2
+fi
+
+run test_collapse_profile_stdout $truv collapse -i $INDIR/variants/input1.vcf.gz --profile
+if [ $test_collapse_profile_stdout ]; then
+    assert_exit_code 100
+fi
+
+# Every --shard merged by merge-shards should match a single collapse of the regions
+collapse_bed() {
+    $truv collapse -f $INDIR/references/reference.fa \
+                   -i $INDIR/variants/input1.vcf.gz \
+                   -o $OD/input1_${1}_collapsed.vcf \
+                   -c $OD/input1_${1}_removed.vcf \
+                   --bed $INDIR/beds/include.bed ${2}
+}
+run test_collapse_bed collapse_bed bed
+for i in 1 2 3
+do
+    run test_collapse_shard$i collapse_bed shard$i "--shard $i/3"
+done
+run test_collapse_merge_shards $truv merge-shards -o $OD/input1_merged_collapsed.vcf \
+                                                  -c $OD/input1_merged_removed.vcf \
+                                                  $OD/input1_shard{1,2,3}_collapsed.vcf.shard.json
+if [ $test_collapse_merge_shards ]; then
+    assert_exit_code 0
+    for i in collapsed removed
+    do
+        assert_equal $(vcf_body $OD/input1_bed_${i}.vcf | md5sum | cut -f1 -d\ ) \
+                     $(vcf_body $OD/input1_merged_${i}.vcf | md5sum | cut -f1 -d\ )
+    done
+fi
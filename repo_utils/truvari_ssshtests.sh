@@ -14,6 +14,7 @@ mkdir -p $OD
 
 source $TESTSRC/sub_tests/anno.sh
 source $TESTSRC/sub_tests/bench.sh
+source $TESTSRC/sub_tests/benchmarks.sh
 source $TESTSRC/sub_tests/collapse.sh
 source $TESTSRC/sub_tests/consistency.sh
 source $TESTSRC/sub_tests/divide.sh
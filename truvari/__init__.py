@@ -26,62 +26,132 @@ Extra methods:
 
 :meth:`allele_freq_annos`
 :meth:`bed_ranges`
+:meth:`best_seqsim`
 :meth:`build_anno_tree`
+:meth:`cached_seqsim`
 :meth:`calc_af`
 :meth:`calc_hwe`
+:meth:`comp_names`
 :meth:`compress_index_vcf`
 :meth:`get_gt`
+:meth:`gt_count`
+:meth:`header_sorted_contigs`
 :meth:`get_scalebin`
 :meth:`get_sizebin`
 :meth:`get_svtype`
+:meth:`load_shard_manifests`
+:meth:`max_edit_distance`
+:meth:`merge_bench_dirs`
+:meth:`merge_collapse_shards`
+:meth:`merge_stats`
 :meth:`msa2vcf`
 :meth:`overlap_percent`
 :meth:`overlaps`
+:meth:`prepare_base`
+:meth:`prepared_params`
+:meth:`present_samples`
+:meth:`parse_shard`
+:meth:`parse_sweep`
+:meth:`perf_run`
 :meth:`phab`
+:meth:`read_sample_map`
 :meth:`reciprocal_overlap`
 :meth:`ref_ranges`
 :meth:`seqsim`
 :meth:`sizesim`
+:meth:`unroll`
 :meth:`unroll_compare`
 :meth:`vcf_ranges`
 
 Dev methods:
 
 :meth:`benchdir_count_entries`
+:meth:`call_arrays`
+:meth:`candidate_components`
+:meth:`candidate_pairs`
+:meth:`choose_fetch`
 :meth:`chunker`
 :meth:`cmd_exe`
+:meth:`cohort_chunker`
 :meth:`consolidate_phab_vcfs`
 :meth:`coords_within`
 :meth:`count_entries`
 :meth:`file_zipper`
 :meth:`help_unknown_cmd`
+:meth:`is_prepared`
 :meth:`make_temp_filename`
+:meth:`multi_chunker`
 :meth:`opt_gz_open`
 :meth:`optimize_df_memory`
+:meth:`pack_gts`
+:meth:`pack_strings`
+:meth:`perf_active`
+:meth:`perf_chunk`
+:meth:`perf_iter`
+:meth:`perf_merge`
+:meth:`perf_pop`
+:meth:`perf_stage`
+:meth:`perf_worker`
 :meth:`performance_metrics`
+:meth:`pick_ac_matches`
+:meth:`pick_multi_matches`
+:meth:`pick_single_matches`
+:meth:`plan_shards`
+:meth:`prefetch`
+:meth:`prepare_calls`
+:meth:`read_vcf_index`
+:meth:`unpack_strings`
 :meth:`region_filter`
 :meth:`restricted_float`
 :meth:`restricted_int`
+:meth:`route_chunks`
 :meth:`setup_logging`
+:meth:`shard_regions`
+:meth:`vcf_sort_key`
 :meth:`vcf_to_df`
+:meth:`write_shard_manifest`
 
 Objects:
 
 :class:`Bench`
 :class:`BenchOutput`
+:class:`BenchServer`
+:class:`BenchSweep`
+:class:`CohortBench`
 :class:`GT`
+:class:`Interval`
+:class:`IntervalIndex`
 :class:`RegionVCFIterator`
 :class:`LogFileStderr`
+:class:`MergedBenchOutput`
+:class:`MatchMatrix`
 :class:`MatchResult`
 :class:`Matcher`
+:class:`MultiCompBench`
+:class:`PerfStats`
+:class:`PreparedBase`
+:class:`ReferenceCache`
+:class:`SeqSimCache`
+:class:`ShardedBench`
+:class:`SparseMatchMatrix`
 :class:`StatsBox`
 :class:`SV`
+:class:`VariantView`
 
 Data:
 
+:data:`truvari.DENSE_CHUNK_SIZE`
 :data:`truvari.HEADERMAT`
+:data:`truvari.PICKERS`
 :data:`truvari.QUALBINS`
+:data:`truvari.SCREEN_DIST`
+:data:`truvari.SCREEN_OVL`
+:data:`truvari.SCREEN_PASS`
+:data:`truvari.SCREEN_SIZE`
+:data:`truvari.SCREEN_TYPE`
 :data:`truvari.SVTYTYPE`
+:data:`truvari.SWEEP_PARAMS`
+:data:`truvari.SWEEP_STATS`
 :data:`truvari.SZBINMAX`
 :data:`truvari.SZBINS`
 :data:`truvari.SZBINTYPE`
@@ -98,11 +168,23 @@ from truvari.annotations.af_calc import (
 
 from truvari.bench import (
     Bench,
+)
+
+from truvari.bench_output import (
     BenchOutput,
     StatsBox,
 )
 
+from truvari.cohort import (
+    CohortBench,
+    cohort_chunker,
+    present_samples,
+    read_sample_map,
+)
+
 from truvari.comparisons import (
+    best_seqsim,
+    cached_seqsim,
     coords_within,
     entry_boundaries,
     entry_distance,
@@ -120,45 +202,137 @@ from truvari.comparisons import (
     entry_variant_type,
     entry_within_tree,
     entry_within,
+    max_edit_distance,
     overlap_percent,
     overlaps,
     reciprocal_overlap,
     seqsim,
     sizesim,
+    unroll,
     unroll_compare,
     entry_overlaps_tree,
 )
 
+from truvari.interval_index import (
+    Interval,
+    IntervalIndex,
+)
+
 from truvari.matching import (
+    SCREEN_DIST,
+    SCREEN_OVL,
+    SCREEN_PASS,
+    SCREEN_SIZE,
+    SCREEN_TYPE,
+    DENSE_CHUNK_SIZE,
+    MatchMatrix,
     MatchResult,
     Matcher,
+    SparseMatchMatrix,
+    VariantView,
+    call_arrays,
+    candidate_components,
+    candidate_pairs,
     chunker,
-    file_zipper
+    gt_count,
+    file_zipper,
+    prefetch,
+    prepare_calls,
 )
 
 from truvari.msatovcf import (
     msa2vcf
 )
 
+from truvari.multicomp import (
+    MultiCompBench,
+    comp_names,
+    multi_chunker,
+    route_chunks,
+)
+
+from truvari.perf import (
+    PerfStats,
+    perf_active,
+    perf_chunk,
+    perf_iter,
+    perf_merge,
+    perf_pop,
+    perf_run,
+    perf_stage,
+    perf_worker,
+)
+
 from truvari.phab import (
     phab,
 )
 
+from truvari.pickers import (
+    PICKERS,
+    pick_ac_matches,
+    pick_multi_matches,
+    pick_single_matches,
+)
+
+from truvari.prepared import (
+    PreparedBase,
+    is_prepared,
+    pack_gts,
+    pack_strings,
+    prepare_base,
+    prepared_params,
+    unpack_strings,
+)
+
+from truvari.refcache import (
+    ReferenceCache,
+)
+
 from truvari.region_vcf_iter import (
     build_region_tree,
     build_anno_tree,
     merge_region_tree_overlaps,
     extend_region_tree,
+    choose_fetch,
+    header_sorted_contigs,
     region_filter,
     region_filter_fetch,
     region_filter_stream,
 )
 
+from truvari.serve import (
+    BenchServer,
+)
+
+from truvari.shards import (
+    MergedBenchOutput,
+    ShardedBench,
+    load_shard_manifests,
+    merge_bench_dirs,
+    merge_collapse_shards,
+    merge_stats,
+    parse_shard,
+    plan_shards,
+    shard_regions,
+    write_shard_manifest,
+)
+
+from truvari.simcache import (
+    SeqSimCache,
+)
+
 from truvari.stratify import (
     count_entries,
     benchdir_count_entries,
 )
 
+from truvari.sweep import (
+    SWEEP_PARAMS,
+    SWEEP_STATS,
+    BenchSweep,
+    parse_sweep,
+)
+
 from truvari.utils import (
     HEADERMAT,
     LogFileStderr,
@@ -175,6 +349,7 @@ from truvari.utils import (
     restricted_int,
     setup_logging,
     vcf_ranges,
+    vcf_sort_key,
 )
 
 from truvari.vcf2df import (
@@ -192,3 +367,7 @@ from truvari.vcf2df import (
     optimize_df_memory,
     vcf_to_df,
 )
+
+from truvari.vcf_index import (
+    read_vcf_index,
+)
@@ -19,6 +19,8 @@ from truvari.refine import refine_main
 from truvari.collapse import collapse_main
 from truvari.stratify import stratify_main
 from truvari.segmentation import segment_main
+from truvari.serve import serve_main
+from truvari.shards import merge_shards_main
 from truvari.consistency import consistency_main
 from truvari.make_ga4gh import make_ga4gh_main
 
@@ -38,9 +40,11 @@ TOOLS = {"bench": bench_main,
          "segment": segment_main,
          "stratify": stratify_main,
          "divide": divide_main,
+         "merge-shards": merge_shards_main,
          "phab": phab_main,
          "refine": refine_main,
          "ga4gh": make_ga4gh_main,
+         "serve": serve_main,
          "version": flat_version}
 
 USAGE = f"""\
@@ -55,9 +59,11 @@ Available commands:
     [bold][cyan]segment[/][/]       Normalization of SVs into disjointed genomic regions
     [bold][cyan]stratify[/][/]      Count variants per-region in vcf
     [bold][cyan]divide[/][/]        Divide a VCF into independent shards
+    [bold][cyan]merge-shards[/][/]  Merge the --shard outputs of bench or collapse
     [bold][cyan]phab[/][/]          Variant harmonization using MSA
     [bold][cyan]refine[/][/]        Automated bench result refinement with phab
     [bold][cyan]ga4gh[/][/]         Convert Truvari result to GA4GH
+    [bold][cyan]serve[/][/]         Bench against prepared bases held in memory
     [bold][cyan]version[/][/]       Print the Truvari version and exit
 """
 
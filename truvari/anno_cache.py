@@ -0,0 +1,155 @@
+"""
+Binary sidecar caches of parsed annotation files for :meth:`truvari.build_anno_tree`
+
+A file's cache is written beside it as `<filename>.tvidx` and holds each contig's sorted intervals so they can
+be memory-mapped instead of re-parsed. The layout is a magic line, the length of a json header, the json header,
+and then padding to 8 bytes followed by four int64 arrays (begins, ends, running max of ends, and line numbers) of
+every contig concatenated in the header's order.
+
+A cache is only used when it was made with the same parsing parameters and its source file has the same size
+and either the same modification time or the same md5.
+"""
+import os
+import json
+import struct
+import hashlib
+import logging
+
+import numpy as np
+
+from truvari.interval_index import IntervalIndex
+
+CACHE_EXT = ".tvidx"
+CACHE_MAGIC = b"TVIDX1\n"
+# Files smaller than this are quick to parse and aren't cached
+CACHE_MIN_SIZE = 1 << 20
+
+
+def cache_name(filename):
+    """
+    Path of the file's sidecar cache
+    """
+    return filename + CACHE_EXT
+
+
+def file_md5(filename):
+    """
+    md5 hexdigest of a file's contents
+    """
+    md5 = hashlib.md5()
+    with open(filename, 'rb') as fh:
+        for block in iter(lambda: fh.read(1 << 20), b''):
+            md5.update(block)
+    return md5.hexdigest()
+
+
+def file_stamp(filename):
+    """
+    Size and modification time of a file
+    """
+    stat = os.stat(filename)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def cacheable(filename):
+    """
+    True if the file is a regular file large enough to be cached
+    """
+    return os.path.isfile(filename) and os.path.getsize(filename) >= CACHE_MIN_SIZE
+
+
+def read_header(cache_fn):
+    """
+    Returns the json header of a cache and the offset of its arrays. Raises ValueError on malformed caches
+    """
+    with open(cache_fn, 'rb') as fh:
+        if fh.read(len(CACHE_MAGIC)) != CACHE_MAGIC:
+            raise ValueError(f"{cache_fn} is not a truvari cache")
+        size = struct.unpack("<Q", fh.read(8))[0]
+        header = json.loads(fh.read(size))
+    offset = len(CACHE_MAGIC) + 8 + size
+    return header, offset + (-offset % 8)
+
+
+def load_anno_cache(filename, params):
+    """
+    Load the intervals of a file from its sidecar cache
+
+    :param `filename`: Path to the parsed file
+    :type `filename`: string
+    :param `params`: Parameters the file is parsed with
+    :type `params`: dict
+
+    :return: dictionary with chromosome keys and :class:`truvari.IntervalIndex` values and the number of lines
+        parsed, or None if there's no valid cache
+    :rtype: tuple
+    """
+    cache_fn = cache_name(filename)
+    if not os.path.exists(cache_fn):
+        return None
+    try:
+        header, offset = read_header(cache_fn)
+    except (OSError, ValueError, struct.error) as e:
+        logging.debug("Ignoring cache %s: %s", cache_fn, e)
+        return None
+    source = header["source"]
+    stamp = file_stamp(filename)
+    if header["params"] != params or source["size"] != stamp["size"]:
+        logging.debug("Ignoring stale cache %s", cache_fn)
+        return None
+    if source["mtime_ns"] != stamp["mtime_ns"] and source["md5"] != file_md5(filename):
+        logging.debug("Ignoring stale cache %s", cache_fn)
+        return None
+
+    total = sum(_[1] for _ in header["contigs"])
+    # mmap can't map zero bytes
+    arrays = np.memmap(cache_fn, dtype="<i8", mode='r', offset=offset, shape=(4, total)) if total else None
+    tree = {}
+    start = 0
+    for chrom, count in header["contigs"]:
+        cols = arrays[:, start:start + count]
+        tree[chrom] = IntervalIndex.from_sorted(cols[0], cols[1], cols[3], max_ends=cols[2])
+        start += count
+    logging.debug("Loaded %s from cache", filename)
+    return tree, header["count"]
+
+
+def save_anno_cache(filename, params, tree, count, md5):
+    """
+    Write the intervals parsed from a file to its sidecar cache. Caches which can't be written (e.g. in a
+    read-only directory) are skipped
+
+    :param `filename`: Path to the parsed file
+    :type `filename`: string
+    :param `params`: Parameters the file was parsed with
+    :type `params`: dict
+    :param `tree`: Intervals parsed from the file with integer line number data
+    :type `tree`: dict
+    :param `count`: Number of lines parsed
+    :type `count`: int
+    :param `md5`: md5 of the file's contents
+    :type `md5`: string
+    """
+    contigs = [[chrom, len(index)] for chrom, index in tree.items()]
+    header = json.dumps({"source": dict(file_stamp(filename), md5=md5),
+                         "params": params,
+                         "count": count,
+                         "contigs": contigs}).encode()
+    offset = len(CACHE_MAGIC) + 8 + len(header)
+    cache_fn = cache_name(filename)
+    tmp_fn = f"{cache_fn}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_fn, 'wb') as fout:
+            fout.write(CACHE_MAGIC)
+            fout.write(struct.pack("<Q", len(header)))
+            fout.write(header)
+            fout.write(b'\0' * (-offset % 8))
+            for col in range(4):
+                for index in tree.values():
+                    arr = (index.begins, index.ends, index.max_ends, index.data)[col]
+                    fout.write(np.ascontiguousarray(arr, dtype="<i8").tobytes())
+        os.replace(tmp_fn, cache_fn)
+    except OSError as e:
+        logging.debug("Unable to write cache %s: %s", cache_fn, e)
+        if os.path.exists(tmp_fn):
+            os.remove(tmp_fn)
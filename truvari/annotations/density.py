@@ -7,7 +7,6 @@ from collections import Counter, defaultdict
 import pysam
 import joblib
 import pandas as pd
-from intervaltree import IntervalTree
 
 import truvari
 
@@ -59,7 +58,7 @@ def density_main(args):
         logging.info("Masked %d regions", mask_cnt)
 
     # setting new indexes after masking
-    new_tree = defaultdict(IntervalTree)
+    new_tree = defaultdict(truvari.IntervalIndex)
     cnt = 0
     for chrom, intvs in tree.items():
         for intv in intvs:
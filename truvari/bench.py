@@ -4,13 +4,12 @@ Given baseline and comparison sets of variants, calculate the recall/precision/f
 """
 import os
 import sys
-import copy
 import json
 import logging
 import argparse
-import itertools
+import multiprocessing
 
-from collections import defaultdict, OrderedDict, Counter
+from collections import deque
 
 import pysam
 import numpy as np
@@ -29,16 +28,45 @@ def parse_args(args):
     defaults = truvari.Matcher.make_match_params()
     parser = argparse.ArgumentParser(prog="bench", description=__doc__,
                                      formatter_class=argparse.RawDescriptionHelpFormatter)
-    parser.add_argument("-b", "--base", type=str, required=True,
-                        help="Baseline truth-set calls")
-    parser.add_argument("-c", "--comp", type=str, required=True,
-                        help="Comparison set of calls")
-    parser.add_argument("-o", "--output", type=str, required=True,
+    parser.add_argument("-b", "--base", type=str, default=None,
+                        help="Baseline truth-set calls or a --prepare-base directory")
+    parser.add_argument("-c", "--comp", type=str, nargs="+", default=None,
+                        help="Comparison set of calls. Multiple are each benched against the base in one pass")
+    parser.add_argument("-o", "--output", type=str, default=None,
                         help="Output directory")
     parser.add_argument("-f", "--reference", type=str, default=None,
                         help="Fasta used to call variants. Only needed with symbolic variants.")
     parser.add_argument("--short", action="store_true",
                         help="Short circuit comparisions. Faster, but fewer annotations")
+    parser.add_argument("--prepare-base", type=str, default=None,
+                        help="Only filter the --base calls and save them to this directory for reuse as --base")
+    parser.add_argument("--sample-map", type=str, default=None,
+                        help=("Bench samples of a cohort --comp against their own base instead of --base. Tab-delimited "
+                              "lines of a --comp sample, its base VCF, and optionally the base's sample (first)"))
+    parser.add_argument("--summary-only", action="store_true",
+                        help="Only make the summary.json and candidate.refine.bed. No vcfs are written")
+    parser.add_argument("--sweep", type=str, action="append", default=None,
+                        help=("Summarize a grid of thresholds, e.g. 'pctseq=0.5,0.7,0.9'. Repeat for more "
+                              f"parameters. Can sweep: {', '.join(truvari.SWEEP_PARAMS)}"))
+    parser.add_argument("--threads", type=truvari.restricted_int, default=1,
+                        help="Number of processes comparing chunks (%(default)s)")
+    parser.add_argument("--inflight", type=truvari.restricted_int, default=None,
+                        help="Max number of chunks held in memory when using --threads (threads * 4)")
+    parser.add_argument("--shards", type=truvari.restricted_int, default=1,
+                        help=("Split the --includebed regions (or contigs) into this many shards benched by "
+                              "separate processes (%(default)s)"))
+    parser.add_argument("--shard", type=truvari.parse_shard, default=None,
+                        help=("Only bench shard i/N of the --shards plan. Merge every shard's output with "
+                              "`truvari merge-shards`"))
+    parser.add_argument("--prefetch", type=truvari.restricted_int, default=4,
+                        help="Number of chunks read ahead by a background thread. 0 to disable (%(default)s)")
+    parser.add_argument("--cache-size", type=truvari.restricted_int, default=0,
+                        help="Number of sequence similarity results memoized in memory (%(default)s)")
+    parser.add_argument("--cache-dir", type=str, default=None,
+                        help=("Directory to persist sequence similarity results across runs. Without --cache-size, "
+                              "100000 results are also memoized in memory"))
+    parser.add_argument("--profile", action="store_true",
+                        help="Run under cProfile and write its stats to profile.pstats")
     parser.add_argument("--debug", action="store_true", default=False,
                         help="Verbose logging")
 
@@ -53,7 +81,7 @@ def parse_args(args):
                         help="Min reciprocal overlap (%(default)s)")
     thresg.add_argument("-t", "--typeignore", action="store_true", default=defaults.typeignore,
                         help="Don't compare variant types (%(default)s)")
-    thresg.add_argument("--pick", type=str, default=defaults.pick, choices=PICKERS.keys(),
+    thresg.add_argument("--pick", type=str, default=defaults.pick, choices=truvari.PICKERS.keys(),
                         help="Number of matches reported per-call (%(default)s)")
     thresg.add_argument("--dup-to-ins", action="store_true",
                         help="Assume DUP svtypes are INS (%(default)s)")
@@ -89,18 +117,17 @@ def parse_args(args):
     # set sizefilt to sizemin. Otherwise, if sizefilt not provided, set to default
     # This just makes it easier to specify e.g. `-s 1` instead of `-s 1 -S 1`
     if args.sizefilt is None:
-        if args.sizemin < defaults.sizefilt:
-            args.sizefilt = args.sizemin
-        else:
-            args.sizefilt = defaults.sizefilt
+        args.sizefilt = min(args.sizemin, defaults.sizefilt)
 
     # Setup abspaths
-    args.base = os.path.abspath(args.base)
-    args.comp = os.path.abspath(args.comp)
+    args.base = os.path.abspath(args.base) if args.base else args.base
+    args.comp = [os.path.abspath(_) for _ in args.comp] if args.comp else args.comp
     args.includebed = os.path.abspath(
         args.includebed) if args.includebed else args.includebed
     args.reference = os.path.abspath(
         args.reference) if args.reference else args.reference
+    args.prepare_base = os.path.abspath(
+        args.prepare_base) if args.prepare_base else args.prepare_base
 
     return args
 
@@ -110,7 +137,13 @@ def check_params(args):
     Checks parameters as much as possible.
     All errors are written to stderr without logging since failures mean no output
     """
-    check_fail = False
+    if args.prepare_base is None and (not args.comp or not args.output):
+        logging.error("--comp and --output are required")
+        return True
+    if bool(args.base) == bool(args.sample_map):
+        logging.error("One of --base or --sample-map is required")
+        return True
+    check_fail = args.prepare_base is not None and check_prepare_base(args)
     if args.chunksize < args.refdist:
         logging.error("--chunksize must be >= --refdist")
         check_fail = True
@@ -120,28 +153,32 @@ def check_params(args):
     if args.bench_overlaps and args.includebed is None:
         logging.error("--bench-overlaps can only be used when --includebed is set")
         check_fail = True
-    if os.path.isdir(args.output):
-        logging.error("Output directory '%s' already exists", args.output)
+    if args.sweep and check_sweep(args):
         check_fail = True
-    if not os.path.exists(args.comp):
-        logging.error("File %s does not exist", args.comp)
+    if args.comp and len(args.comp) > 1 and check_multi_comp(args):
         check_fail = True
-    if not os.path.exists(args.base):
-        logging.error("File %s does not exist", args.base)
+    if args.sample_map and check_sample_map(args):
         check_fail = True
-    if not args.comp.endswith(".gz"):
-        logging.error("Comparison vcf %s does not end with .gz. Must be bgzip'd",
-                      args.comp)
+    if (args.shards > 1 or args.shard) and check_shards(args):
         check_fail = True
-    if not truvari.check_vcf_index(args.comp):
-        logging.error("Comparison vcf '%s' must be indexed.", args.comp)
+    if args.inflight is not None and args.inflight < 1:
+        logging.error("--inflight must be at least 1")
         check_fail = True
-    if not args.base.endswith(".gz"):
-        logging.error("Base vcf %s does not end with .gz. Must be bgzip'd",
-                      args.base)
+    if args.output and os.path.isdir(args.output):
+        logging.error("Output directory '%s' already exists", args.output)
         check_fail = True
-    if not truvari.check_vcf_index(args.base):
-        logging.error("Base vcf '%s' must be indexed.", args.base)
+    for comp in args.comp or []:
+        if not os.path.exists(comp):
+            logging.error("File %s does not exist", comp)
+            check_fail = True
+        if not comp.endswith(".gz"):
+            logging.error("Comparison vcf %s does not end with .gz. Must be bgzip'd",
+                          comp)
+            check_fail = True
+        if not truvari.check_vcf_index(comp):
+            logging.error("Comparison vcf '%s' must be indexed.", comp)
+            check_fail = True
+    if args.base and check_base(args.base):
         check_fail = True
     if args.includebed and not os.path.exists(args.includebed):
         logging.error("Include bed %s does not exist", args.includebed)
@@ -153,6 +190,111 @@ def check_params(args):
     return check_fail
 
 
+def check_base(base):
+    """
+    Checks a base vcf or prepared base exists. Returns True if it's bad
+    """
+    if not os.path.exists(base):
+        logging.error("File %s does not exist", base)
+        return True
+    if truvari.is_prepared(base):
+        return False
+    check_fail = False
+    if not base.endswith(".gz"):
+        logging.error("Base vcf %s does not end with .gz. Must be bgzip'd",
+                      base)
+        check_fail = True
+    if not truvari.check_vcf_index(base):
+        logging.error("Base vcf '%s' must be indexed.", base)
+        check_fail = True
+    return check_fail
+
+
+def check_sweep(args):
+    """
+    Checks the --sweep grid. Returns True if it's bad
+    """
+    try:
+        grid = truvari.parse_sweep(args.sweep)
+    except ValueError as e:
+        logging.error("Bad --sweep: %s", e)
+        return True
+    if max(grid.get("refdist", [0])) > args.chunksize:
+        logging.error("--chunksize must be >= --sweep refdist values")
+        return True
+    return False
+
+
+def check_shards(args):
+    """
+    Checks --shards or --shard can be used. Returns True if they can't
+    """
+    check_fail = False
+    if args.sweep or args.sample_map or len(args.comp) > 1 or truvari.is_prepared(args.base):
+        logging.error("--shards/--shard can't be used with --sweep, --sample-map, multiple --comp, or a prepared --base")
+        check_fail = True
+    if args.shards > 1 and args.shard:
+        logging.error("--shards and --shard can't be used together")
+        check_fail = True
+    if args.shards > 1 and args.threads > 1:
+        logging.error("--shards can't be used with --threads")
+        check_fail = True
+    return check_fail
+
+
+def check_prepare_base(args):
+    """
+    Checks --prepare-base. Returns True if it's bad
+    """
+    check_fail = False
+    if args.comp or args.output:
+        logging.error("--prepare-base only prepares the base. Bench with it as --base afterwards")
+        check_fail = True
+    if os.path.exists(args.prepare_base):
+        logging.error("Prepared base '%s' already exists", args.prepare_base)
+        check_fail = True
+    if args.base and truvari.is_prepared(args.base):
+        logging.error("--base is already prepared")
+        check_fail = True
+    return check_fail
+
+
+def check_multi_comp(args):
+    """
+    Checks multiple --comp can be benched together. Returns True if they can't
+    """
+    if args.sweep:
+        logging.error("--sweep can only be used with a single --comp")
+        return True
+    names = truvari.comp_names(args.comp)
+    if len(set(names)) != len(names):
+        logging.error("Multiple --comp need unique file names for their output subdirectories")
+        return True
+    return False
+
+
+def check_sample_map(args):
+    """
+    Checks the --sample-map and its base vcfs. Returns True if they're bad
+    """
+    if args.sweep or args.prepare_base or len(args.comp) > 1 or args.bSample or args.cSample:
+        logging.error("--sample-map can't be used with --sweep, --prepare-base, multiple --comp, or --bSample/--cSample")
+        return True
+    try:
+        sample_map = truvari.read_sample_map(args.sample_map)
+    except (OSError, ValueError) as e:
+        logging.error("Bad --sample-map: %s", e)
+        return True
+    samples = [_[0] for _ in sample_map]
+    if not samples or len(set(samples)) != len(samples):
+        logging.error("--sample-map needs each --comp sample once")
+        return True
+    check_fail = False
+    for _, base, _ in sample_map:
+        check_fail |= check_base(base)
+    return check_fail
+
+
 def check_sample(vcf_fn, sample_id=None):
     """
     Checks that a sample is inside a vcf
@@ -171,237 +313,53 @@ def check_sample(vcf_fn, sample_id=None):
     return check_fail, sample_id
 
 
-def check_inputs(args):
+def check_prepared(args, base, sample):
     """
-    Checks the inputs to ensure expected values are found inside of files
-    Returns True if check failed
+    Checks a prepared base was made with the parameters. Returns True if it wasn't
     """
-    b_check, args.bSample = check_sample(args.base, args.bSample)
-    c_check, args.cSample = check_sample(args.comp, args.cSample)
-    return b_check or c_check
-
-
-###############
-# VCF editing #
-###############
-def edit_header(my_vcf):
-    """
-    Add INFO for new fields to vcf
-    """
-    header = my_vcf.header.copy()
-    header.add_line(('##INFO=<ID=TruScore,Number=1,Type=Integer,'
-                     'Description="Truvari score for similarity of match">'))
-    header.add_line(('##INFO=<ID=PctSeqSimilarity,Number=1,Type=Float,'
-                     'Description="Pct sequence similarity between this variant and its closest match">'))
-    header.add_line(('##INFO=<ID=PctSizeSimilarity,Number=1,Type=Float,'
-                     'Description="Pct size similarity between this variant and its closest match">'))
-    header.add_line(('##INFO=<ID=PctRecOverlap,Number=1,Type=Float,'
-                     'Description="Percent reciprocal overlap percent of the two calls\' coordinates">'))
-    header.add_line(('##INFO=<ID=StartDistance,Number=1,Type=Integer,'
-                     'Description="Distance of the base call\'s end from comparison call\'s start">'))
-    header.add_line(('##INFO=<ID=EndDistance,Number=1,Type=Integer,'
-                     'Description="Distance of the base call\'s end from comparison call\'s end">'))
-    header.add_line(('##INFO=<ID=SizeDiff,Number=1,Type=Float,'
-                     'Description="Difference in size of base and comp calls">'))
-    header.add_line(('##INFO=<ID=GTMatch,Number=1,Type=Integer,'
-                     'Description="Base/Comparison genotypes AC difference">'))
-    header.add_line(('##INFO=<ID=MatchId,Number=.,Type=String,'
-                     'Description="Tuple of base and comparison call ids which were matched">'))
-    header.add_line(('##INFO=<ID=Multi,Number=0,Type=Flag,'
-                     'Description="Call is false due to non-multimatching">'))
-    return header
-
-
-def annotate_entry(entry, match, header):
-    """
-    Make a new entry with all the information
-    """
-    entry.translate(header)
-    entry.info["PctSeqSimilarity"] = round(
-        match.seqsim, 4) if match.seqsim is not None else None
-    entry.info["PctSizeSimilarity"] = round(
-        match.sizesim, 4) if match.sizesim is not None else None
-    entry.info["PctRecOverlap"] = round(
-        match.ovlpct, 4) if match.ovlpct is not None else None
-    entry.info["SizeDiff"] = match.sizediff
-    entry.info["StartDistance"] = match.st_dist
-    entry.info["EndDistance"] = match.ed_dist
-    entry.info["GTMatch"] = match.gt_match
-    entry.info["TruScore"] = int(match.score) if match.score else None
-    entry.info["MatchId"] = match.matid
-    entry.info["Multi"] = match.multi
+    params = truvari.prepared_params(truvari.Matcher.make_match_params_from_args(args),
+                                     args.includebed, args.bench_overlaps)
+    params["bSample"] = sample
+    mismatched = truvari.PreparedBase(base).mismatched(params)
+    if mismatched:
+        logging.error("Prepared base %s was made with different %s", base, ", ".join(mismatched))
+        return True
+    return False
 
 
-#############
-# Core code #
-#############
-class StatsBox(OrderedDict):
+def check_base_sample(args, base, sample):
     """
-    Make a blank stats box for counting TP/FP/FN and calculating performance
+    Checks the sample is inside the base vcf or prepared base
+    Returns True if check failed and the sample
     """
+    prepared = truvari.is_prepared(base)
+    b_check, sample = check_sample(os.path.join(base, "calls.vcf.gz") if prepared else base, sample)
+    if prepared and not b_check:
+        b_check = check_prepared(args, base, sample)
+    return b_check, sample
 
-    def __init__(self):
-        super().__init__()
-        self["TP-base"] = 0
-        self["TP-comp"] = 0
-        self["FP"] = 0
-        self["FN"] = 0
-        self["precision"] = 0
-        self["recall"] = 0
-        self["f1"] = 0
-        self["base cnt"] = 0
-        self["comp cnt"] = 0
-        self["TP-comp_TP-gt"] = 0
-        self["TP-comp_FP-gt"] = 0
-        self["TP-base_TP-gt"] = 0
-        self["TP-base_FP-gt"] = 0
-        self["gt_concordance"] = 0
-        self["gt_matrix"] = defaultdict(Counter)
-
-    def calc_performance(self):
-        """
-        Calculate the precision/recall
-        """
-        if self["TP-base"] == 0 and self["FN"] == 0:
-            logging.warning("No TP or FN calls in --base VCF!")
-        elif self["TP-comp"] == 0 and self["FP"] == 0:
-            logging.warning("No TP or FP calls in --comp VCF!")
-
-        precision, recall, f1 = truvari.performance_metrics(
-            self["TP-base"], self["TP-comp"], self["FN"], self["FP"])
 
-        self["precision"] = precision
-        self["recall"] = recall
-        self["f1"] = f1
-        if self["TP-comp_TP-gt"] + self["TP-comp_FP-gt"] != 0:
-            self["gt_concordance"] = float(self["TP-comp_TP-gt"]) / (self["TP-comp_TP-gt"] +
-                                                                     self["TP-comp_FP-gt"])
-
-    def clean_out(self):
-        """
-        When reusing a StatsBox (typically inside refine), gt numbers
-        are typically invalidated. This removes those numbers from self to make
-        a cleaner report
-        """
-        del self["TP-comp_TP-gt"]
-        del self["TP-comp_FP-gt"]
-        del self["TP-base_TP-gt"]
-        del self["TP-base_FP-gt"]
-        del self["gt_concordance"]
-        del self["gt_matrix"]
-
-    def write_json(self, out_name):
-        """
-        Write stats as json to file
-        """
-        with open(out_name, 'w') as fout:
-            fout.write(json.dumps(self, indent=4))
-
-
-class BenchOutput():
+def check_inputs(args):
     """
-    Makes all of the output files for a Bench.run
-
-    The variable `BenchOutput.vcf_filenames` holds a dictonary. The keys are tpb, tpc
-    for true positive base/comp vcf filename and fn, fp. The variable `stats_box` holds
-    a :class:`StatsBox`.
+    Checks the inputs to ensure expected values are found inside of files
+    Returns True if check failed
     """
-
-    def __init__(self, bench, matcher):
-        """
-        initialize
-        """
-        self.m_bench = bench
-        self.m_matcher = matcher
-
-        os.mkdir(self.m_bench.outdir)
-        param_dict = self.m_bench.param_dict()
-        param_dict.update(vars(self.m_matcher.params))
-
-        if self.m_bench.do_logging:
-            truvari.setup_logging(self.m_bench.debug, truvari.LogFileStderr(
-                os.path.join(self.m_bench.outdir, "log.txt")), show_version=True)
-            logging.info("Params:\n%s", json.dumps(param_dict, indent=4))
-
-        with open(os.path.join(self.m_bench.outdir, 'params.json'), 'w') as fout:
-            json.dump(param_dict, fout)
-
-        b_vcf = pysam.VariantFile(self.m_bench.base_vcf)
-        c_vcf = pysam.VariantFile(self.m_bench.comp_vcf)
-        self.n_headers = {'b': edit_header(b_vcf),
-                          'c': edit_header(c_vcf)}
-
-        self.vcf_filenames = {'tpb': os.path.join(self.m_bench.outdir, "tp-base.vcf"),
-                              'tpc': os.path.join(self.m_bench.outdir, "tp-comp.vcf"),
-                              'fn': os.path.join(self.m_bench.outdir, "fn.vcf"),
-                              'fp': os.path.join(self.m_bench.outdir, "fp.vcf")}
-        self.out_vcfs = {}
-        for key in ['tpb', 'fn']:
-            self.out_vcfs[key] = pysam.VariantFile(
-                self.vcf_filenames[key], mode='w', header=self.n_headers['b'])
-        for key in ['tpc', 'fp']:
-            self.out_vcfs[key] = pysam.VariantFile(
-                self.vcf_filenames[key], mode='w', header=self.n_headers['c'])
-
-        self.stats_box = StatsBox()
-
-    def write_match(self, match):
-        """
-        Annotate a MatchResults' entries then write to the apppropriate file
-        and do the stats counting.
-        Writer is responsible for handling FPs between sizefilt-sizemin
-        """
-        box = self.stats_box
-        if match.base:
-            box["base cnt"] += 1
-            annotate_entry(match.base, match, self.n_headers['b'])
-            if match.state:
-                gtBase = str(match.base_gt)
-                gtComp = str(match.comp_gt)
-                box["gt_matrix"][gtBase][gtComp] += 1
-
-                box["TP-base"] += 1
-                self.out_vcfs["tpb"].write(match.base)
-                if match.gt_match == 0:
-                    box["TP-base_TP-gt"] += 1
-                else:
-                    box["TP-base_FP-gt"] += 1
-            else:
-                box["FN"] += 1
-                self.out_vcfs["fn"].write(match.base)
-
-        if match.comp:
-            annotate_entry(match.comp, match, self.n_headers['c'])
-            if match.state:
-                box["comp cnt"] += 1
-                box["TP-comp"] += 1
-                self.out_vcfs["tpc"].write(match.comp)
-                if match.gt_match == 0:
-                    box["TP-comp_TP-gt"] += 1
-                else:
-                    box["TP-comp_FP-gt"] += 1
-            elif truvari.entry_size(match.comp) >= self.m_matcher.params.sizemin:
-                # The if is because we don't count FPs between sizefilt-sizemin
-                box["comp cnt"] += 1
-                box["FP"] += 1
-                self.out_vcfs["fp"].write(match.comp)
-
-    def close_outputs(self):
-        """
-        Close all the files
-        """
-        for i in self.out_vcfs.values():
-            i.close()
-
-        for i in self.vcf_filenames.values():
-            truvari.compress_index_vcf(i)
-
-        self.stats_box.calc_performance()
-        self.stats_box.write_json(os.path.join(
-            self.m_bench.outdir, "summary.json"))
+    if args.sample_map:
+        checks = [check_sample(args.comp[0], comp_sample)[0] or check_base_sample(args, base, base_sample)[0]
+                  for comp_sample, base, base_sample in truvari.read_sample_map(args.sample_map)]
+        return any(checks)
+    b_check, args.bSample = check_base_sample(args, args.base, args.bSample)
+    c_checks = [check_sample(_, args.cSample) for _ in args.comp or []]
+    # Multiple comps without a --cSample each use their first sample
+    if len(c_checks) == 1:
+        args.cSample = c_checks[0][1]
+    return b_check or any(c_check for c_check, _ in c_checks)
 
 
-class Bench():
+#############
+# Core code #
+#############
+class Bench():  # pylint: disable=too-many-instance-attributes
     """
     Object to perform operations of truvari bench
 
@@ -431,7 +389,7 @@ class Bench():
 
        match_matrix = m_bench.build_matrix(base_variants, comp_variants)
 
-    This can then be used for things such as creating custom match pickers or adding new matching checks.
+    This :class:`MatchMatrix` can then be used for things such as creating custom match pickers or adding new matching checks.
 
     If you want to run on existing files, simply supply the arguments to init
 
@@ -442,11 +400,22 @@ class Bench():
 
     Note that running on files must write to an output directory and is the only way to use things like 'includebed'.
     However, the returned `BenchOutput` has attributes pointing to all the results.
+
+    Chunks can be compared by a pool of processes by setting `threads`. Results are still written in the original
+    chunk order, so the output is identical to a single process run. At most `inflight` chunks (default threads * 4)
+    are held in memory while waiting on their results.
+
+    Reading and decoding the VCFs into chunks happens in a background thread which keeps up to `prefetch` chunks
+    ready ahead of the comparisons. Set `prefetch` to 0 to read in the same thread.
+
+    Setting a `region_tree` (e.g. a shard of the regions made by :meth:`truvari.plan_shards`) benches its regions
+    instead of the includebed's. A `shard_id` prefixes the chunk ids in the MatchIds so they're unique across
+    shards of the same bench.
     """
 
-    def __init__(self, matcher=None, base_vcf=None, comp_vcf=None, outdir=None,
+    def __init__(self, matcher=None, base_vcf=None, comp_vcf=None, outdir=None,  # pylint: disable=too-many-arguments
                  includebed=None, bench_overlaps=False, extend=0, debug=False,
-                 do_logging=False, short_circuit=False):
+                 do_logging=False, short_circuit=False, threads=1, inflight=None, prefetch=4):
         """
         Initilize
         """
@@ -460,60 +429,172 @@ class Bench():
         self.debug = debug
         self.do_logging = do_logging
         self.short_circuit = short_circuit
+        self.threads = threads
+        self.inflight = inflight if inflight is not None else threads * 4
+        self.prefetch = prefetch
         self.refine_candidates = []
+        self.region_tree = None
+        self.shard_id = None
 
     def param_dict(self):
         """
         Returns the parameters as a dict
         """
-        return {'base': self.base_vcf,
+        return {'base': getattr(self.base_vcf, "path", self.base_vcf),
                 "comp": self.comp_vcf,
                 "output": self.outdir,
                 "includebed": self.includebed,
                 "bench_overlaps": self.bench_overlaps,
                 "extend": self.extend,
-                "debug": self.debug}
+                "debug": self.debug,
+                "threads": self.threads}
 
-    def run(self):
+    def run(self, write_vcfs=True):
         """
-        Runs bench and returns the resulting :class:`truvari.BenchOutput`
+        Runs bench and returns the resulting :class:`truvari.BenchOutput`.
+        When not `write_vcfs`, only the summary.json and candidate.refine.bed are made
         """
         if self.base_vcf is None or self.comp_vcf is None or self.outdir is None:
             raise RuntimeError(
                 "Cannot call Bench.run without base/comp vcf filenames and outdir")
 
-        output = BenchOutput(self, self.matcher)
+        output = truvari.BenchOutput(self, self.matcher, write_vcfs)
+        region_tree, chunks = self.make_chunks(write_vcfs)
+        for result in self.compare_chunks(chunks):
+            self.write_result(output, result, region_tree)
 
-        base = pysam.VariantFile(self.base_vcf)
-        comp = pysam.VariantFile(self.comp_vcf)
+        with open(os.path.join(self.outdir, 'candidate.refine.bed'), 'w') as fout:
+            fout.write("\n".join(self.refine_candidates))
 
-        region_tree = truvari.build_region_tree(base, comp, self.includebed)
-        truvari.merge_region_tree_overlaps(region_tree)
-        regions_extended = (truvari.extend_region_tree(region_tree, self.extend)
-                            if self.extend else region_tree)
+        if self.matcher.seqsim_cache is not None:
+            self.matcher.seqsim_cache.log_stats()
+            self.matcher.seqsim_cache.close()
+        output.close_outputs()
+        return output
 
-        base_i = truvari.region_filter(base, region_tree, bench_overlaps=self.bench_overlaps)
-        comp_i = truvari.region_filter(comp, regions_extended, bench_overlaps=self.bench_overlaps)
+    def make_chunks(self, records=True):
+        """
+        Returns the includebed's region tree and the chunks of base/comp calls within it.
+        Prepared bases only read their records when `records`
+        """
+        base = self.open_base(records)
+        comp = pysam.VariantFile(self.comp_vcf)
+        region_tree, regions_extended = self.make_regions(base, comp)
+        # Both files are read in the base's contig order so the zipper keeps their calls together
+        contigs = truvari.header_sorted_contigs(base, regions_extended.keys())
 
-        chunks = truvari.chunker(
-            self.matcher, ('base', base_i), ('comp', comp_i))
-        for match in itertools.chain.from_iterable(map(self.compare_chunk, chunks)):
-            # setting non-matched comp variants (that are not fully contained in the original regions) to None
-            # These don't count as FP or TP and don't appear in the output vcf files
-            check_tree = truvari.entry_overlaps_tree if self.bench_overlaps else truvari.entry_within_tree
+        base_i = self.base_calls(base, region_tree, contigs)
+        comp_i = truvari.region_filter(comp, regions_extended, bench_overlaps=self.bench_overlaps, contigs=contigs)
 
-            if (self.extend
-                and (match.comp is not None)
-                and not match.state
-                and not check_tree(match.comp, region_tree)):
-                match.comp = None
-            output.write_match(match)
+        chunks = truvari.chunker(self.matcher, ('base', base_i), ('comp', comp_i), views=True, contigs=contigs)
+        if self.shard_id is not None:
+            chunks = ((chunk, f"{self.shard_id}_{chunk_id}") for chunk, chunk_id in chunks)
+        chunks = truvari.prefetch(truvari.perf_iter("read", chunks), self.prefetch)
+        return region_tree, chunks
 
-        with open(os.path.join(self.outdir, 'candidate.refine.bed'), 'w') as fout:
-            fout.write("\n".join(self.refine_candidates))
+    def open_base(self, records=True):
+        """
+        Returns the base_vcf's :class:`pysam.VariantFile` or its :class:`truvari.PreparedBase`, which only
+        reads its records when `records`. The base_vcf can also be an already loaded PreparedBase.
+        Raises ValueError if the base was prepared with different parameters
+        """
+        if isinstance(self.base_vcf, truvari.PreparedBase):
+            ret = self.base_vcf
+        elif truvari.is_prepared(self.base_vcf):
+            ret = truvari.PreparedBase(self.base_vcf, records)
+        else:
+            return pysam.VariantFile(self.base_vcf)
+        mismatched = ret.mismatched(truvari.prepared_params(self.matcher.params, self.includebed,
+                                                            self.bench_overlaps))
+        if mismatched:
+            raise ValueError(f"Prepared base {self.base_vcf} was made with different {', '.join(mismatched)}")
+        return ret
+
+    def base_calls(self, base, region_tree, contigs=None):
+        """
+        Returns the base calls within the region_tree in the order of contigs (default the base's header).
+        Prepared bases are already filtered
+        """
+        if isinstance(base, truvari.PreparedBase):
+            return base if contigs is None else base.ordered(contigs)
+        return truvari.region_filter(base, region_tree, bench_overlaps=self.bench_overlaps, contigs=contigs)
 
-        output.close_outputs()
-        return output
+    def make_regions(self, base, comp=None):
+        """
+        Returns the includebed's region tree of the base and comp :class:`pysam.VariantFile` and the tree
+        extended for the comp calls. The bench's or a base's `region_tree` (e.g. a loaded
+        :class:`truvari.PreparedBase`) is reused
+        """
+        region_tree = self.region_tree if self.region_tree is not None else getattr(base, "region_tree", None)
+        if region_tree is None:
+            region_tree = truvari.build_region_tree(base, comp, self.includebed)
+            truvari.merge_region_tree_overlaps(region_tree)
+        regions_extended = (truvari.extend_region_tree(region_tree, self.extend)
+                            if self.extend else region_tree)
+        return region_tree, regions_extended
+
+    def write_result(self, output, result, region_tree):
+        """
+        Write a chunk's MatchResults to a :class:`BenchOutput`
+        """
+        check_tree = truvari.entry_overlaps_tree if self.bench_overlaps else truvari.entry_within_tree
+        with truvari.perf_stage("write"):
+            for match in result:
+                # setting non-matched comp variants (that are not fully contained in the original regions) to None
+                # These don't count as FP or TP and don't appear in the output vcf files
+                if (self.extend
+                    and (match.comp is not None)
+                    and not match.state
+                    and not check_tree(match.comp, region_tree)):
+                    match.comp = None
+                output.write_match(match)
+            output.flush()
+
+    def compare_chunks(self, chunks):
+        """
+        Given an iterable of chunks (from chunker with views), yield each chunk's comparison results in order.
+        When self.threads > 1, the chunks are compared by a pool of processes
+        """
+        if self.threads <= 1:
+            yield from map(self.compare_chunk, chunks)
+            return
+
+        pending = deque()
+        with multiprocessing.Pool(self.threads, initializer=_init_compare_worker,
+                                  initargs=(self.matcher.params, self.short_circuit, truvari.perf_active())) as pool:
+            for chunk_dict, chunk_id in chunks:
+                base_variants = chunk_dict["base"]
+                comp_variants = chunk_dict["comp"]
+                job = None
+                # Chunks without a pair to compare aren't worth sending to the pool
+                if base_variants and comp_variants:
+                    job = pool.apply_async(_compare_packed_chunk, (base_variants, comp_variants, chunk_id))
+                pending.append((base_variants, comp_variants, chunk_id, job))
+                if len(pending) >= self.inflight:
+                    yield self.collect_chunk(*pending.popleft())
+            while pending:
+                yield self.collect_chunk(*pending.popleft())
+
+    def collect_chunk(self, base_variants, comp_variants, chunk_id, job=None):
+        """
+        Finish a chunk sent to the pool by `compare_chunks` by placing its original
+        variants back into the results. Chunks without a job are compared here
+        """
+        with truvari.perf_chunk("compare", len(base_variants) + len(comp_variants)):
+            if job is None:
+                result = self.compare_calls(base_variants, comp_variants, chunk_id)
+            else:
+                result, cache_counts, perf = job.get()
+                if self.matcher.seqsim_cache is not None:
+                    self.matcher.seqsim_cache.add_counts(*cache_counts)
+                truvari.perf_merge(perf)
+                for match in result:
+                    if match.base is not None:
+                        match.base = base_variants[match.base]
+                    if match.comp is not None:
+                        match.comp = comp_variants[match.comp]
+        self.check_refine_candidate(result)
+        return result
 
     def compare_chunk(self, chunk):
         """
@@ -521,20 +602,30 @@ class Bench():
         """
         chunk_dict, chunk_id = chunk
         logging.debug("Comparing chunk %s", chunk_id)
-        result = self.compare_calls(
-            chunk_dict["base"], chunk_dict["comp"], chunk_id)
+        with truvari.perf_chunk("compare", len(chunk_dict["base"]) + len(chunk_dict["comp"])):
+            result = self.compare_calls(
+                chunk_dict["base"], chunk_dict["comp"], chunk_id)
         self.check_refine_candidate(result)
         return result
 
-    def compare_calls(self, base_variants, comp_variants, chunk_id=0):
+    def compare_calls(self, base_variants, comp_variants, chunk_id=0, call_ids=None):
         """
         Builds MatchResults, returns them as a numpy matrix if there's at least one base and one comp variant.
         Otherwise, returns a list of the variants placed in MatchResults
+
+        With short_circuit, chunks with more than `truvari.DENSE_CHUNK_SIZE` calls are compared by `compare_groups`.
+        call_ids are the (base, comp) ids of the calls used in MatchIds, which default to their position in the lists
         """
+        # Groups of a split chunk aren't split again
+        can_split = call_ids is None
+        if call_ids is None:
+            call_ids = (range(len(base_variants)), range(len(comp_variants)))
+        b_ids, c_ids = call_ids
+
         # All FPs
         if len(base_variants) == 0:
             fps = []
-            for cid, c in enumerate(comp_variants):
+            for cid, c in zip(c_ids, comp_variants):
                 ret = truvari.MatchResult()
                 ret.comp = c
                 ret.matid = ["", f"{chunk_id}.{cid}"]
@@ -545,7 +636,7 @@ class Bench():
         # All FNs
         if len(comp_variants) == 0:
             fns = []
-            for bid, b in enumerate(base_variants):
+            for bid, b in zip(b_ids, base_variants):
                 ret = truvari.MatchResult()
                 ret.base = b
                 ret.matid = [f"{chunk_id}.{bid}", ""]
@@ -553,47 +644,111 @@ class Bench():
                 fns.append(ret)
             return fns
 
-        # 5k variants takes too long
-        if self.short_circuit and (len(base_variants) + len(comp_variants)) > 5000:
-            pos = []
-            cnt = 0
-            chrom = None
-            for i in base_variants:
-                cnt += 1
-                pos.extend(truvari.entry_boundaries(i))
-                chrom = i.chrom
-            for i in comp_variants:
-                cnt += 1
-                pos.extend(truvari.entry_boundaries(i))
-                chrom = i.chrom
-            logging.warning("Skipping region %s:%d-%d with %d variants", chrom, min(*pos), max(*pos), cnt)
-            return []
+        # Dense chunks' matrices are too large. Only calls which could match need to be compared together, but FN/FP
+        # are then only annotated with their group's matches, so it's only done when short circuiting
+        if self.short_circuit and can_split and (len(base_variants) + len(comp_variants)) > truvari.DENSE_CHUNK_SIZE:
+            return self.compare_groups(base_variants, comp_variants, chunk_id)
 
         match_matrix = self.build_matrix(
-            base_variants, comp_variants, chunk_id)
+            base_variants, comp_variants, chunk_id, call_ids=call_ids)
         if isinstance(match_matrix, list):
             return match_matrix
-        return PICKERS[self.matcher.params.pick](match_matrix)
+        with truvari.perf_stage("pick"):
+            return truvari.PICKERS[self.matcher.params.pick](match_matrix)
 
-    def build_matrix(self, base_variants, comp_variants, chunk_id=0, skip_gt=False):
+    def compare_groups(self, base_variants, comp_variants, chunk_id=0):
+        """
+        Compare each group of calls from :meth:`truvari.candidate_components` separately.
+        Groups with more than `truvari.DENSE_CHUNK_SIZE` calls are compared with a `build_sparse_matrix`
         """
-        Builds MatchResults, returns them as a numpy matrix
+        groups = truvari.candidate_components(base_variants, comp_variants, self.matcher.params.refdist)
+        logging.debug("Split chunk %s of %d calls into %d groups", chunk_id,
+                      len(base_variants) + len(comp_variants), len(groups))
+        ret = []
+        for g_base, g_comp in groups:
+            g_base_variants = [base_variants[_] for _ in g_base]
+            g_comp_variants = [comp_variants[_] for _ in g_comp]
+            if g_base and g_comp and len(g_base) + len(g_comp) > truvari.DENSE_CHUNK_SIZE:
+                match_matrix = self.build_sparse_matrix(g_base_variants, g_comp_variants, chunk_id,
+                                                        call_ids=(g_base, g_comp))
+                with truvari.perf_stage("pick"):
+                    ret.extend(truvari.PICKERS[self.matcher.params.pick](match_matrix))
+            else:
+                ret.extend(self.compare_calls(g_base_variants, g_comp_variants, chunk_id, (g_base, g_comp)))
+        return ret
+
+    def build_matrix(self, base_variants, comp_variants, chunk_id=0, skip_gt=False, call_ids=None):
+        """
+        Builds a :class:`MatchMatrix` of every base/comp pair. call_ids are the (base, comp) ids of
+        the calls used in MatchIds, which default to their position in the lists
+
+        With short_circuit, every pair is first screened by :meth:`Matcher.screen_matrix` so that
+        only the pairs passing the type, refdist, pctsize, and pctovl checks are given to `build_match`.
+        MatchResults of the pairs failing the screen are only built if a picker uses them
         """
         if not base_variants or not comp_variants:
             raise RuntimeError(
                 "Expected at least one base and one comp variant")
-        match_matrix = []
-        for bid, b in enumerate(base_variants):
-            base_matches = []
-            for cid, c in enumerate(comp_variants):
-                mat = self.matcher.build_match(
-                    b, c, [f"{chunk_id}.{bid}", f"{chunk_id}.{cid}"],
-                    skip_gt, self.short_circuit)
-                logging.debug("Made mat -> %s", mat)
-                base_matches.append(mat)
-            match_matrix.append(base_matches)
-
-        return np.array(match_matrix)
+        b_ids, c_ids = call_ids if call_ids is not None else (range(len(base_variants)), range(len(comp_variants)))
+        if not self.short_circuit:
+            match_matrix = truvari.MatchMatrix(len(base_variants), len(comp_variants))
+            for bid, b in enumerate(base_variants):
+                for cid, c in enumerate(comp_variants):
+                    matid = [f"{chunk_id}.{b_ids[bid]}", f"{chunk_id}.{c_ids[cid]}"]
+                    mat = self.matcher.build_match(b, c, matid, skip_gt, self.short_circuit)
+                    logging.debug("Made mat -> %s", mat)
+                    match_matrix.add(bid, cid, mat)
+            return match_matrix
+
+        screen = self.matcher.screen_matrix(base_variants, comp_variants)
+        passed = screen.failed == truvari.SCREEN_PASS
+        logging.debug("Screen passed %d of %d pairs", passed.sum(), passed.size)
+
+        def build_screened(bid, cid):
+            return self.matcher.screened_match(screen, bid, cid,
+                                               [f"{chunk_id}.{b_ids[bid]}", f"{chunk_id}.{c_ids[cid]}"],
+                                               skip_gt)
+
+        match_matrix = truvari.MatchMatrix(len(base_variants), len(comp_variants), build_screened)
+        if not skip_gt:
+            # Pairs failing on pctovl still have their genotypes compared
+            match_matrix.set_gt_counts(screen.failed == truvari.SCREEN_OVL,
+                                       [truvari.gt_count(_, self.matcher.params.bSample) for _ in base_variants],
+                                       [truvari.gt_count(_, self.matcher.params.cSample) for _ in comp_variants])
+
+        for bid, cid in zip(*np.nonzero(passed)):
+            bid, cid = int(bid), int(cid)
+            mat = build_screened(bid, cid)
+            logging.debug("Made mat -> %s", mat)
+            match_matrix.add(bid, cid, mat)
+        return match_matrix
+
+    def build_sparse_matrix(self, base_variants, comp_variants, chunk_id=0, skip_gt=False, call_ids=None):
+        """
+        Builds a :class:`SparseMatchMatrix` of only the base/comp pairs within refdist of each other
+        (see :meth:`truvari.candidate_pairs`). Calls without a pair are reported alone by the pickers.
+        call_ids are the (base, comp) ids of the calls used in MatchIds, which default to their position in the lists
+        """
+        b_ids, c_ids = call_ids if call_ids is not None else (range(len(base_variants)), range(len(comp_variants)))
+
+        def build_lone(bid, cid):
+            ret = truvari.MatchResult()
+            if bid is not None:
+                ret.base = base_variants[bid]
+                ret.matid = [f"{chunk_id}.{b_ids[bid]}", ""]
+            else:
+                ret.comp = comp_variants[cid]
+                ret.matid = ["", f"{chunk_id}.{c_ids[cid]}"]
+            return ret
+
+        match_matrix = truvari.SparseMatchMatrix(len(base_variants), len(comp_variants), build_lone)
+        pairs = truvari.candidate_pairs(base_variants, comp_variants, self.matcher.params.refdist)
+        logging.debug("Sparse matrix of %d pairs for %d calls", len(pairs), len(base_variants) + len(comp_variants))
+        for bid, cid in pairs:
+            matid = [f"{chunk_id}.{b_ids[bid]}", f"{chunk_id}.{c_ids[cid]}"]
+            match_matrix.add(bid, cid, self.matcher.build_match(base_variants[bid], comp_variants[cid],
+                                                                matid, skip_gt, self.short_circuit))
+        return match_matrix
 
     def check_refine_candidate(self, result):
         """
@@ -616,137 +771,85 @@ class Bench():
             self.refine_candidates.append(f"{chrom}\t{start}\t{max(*pos) + buf}")
 
 
-#################
-# Match Pickers #
-#################
-def pick_multi_matches(match_matrix):
-    """
-    Given a numpy array of MatchResults
-    Pick each base/comp call's best match
-    """
-    ret = []
-    for b_max in match_matrix.max(axis=1):
-        b_max = copy.copy(b_max)
-        b_max.comp = None
-        ret.append(b_max)
-
-    for c_max in match_matrix.max(axis=0):
-        c_max = copy.copy(c_max)
-        c_max.base = None
-        ret.append(c_max)
-    return ret
-
-
-def pick_ac_matches(match_matrix):
-    """
-    Given a numpy array of MatchResults
-    Find upto allele count mumber of matches
-    """
-    ret = []
-    base_cnt, comp_cnt = match_matrix.shape
-    match_matrix = np.ravel(match_matrix)
-    match_matrix.sort()
-    used_comp = Counter()
-    used_base = Counter()
-    for match in match_matrix[::-1]:
-        # No more matches to find
-        if base_cnt == 0 and comp_cnt == 0:
-            break
-        b_key = str(match.base)
-        c_key = str(match.comp)
-        # This is a trick
-        base_is_used = used_base[b_key] >= match.base_gt_count
-        comp_is_used = used_comp[c_key] >= match.comp_gt_count
-        # Only write the comp (FP)
-        if base_cnt == 0 and not comp_is_used:
-            to_process = copy.copy(match)
-            to_process.base = None
-            to_process.multi = to_process.state
-            to_process.state = False
-            comp_cnt -= 1
-            if used_comp[c_key] == 0:  # Only write as F if it hasn't been a T
-                ret.append(to_process)
-            used_comp[c_key] = 9
-        # Only write the base (FN)
-        elif comp_cnt == 0 and not base_is_used:
-            to_process = copy.copy(match)
-            to_process.comp = None
-            to_process.multi = to_process.state
-            to_process.state = False
-            base_cnt -= 1
-            if used_base[b_key] == 0:  # Only write as F if it hasn't been a T
-                ret.append(to_process)
-            used_base[b_key] = 9
-        # Write both (any state)
-        elif not base_is_used and not comp_is_used:
-            to_process = copy.copy(match)
-            # Don't write twice
-            if used_base[b_key] != 0:
-                to_process.base = None
-            if used_comp[c_key] != 0:
-                to_process.comp = None
-
-            used_base[b_key] += match.comp_gt_count
-            used_comp[c_key] += match.base_gt_count
-            # All used up
-            if used_base[b_key] >= match.base_gt_count:
-                base_cnt -= 1
-            if used_comp[c_key] >= match.comp_gt_count:
-                comp_cnt -= 1
-
-            # Safety edge case check
-            if to_process.base is not None or to_process.comp is not None:
-                ret.append(to_process)
-    return ret
-
-
-def pick_single_matches(match_matrix):
-    """
-    Given a numpy array of MatchResults, find the single best match for calls
-    Once all best pairs yielded, the unpaired calls are set to FP/FN and yielded
-    """
-    hit_order = np.array(np.unravel_index(np.argsort(
-        match_matrix, axis=None), match_matrix.shape)).T
-    top_hit_idx = len(hit_order) - 1
-
-    mask = np.ones(match_matrix.shape, dtype='bool')  # True = can use
-    ret = []
-
-    used_pairs = []
-    while top_hit_idx >= 0 and mask.any():
-        idx = tuple(hit_order[top_hit_idx])
-        if mask[idx]:
-            mask[idx[0], :] = False
-            mask[:, idx[1]] = False
-            used_pairs.append(idx)
-            ret.append(match_matrix[idx])
-        top_hit_idx -= 1
-
-    used_base, used_comp = zip(*used_pairs) if used_pairs else ([], [])
-    # FNs
-    for base_col in set(range(match_matrix.shape[0])) - set(used_base):
-        comp_col = match_matrix[base_col].argmax()
-        to_process = copy.copy(match_matrix[base_col, comp_col])
-        to_process.comp = None  # The comp will be written elsewhere
-        to_process.multi = to_process.state
-        to_process.state = False
-        ret.append(to_process)
-
-    # FPs
-    for comp_col in set(range(match_matrix.shape[1])) - set(used_comp):
-        base_col = match_matrix[:, comp_col].argmax()
-        to_process = copy.copy(match_matrix[base_col, comp_col])
-        to_process.base = None  # The base will be written elsewhere
-        to_process.multi = to_process.state
-        to_process.state = False
-        ret.append(to_process)
-    return ret
-
-
-PICKERS = {"single": pick_single_matches,
-           "ac": pick_ac_matches,
-           "multi": pick_multi_matches
-           }
+####################
+# Parallel Helpers #
+####################
+_WORKER_BENCH = None
+
+
+def _init_compare_worker(params, short_circuit, perf):
+    """
+    Pool initializer. Every worker process holds its own Bench and, when perf, its own :class:`truvari.PerfStats`
+    """
+    global _WORKER_BENCH  # pylint: disable=global-statement
+    truvari.perf_worker(perf)
+    matcher = truvari.Matcher()
+    matcher.params = params
+    matcher.seqsim_cache = truvari.SeqSimCache.from_params(params)
+    _WORKER_BENCH = Bench(matcher, short_circuit=short_circuit)
+
+
+def _compare_packed_chunk(base_variants, comp_variants, chunk_id):
+    """
+    Compare a chunk of :class:`truvari.VariantView` inside a worker. The returned MatchResults hold the index of
+    their base/comp inside the chunk instead of the call. Also returns the worker's seqsim cache hits/misses and
+    stage timings
+    """
+    result = _WORKER_BENCH.compare_calls(base_variants, comp_variants, chunk_id)
+    base_idx = {id(call): idx for idx, call in enumerate(base_variants)}
+    comp_idx = {id(call): idx for idx, call in enumerate(comp_variants)}
+    for match in result:
+        if match.base is not None:
+            match.base = base_idx[id(match.base)]
+        if match.comp is not None:
+            match.comp = comp_idx[id(match.comp)]
+    cache = _WORKER_BENCH.matcher.seqsim_cache
+    if cache is None:
+        return result, (0, 0), truvari.perf_pop()
+    # Workers are never closed, so their results are written to the on-disk store as each chunk finishes
+    cache.flush()
+    return result, cache.pop_counts(), truvari.perf_pop()
+
+
+def make_bench(args, base=None):
+    """
+    Build the :class:`Bench` of checked command line parameters. The base (e.g. a loaded
+    :class:`truvari.PreparedBase`) is benched instead of args.base when provided
+    """
+    return Bench(matcher=truvari.Matcher(args),
+                 base_vcf=base if base is not None else args.base,
+                 comp_vcf=args.comp[0] if len(args.comp) == 1 else None,
+                 outdir=args.output,
+                 includebed=args.includebed,
+                 bench_overlaps=args.bench_overlaps,
+                 extend=args.extend,
+                 debug=args.debug,
+                 short_circuit=args.short,
+                 threads=args.threads,
+                 prefetch=args.prefetch,
+                 inflight=args.inflight)
+
+
+def run_bench(m_bench, args):
+    """
+    Run the bench, --sweep, --sample-map, multiple --comp, --shards, or --shard bench of command line parameters.
+    Returns the :class:`truvari.BenchOutput` of every summary made
+    """
+    if args.sweep:
+        return [output for _, output in truvari.BenchSweep(m_bench, truvari.parse_sweep(args.sweep)).run()]
+    if args.sample_map:
+        return [output for _, output in
+                truvari.CohortBench(m_bench, truvari.read_sample_map(args.sample_map)).run(
+                    write_vcfs=not args.summary_only)]
+    if len(args.comp) > 1:
+        return [output for _, output in
+                truvari.MultiCompBench(m_bench, args.comp).run(write_vcfs=not args.summary_only)]
+    if args.shards > 1:
+        return [truvari.ShardedBench(m_bench, args.shards).run(write_vcfs=not args.summary_only)]
+    if args.shard:
+        return [truvari.ShardedBench(m_bench, args.shard[1]).run_shard(args.shard[0],
+                                                                       write_vcfs=not args.summary_only)]
+    return [m_bench.run(write_vcfs=not args.summary_only)]
 
 
 def bench_main(cmdargs):
@@ -759,19 +862,19 @@ def bench_main(cmdargs):
         sys.stderr.write("Couldn't run Truvari. Please fix parameters\n")
         sys.exit(100)
 
-    matcher = truvari.Matcher(args)
-
-    m_bench = Bench(matcher=matcher,
-                    base_vcf=args.base,
-                    comp_vcf=args.comp,
-                    outdir=args.output,
-                    includebed=args.includebed,
-                    bench_overlaps=args.bench_overlaps,
-                    extend=args.extend,
-                    debug=args.debug,
-                    do_logging=True,
-                    short_circuit=args.short)
-    output = m_bench.run()
-
-    logging.info("Stats: %s", json.dumps(output.stats_box, indent=4))
+    if args.prepare_base:
+        truvari.setup_logging(args.debug, show_version=True)
+        m_bench = Bench(matcher=truvari.Matcher(args), base_vcf=args.base, includebed=args.includebed,
+                        bench_overlaps=args.bench_overlaps)
+        truvari.prepare_base(m_bench, args.prepare_base)
+        logging.info("Finished prepare base")
+        return
+
+    m_bench = make_bench(args)
+    m_bench.do_logging = True
+    profile = os.path.join(args.output, "profile.pstats") if args.profile else None
+    with truvari.perf_run(os.path.join(args.output, "perf.json"), profile):
+        outputs = run_bench(m_bench, args)
+    if not args.sweep and not args.sample_map and len(args.comp) == 1:
+        logging.info("Stats: %s", json.dumps(outputs[0].stats_box, indent=4))
     logging.info("Finished bench")
@@ -0,0 +1,284 @@
+"""
+Output files and stats of truvari bench
+"""
+import os
+import json
+import logging
+import multiprocessing.pool
+from collections import defaultdict, OrderedDict, Counter
+
+import pysam
+
+import truvari
+
+
+###############
+# VCF editing #
+###############
+def edit_header(my_vcf):
+    """
+    Add INFO for new fields to vcf
+    """
+    header = my_vcf.header.copy()
+    header.add_line(('##INFO=<ID=TruScore,Number=1,Type=Integer,'
+                     'Description="Truvari score for similarity of match">'))
+    header.add_line(('##INFO=<ID=PctSeqSimilarity,Number=1,Type=Float,'
+                     'Description="Pct sequence similarity between this variant and its closest match">'))
+    header.add_line(('##INFO=<ID=PctSizeSimilarity,Number=1,Type=Float,'
+                     'Description="Pct size similarity between this variant and its closest match">'))
+    header.add_line(('##INFO=<ID=PctRecOverlap,Number=1,Type=Float,'
+                     'Description="Percent reciprocal overlap percent of the two calls\' coordinates">'))
+    header.add_line(('##INFO=<ID=StartDistance,Number=1,Type=Integer,'
+                     'Description="Distance of the base call\'s end from comparison call\'s start">'))
+    header.add_line(('##INFO=<ID=EndDistance,Number=1,Type=Integer,'
+                     'Description="Distance of the base call\'s end from comparison call\'s end">'))
+    header.add_line(('##INFO=<ID=SizeDiff,Number=1,Type=Float,'
+                     'Description="Difference in size of base and comp calls">'))
+    header.add_line(('##INFO=<ID=GTMatch,Number=1,Type=Integer,'
+                     'Description="Base/Comparison genotypes AC difference">'))
+    header.add_line(('##INFO=<ID=MatchId,Number=.,Type=String,'
+                     'Description="Tuple of base and comparison call ids which were matched">'))
+    header.add_line(('##INFO=<ID=Multi,Number=0,Type=Flag,'
+                     'Description="Call is false due to non-multimatching">'))
+    return header
+
+
+def annotate_entry(entry, match, header):
+    """
+    Make a new entry with all the information
+    """
+    entry.translate(header)
+    entry.info["PctSeqSimilarity"] = round(
+        match.seqsim, 4) if match.seqsim is not None else None
+    entry.info["PctSizeSimilarity"] = round(
+        match.sizesim, 4) if match.sizesim is not None else None
+    entry.info["PctRecOverlap"] = round(
+        match.ovlpct, 4) if match.ovlpct is not None else None
+    entry.info["SizeDiff"] = match.sizediff
+    entry.info["StartDistance"] = match.st_dist
+    entry.info["EndDistance"] = match.ed_dist
+    entry.info["GTMatch"] = match.gt_match
+    entry.info["TruScore"] = int(match.score) if match.score else None
+    entry.info["MatchId"] = match.matid
+    entry.info["Multi"] = match.multi
+
+
+class StatsBox(OrderedDict):
+    """
+    Make a blank stats box for counting TP/FP/FN and calculating performance
+    """
+
+    def __init__(self):
+        super().__init__()
+        self["TP-base"] = 0
+        self["TP-comp"] = 0
+        self["FP"] = 0
+        self["FN"] = 0
+        self["precision"] = 0
+        self["recall"] = 0
+        self["f1"] = 0
+        self["base cnt"] = 0
+        self["comp cnt"] = 0
+        self["TP-comp_TP-gt"] = 0
+        self["TP-comp_FP-gt"] = 0
+        self["TP-base_TP-gt"] = 0
+        self["TP-base_FP-gt"] = 0
+        self["gt_concordance"] = 0
+        self["gt_matrix"] = defaultdict(Counter)
+
+    def calc_performance(self):
+        """
+        Calculate the precision/recall
+        """
+        if self["TP-base"] == 0 and self["FN"] == 0:
+            logging.warning("No TP or FN calls in --base VCF!")
+        elif self["TP-comp"] == 0 and self["FP"] == 0:
+            logging.warning("No TP or FP calls in --comp VCF!")
+
+        precision, recall, f1 = truvari.performance_metrics(
+            self["TP-base"], self["TP-comp"], self["FN"], self["FP"])
+
+        self["precision"] = precision
+        self["recall"] = recall
+        self["f1"] = f1
+        if self["TP-comp_TP-gt"] + self["TP-comp_FP-gt"] != 0:
+            self["gt_concordance"] = float(self["TP-comp_TP-gt"]) / (self["TP-comp_TP-gt"] +
+                                                                     self["TP-comp_FP-gt"])
+
+    def clean_out(self):
+        """
+        When reusing a StatsBox (typically inside refine), gt numbers
+        are typically invalidated. This removes those numbers from self to make
+        a cleaner report
+        """
+        del self["TP-comp_TP-gt"]
+        del self["TP-comp_FP-gt"]
+        del self["TP-base_TP-gt"]
+        del self["TP-base_FP-gt"]
+        del self["gt_concordance"]
+        del self["gt_matrix"]
+
+    def write_json(self, out_name):
+        """
+        Write stats as json to file
+        """
+        with open(out_name, 'w') as fout:
+            fout.write(json.dumps(self, indent=4))
+
+
+class BenchOutput():
+    """
+    Makes all of the output files for a Bench.run
+
+    The variable `BenchOutput.vcf_filenames` holds a dictonary. The keys are tpb, tpc
+    for true positive base/comp vcf filename and fn, fp. The variable `stats_box` holds
+    a :class:`StatsBox`.
+
+    Entries are buffered until :meth:`flush` writes them sorted to bgzipped vcfs. Chunks arrive in order, so the
+    outputs only need a tabix index on close. Outputs with entries still written out of order are sorted on close.
+
+    When `write_vcfs` is False, only the `stats_box` is filled. Entries aren't annotated and no vcfs are made.
+    """
+
+    def __init__(self, bench, matcher, write_vcfs=True):
+        """
+        initialize
+        """
+        self.m_bench = bench
+        self.m_matcher = matcher
+        self.write_vcfs = write_vcfs
+
+        os.mkdir(self.m_bench.outdir)
+        param_dict = self.m_bench.param_dict()
+        param_dict.update(vars(self.m_matcher.params))
+
+        if self.m_bench.do_logging:
+            truvari.setup_logging(self.m_bench.debug, truvari.LogFileStderr(
+                os.path.join(self.m_bench.outdir, "log.txt")), show_version=True)
+            logging.info("Params:\n%s", json.dumps(param_dict, indent=4))
+
+        with open(os.path.join(self.m_bench.outdir, 'params.json'), 'w') as fout:
+            json.dump(param_dict, fout)
+
+        self.n_headers = {}
+        self.vcf_filenames = {}
+        self.out_vcfs = {}
+        self.pending = {}
+        self.last_written, self.unsorted = {}, set()
+        self.stats_box = StatsBox()
+        if not self.write_vcfs:
+            return
+
+        b_vcf = self.m_bench.open_base(records=False)
+        c_vcf = pysam.VariantFile(self.m_bench.comp_vcf)
+        self.n_headers = {'b': edit_header(b_vcf),
+                          'c': edit_header(c_vcf)}
+
+        self.vcf_filenames = {'tpb': os.path.join(self.m_bench.outdir, "tp-base.vcf.gz"),
+                              'tpc': os.path.join(self.m_bench.outdir, "tp-comp.vcf.gz"),
+                              'fn': os.path.join(self.m_bench.outdir, "fn.vcf.gz"),
+                              'fp': os.path.join(self.m_bench.outdir, "fp.vcf.gz")}
+        for key in ['tpb', 'fn']:
+            self.out_vcfs[key] = pysam.VariantFile(
+                self.vcf_filenames[key], mode='wz', header=self.n_headers['b'])
+        for key in ['tpc', 'fp']:
+            self.out_vcfs[key] = pysam.VariantFile(
+                self.vcf_filenames[key], mode='wz', header=self.n_headers['c'])
+        self.pending = {key: [] for key in self.out_vcfs}
+
+    def write_match(self, match):
+        """
+        Annotate a MatchResults' entries then write to the apppropriate file
+        and do the stats counting.
+        Writer is responsible for handling FPs between sizefilt-sizemin
+        """
+        box = self.stats_box
+        # Views from the chunker are written as their original entries
+        # Views without one (e.g. from a PreparedBase when not writing vcfs) are only counted
+        if isinstance(match.base, truvari.VariantView) and match.base.record is not None:
+            match.base = match.base.record
+        if isinstance(match.comp, truvari.VariantView):
+            match.comp = match.comp.record
+        if match.base:
+            box["base cnt"] += 1
+            if self.write_vcfs:
+                annotate_entry(match.base, match, self.n_headers['b'])
+            if match.state:
+                gtBase = str(match.base_gt)
+                gtComp = str(match.comp_gt)
+                box["gt_matrix"][gtBase][gtComp] += 1
+
+                box["TP-base"] += 1
+                self.buffer_entry("tpb", match.base)
+                if match.gt_match == 0:
+                    box["TP-base_TP-gt"] += 1
+                else:
+                    box["TP-base_FP-gt"] += 1
+            else:
+                box["FN"] += 1
+                self.buffer_entry("fn", match.base)
+
+        if match.comp:
+            if self.write_vcfs:
+                annotate_entry(match.comp, match, self.n_headers['c'])
+            if match.state:
+                box["comp cnt"] += 1
+                box["TP-comp"] += 1
+                self.buffer_entry("tpc", match.comp)
+                if match.gt_match == 0:
+                    box["TP-comp_TP-gt"] += 1
+                else:
+                    box["TP-comp_FP-gt"] += 1
+            elif truvari.entry_size(match.comp) >= self.m_matcher.params.sizemin:
+                # The if is because we don't count FPs between sizefilt-sizemin
+                box["comp cnt"] += 1
+                box["FP"] += 1
+                self.buffer_entry("fp", match.comp)
+
+    def buffer_entry(self, key, entry):
+        """
+        Hold an entry for the `key` output until the next :meth:`flush`. Does nothing when not writing vcfs
+        """
+        if self.write_vcfs:
+            self.pending[key].append(entry)
+
+    def flush(self):
+        """
+        Write the buffered entries of each output in sorted order
+        """
+        for key, entries in self.pending.items():
+            if not entries:
+                continue
+            entries.sort(key=truvari.vcf_sort_key)
+            if key in self.last_written and truvari.vcf_sort_key(entries[0]) < self.last_written[key]:
+                self.unsorted.add(key)
+            self.last_written[key] = truvari.vcf_sort_key(entries[-1])
+            for entry in entries:
+                self.out_vcfs[key].write(entry)
+            entries.clear()
+
+    def finish_vcf(self, key):
+        """
+        Index a closed output. Outputs which were written out of order are sorted first
+        """
+        fn = self.vcf_filenames[key]
+        if key in self.unsorted:
+            os.rename(fn, fn + ".unsorted")
+            truvari.compress_index_vcf(fn + ".unsorted", fn)
+        else:
+            pysam.tabix_index(fn, force=True, preset="vcf")
+
+    def close_outputs(self):
+        """
+        Close all the files
+        """
+        if self.write_vcfs:
+            self.flush()
+            for i in self.out_vcfs.values():
+                i.close()
+            with truvari.perf_stage("index"), multiprocessing.pool.ThreadPool(len(self.vcf_filenames)) as pool:
+                pool.map(self.finish_vcf, self.vcf_filenames)
+
+        self.stats_box.calc_performance()
+        self.stats_box.write_json(os.path.join(
+            self.m_bench.outdir, "summary.json"))
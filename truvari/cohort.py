@@ -0,0 +1,225 @@
+"""
+Bench each sample of a cohort VCF against its own base VCF
+"""
+import os
+import copy
+import logging
+from collections import Counter
+
+import pysam
+import numpy as np
+
+import truvari
+from truvari.matching import needs_resolve, resolve_sv
+from truvari.multicomp import MultiCompBench, route_chunks
+
+
+def read_sample_map(fn):
+    """
+    Parse a sample map of tab-delimited lines holding a cohort VCF's sample, its base VCF, and optionally
+    the base VCF's sample (default first). Empty lines and lines starting with '#' are skipped
+
+    :param `fn`: sample map filename
+    :type `fn`: string
+
+    :return: tuples of the cohort sample, base VCF path, and base sample (None for the first)
+    :rtype: list
+
+    :raises ValueError: on lines without 2 or 3 columns
+    """
+    ret = []
+    with open(fn, 'r') as fh:
+        for line in fh:
+            line = line.rstrip('\n')
+            if not line.strip() or line.startswith('#'):
+                continue
+            data = line.split('\t')
+            if len(data) not in (2, 3):
+                raise ValueError(f"Sample map lines need 2 or 3 tab-delimited columns: {line}")
+            ret.append((data[0], os.path.abspath(data[1]), data[2] if len(data) == 3 else None))
+    return ret
+
+
+def present_samples(gts):
+    """
+    Indexes of the samples whose genotype holds an alternate allele, the same as
+    :meth:`truvari.entry_is_present` of each sample
+
+    :param `gts`: genotypes packed by :meth:`truvari.pack_gts`
+    :type `gts`: :class:`numpy.ndarray`
+
+    :return: indexes of the present samples
+    :rtype: :class:`numpy.ndarray`
+
+    Example
+        >>> import truvari
+        >>> truvari.present_samples(truvari.pack_gts([(0, 1), (None, None), (0, 0), None, (1,)])).tolist()
+        [0, 4]
+    """
+    return np.flatnonzero((gts == 1).any(axis=1))
+
+
+def sample_view(view, sample, fmt):
+    """
+    Copy of a :class:`truvari.VariantView` sharing its features which only holds fmt as the sample
+    """
+    ret = truvari.VariantView.__new__(truvari.VariantView)
+    for key in truvari.VariantView.__slots__:
+        setattr(ret, key, getattr(view, key))
+    ret.samples = {sample: fmt}
+    return ret
+
+
+def cohort_chunker(matcher, bases, cohort, samples, contigs=None):
+    """
+    Given a Matcher, base calls, and a cohort file, zip them and create every cohort sample's chunks.
+    Each cohort call is parsed, filtered, and resolved once and only given to the samples it's present in.
+
+    bases are tuples of the indexes of the samples benched against the base, the base's sample, and its
+    (key, call) iterable made by :meth:`truvari.prepare_calls` with views. samples are the cohort's samples.
+    Every file must be in the order of contigs (see :meth:`truvari.file_zipper`).
+    The chunks' calls hold the GT of their sample as the matcher's bSample/cSample
+
+    Yields tuples of the sample's index and its next (chunk, identifier) tuple as made by
+    :meth:`truvari.chunker` of the sample's base and the cohort with `cSample` and `no_ref` 'c'.
+    """
+    call_counts = Counter()
+    b_key, c_key = matcher.params.bSample, matcher.params.cSample
+    # The cohort's sample independent filters
+    filterer = copy.copy(matcher)
+    filterer.params = copy.copy(matcher.params)
+    filterer.params.no_ref = False
+    filterer.params.pick = 'single'
+
+    def base_calls(sample, calls):
+        for key, entry in calls:
+            call_counts[key] += 1
+            if key != '__filtered':
+                yield sample_view(entry, b_key, entry.samples[sample])
+
+    def routed():
+        unresolved_warned = False
+        files = [('cohort', cohort)] + [(f"base{idx}", base_calls(sample, calls))
+                                        for idx, (_, sample, calls) in enumerate(bases)]
+        for key, record in truvari.file_zipper(*files, contigs=contigs):
+            if key != 'cohort':
+                yield bases[int(key[len("base"):])][0], 'base', record
+                continue
+            view = truvari.VariantView(record, samples[0])
+            gts, present = [], []
+            if not filterer.filter_call(view):
+                fmts = [record.samples[_] for _ in samples]
+                gts = [fmt["GT"] if "GT" in fmt else None for fmt in fmts]
+                present = present_samples(truvari.pack_gts(gts)).tolist()
+            if present and needs_resolve(matcher, record):
+                with truvari.perf_stage("resolve_sv"):
+                    resolved = resolve_sv(record, matcher.reference, matcher.params.dup_to_ins)
+                if resolved:
+                    view = truvari.VariantView(record, samples[0])
+                else:
+                    if not unresolved_warned:
+                        logging.warning("Some symbolic SVs couldn't be resolved")
+                        unresolved_warned = True
+                    present = []
+            if not present:
+                call_counts['__filtered'] += 1
+                continue
+            call_counts['comp'] += len(present)
+            for idx in present:
+                yield [idx], 'comp', sample_view(view, c_key, {"GT": gts[idx]} if gts[idx] is not None else {})
+
+    yield from route_chunks(matcher, routed(), len(samples), call_counts)
+
+
+class CohortBench(MultiCompBench):
+    """
+    Runs a :class:`truvari.Bench` of each sample of a cohort VCF against its own base VCF in a single pass.
+
+    The cohort VCF is read, filtered, and has its symbolic SVs resolved once. Each of its calls is only compared
+    to the samples whose GT holds the alternate allele, so each sample's results are identical to a separate bench
+    of the cohort with its `--cSample` and `--no-ref c`. Samples sharing alleles reuse their sequence similarities
+    through the Matcher's :class:`truvari.SeqSimCache`, which is made when the Matcher doesn't have one.
+
+    .. code-block:: python
+
+        m_bench = truvari.Bench(matcher, comp_vcf="cohort.vcf.gz", outdir=outdir)
+        cohort = truvari.CohortBench(m_bench, truvari.read_sample_map("samples.txt"))
+        for sample, output in cohort.run():
+            print(sample, output.stats_box["f1"])
+
+    Each sample's outputs are written in a subdirectory of the bench's outdir named by the sample and
+    `cohort.txt` holds a table of every sample's stats. Without an includebed, the base VCFs must have the
+    same contigs.
+    """
+    TABLE = ("cohort.txt", "sample")
+
+    def __init__(self, bench, sample_map):
+        """
+        The bench holds the cohort VCF as its comp_vcf, the outdir, and Matcher. Its base_vcf is ignored.
+        The sample_map is a list of each cohort sample, its base VCF, and the base VCF's sample
+        (None for the first) e.g. from :meth:`read_sample_map`
+        """
+        super().__init__(bench, [bench.comp_vcf])
+        self.names = [_[0] for _ in sample_map]
+        self.keys = self.names
+        if len(set(self.names)) != len(self.names):
+            raise ValueError("Cohort samples can only be in the sample map once")
+        self.base_vcfs = [_[1] for _ in sample_map]
+        headers = [pysam.VariantFile(os.path.join(_, "calls.vcf.gz") if truvari.is_prepared(_) else _).header
+                   for _ in self.base_vcfs]
+        self.base_samples = [sample if sample is not None else header.samples[0]
+                             for (_, _, sample), header in zip(sample_map, headers)]
+        contigs = [{ctg: header.contigs[ctg].length for ctg in header.contigs} for header in headers]
+        if self.bench.includebed is None and any(_ != contigs[0] for _ in contigs[1:]):
+            raise ValueError("Base VCFs need the same contigs when not using an includebed")
+        if self.bench.matcher.seqsim_cache is None:
+            self.bench.matcher.seqsim_cache = truvari.SeqSimCache()
+
+    def comp_bench(self, idx):
+        """
+        Make the Bench of a sample
+        """
+        ret = copy.copy(self.bench)
+        ret.matcher = copy.copy(self.bench.matcher)
+        ret.matcher.params = copy.copy(self.bench.matcher.params)
+        ret.matcher.params.bSample = self.base_samples[idx]
+        ret.matcher.params.cSample = self.names[idx]
+        ret.base_vcf = self.base_vcfs[idx]
+        ret.outdir = os.path.join(self.bench.outdir, self.names[idx])
+        ret.do_logging = False
+        ret.refine_candidates = []
+        return ret
+
+    def describe(self, param_dict):
+        """
+        Add the samples to the run's param_dict and return its description
+        """
+        param_dict["comp"] = self.bench.comp_vcf
+        param_dict["samples"] = [list(_) for _ in zip(self.names, self.base_vcfs, self.base_samples)]
+        return f"Benching {len(self.names)} samples of {self.bench.comp_vcf}"
+
+    def make_chunks(self, records=True):
+        """
+        Returns the includebed's region tree and the chunks of every sample. Samples with the same base VCF and
+        sample share its calls. Prepared bases only read their records when `records`
+        """
+        targets = {}
+        for idx, key in enumerate(zip(self.base_vcfs, self.base_samples)):
+            targets.setdefault(key, []).append(idx)
+        benches = [self.comp_bench(idxs[0]) for idxs in targets.values()]
+        bases = [_.open_base(records) for _ in benches]
+        cohort = pysam.VariantFile(self.bench.comp_vcf)
+        region_tree, regions_extended = self.bench.make_regions(bases[0], cohort)
+        # Every file is read in the first base's contig order so the zipper keeps their calls together
+        contigs = truvari.header_sorted_contigs(bases[0], regions_extended.keys())
+
+        bases_i = [(idxs, m_bench.matcher.params.bSample,
+                    truvari.prepare_calls(m_bench.matcher, ('base', m_bench.base_calls(base, region_tree, contigs)),
+                                          views=True))
+                   for idxs, m_bench, base in zip(targets.values(), benches, bases)]
+        cohort_i = truvari.region_filter(cohort, regions_extended, bench_overlaps=self.bench.bench_overlaps,
+                                         contigs=contigs)
+        chunks = truvari.prefetch(truvari.perf_iter("read", cohort_chunker(self.bench.matcher, bases_i, cohort_i,
+                                                                           self.names, contigs)),
+                                  self.bench.prefetch)
+        return region_tree, chunks
@@ -9,7 +9,6 @@ import gzip
 import json
 import logging
 import argparse
-import itertools
 import statistics
 from dataclasses import dataclass, field
 from functools import cmp_to_key, partial
@@ -18,7 +17,8 @@ import pysam
 import numpy as np
 
 import truvari
-import truvari.bench as trubench
+import truvari.bench_output as trubench
+import truvari.collapse_pool as trupool
 
 
 @dataclass
@@ -67,6 +67,9 @@ class CollapsedCalls():
         """
         if gtmode == 'off':
             return None
+        if isinstance(entry, trupool.CollapseView):
+            has_alt = entry.gts == 1
+            return has_alt.any(axis=1) if gtmode == 'all' else has_alt.sum(axis=1) == 1
         to_mask = (lambda x: 1 in x) if gtmode == 'all' else (
             lambda x: x.count(1) == 1)
         return np.array([to_mask(_.allele_indices) for _ in entry.samples.values()], dtype=bool)
@@ -123,7 +126,16 @@ def collapse_chunk(chunk, matcher):
     Returns a list of lists with [keep entry, collap matches, match_id, gt_consolidate_count]
     """
     chunk_dict, chunk_id = chunk
-    remaining_calls = sorted(chunk_dict['base'], key=matcher.sorter)
+    ret = collapse_calls(chunk_dict['base'], chunk_id, matcher)
+    return consolidate_chunk(ret, chunk_dict['__filtered'], matcher)
+
+
+def collapse_calls(calls, chunk_id, matcher):
+    """
+    Find the calls of a chunk that collapse into one another. Returns the CollapsedCalls before consolidation.
+    Calls can be records or :class:`truvari.collapse_pool.CollapseView`
+    """
+    remaining_calls = sorted(calls, key=matcher.sorter)
 
     remaining_calls.sort(key=matcher.sorter)
     call_id = -1
@@ -166,7 +178,14 @@ def collapse_chunk(chunk, matcher):
         # Remove everything that was used
         to_rm = [_.comp for _ in m_collap.matches]
         remaining_calls = [_ for _ in remaining_calls if _ not in to_rm]
+    return ret
 
+
+def consolidate_chunk(ret, filtered, matcher):
+    """
+    Consolidate the records of a chunk's CollapsedCalls and add its filtered records. Returns the CollapsedCalls
+    sorted by position
+    """
     if matcher.no_consolidate:
         for val in ret:
             if matcher.gt != 'off':
@@ -178,12 +197,26 @@ def collapse_chunk(chunk, matcher):
             val.entry = edited_entry
             val.gt_consolidate_count = collapse_cnt
 
-    for i in chunk_dict['__filtered']:
+    for i in filtered:
         ret.append(CollapsedCalls(i, None))
     ret.sort(key=cmp_to_key(lambda x, y: x.entry.pos - y.entry.pos))
     return ret
 
 
+def collapse_chunks(chunks, matcher, threads=1):
+    """
+    Given an iterable of chunks (from tree_dist_chunker), yield each chunk's collapsed calls in order.
+    When threads > 1, the chunks are collapsed by a pool of processes with :meth:`truvari.collapse_pool.collapse_chunks`
+    """
+    if threads > 1:
+        yield from trupool.collapse_chunks(chunks, matcher, threads)
+        return
+    for chunk in chunks:
+        with truvari.perf_chunk("collapse", len(chunk[0]['base'])):
+            calls = collapse_chunk(chunk, matcher)
+        yield calls
+
+
 def relative_size_sorter(base, comp):
     """
     Sort calls based on the absolute size difference of base and comp
@@ -435,8 +468,8 @@ def sort_common(b1, b2):
     """
     Order entries from highest to highest AC
     """
-    mac1 = truvari.allele_freq_annos(b1)["AC"]
-    mac2 = truvari.allele_freq_annos(b2)["AC"]
+    mac1 = b1.ac if isinstance(b1, trupool.CollapseView) else truvari.allele_freq_annos(b1)["AC"]
+    mac2 = b2.ac if isinstance(b2, trupool.CollapseView) else truvari.allele_freq_annos(b2)["AC"]
     if mac1 > mac2:
         return 1
     if mac1 < mac2:
@@ -500,6 +533,19 @@ def parse_args(args):
                         help="Intrasample merge to first sample in output (%(default)s)")
     parser.add_argument("--median-info", action="store_true",
                         help="Store median start/end/size of collapsed entries in kept's INFO")
+    parser.add_argument("--cache-size", type=truvari.restricted_int, default=0,
+                        help="Number of sequence similarity results memoized in memory (%(default)s)")
+    parser.add_argument("--cache-dir", type=str, default=None,
+                        help=("Directory to persist sequence similarity results across runs. Without --cache-size, "
+                              "100000 results are also memoized in memory"))
+    parser.add_argument("--shard", type=truvari.parse_shard, default=None,
+                        help=("Only collapse shard i/N of the --bed regions (or contigs) and write a manifest to "
+                              "OUTPUT.shard.json. Merge every shard's output with `truvari merge-shards`"))
+    parser.add_argument("--threads", type=truvari.restricted_int, default=1,
+                        help="Number of processes collapsing chunks (%(default)s)")
+    parser.add_argument("--profile", action="store_true",
+                        help=("Run under cProfile and write its stats to OUTPUT.pstats and the stage timings to "
+                              "OUTPUT.perf.json"))
     parser.add_argument("--debug", action="store_true", default=False,
                         help="Verbose logging")
 
@@ -569,6 +615,15 @@ def check_params(args):
         if not os.path.exists(args.reference):
             logging.error("Reference %s does not exist", args.reference)
             check_fail = True
+    if args.threads < 1:
+        check_fail = True
+        logging.error("--threads must be at least 1")
+    if args.shard and args.output.startswith("/dev/"):
+        check_fail = True
+        logging.error("--shard needs an --output file to write its manifest beside")
+    if args.profile and args.output.startswith("/dev/"):
+        check_fail = True
+        logging.error("--profile needs an --output file to write its stats beside")
     return check_fail
 
 
@@ -873,20 +928,36 @@ def collapse_main(args):
     matcher.no_consolidate = args.no_consolidate
     matcher.picker = 'single'
 
-    base = pysam.VariantFile(args.input)
-    regions = truvari.build_region_tree(base, includebed=args.bed)
-    truvari.merge_region_tree_overlaps(regions)
-    base_i = truvari.region_filter(base, regions)
-
-    chunks = truvari.chunker(matcher, ('base', base_i))
-    smaller_chunks = tree_size_chunker(matcher, chunks)
-    even_smaller_chunks = tree_dist_chunker(matcher, smaller_chunks)
-
-    outputs = CollapseOutput(args)
-    m_collap = partial(collapse_chunk, matcher=matcher)
-    for call in itertools.chain.from_iterable(map(m_collap, even_smaller_chunks)):
-        outputs.write(call, args.median_info)
-
-    outputs.close()
-    outputs.dump_log()
+    perf, profile = (f"{args.output}.perf.json", f"{args.output}.pstats") if args.profile else (None, None)
+    with truvari.perf_run(perf, profile):
+        base = pysam.VariantFile(args.input)
+        regions = truvari.build_region_tree(base, includebed=args.bed)
+        truvari.merge_region_tree_overlaps(regions)
+        if args.shard:
+            # Regions further apart than the chunksize are never in the same chunk
+            regions = truvari.shard_regions(base, regions, args.shard, args.refdist + 1)
+        base_i = truvari.region_filter(base, regions)
+
+        chunks = truvari.chunker(matcher, ('base', base_i))
+        smaller_chunks = tree_size_chunker(matcher, chunks)
+        even_smaller_chunks = tree_dist_chunker(matcher, smaller_chunks)
+        if args.shard:
+            even_smaller_chunks = ((chunk, f"{args.shard[0]}_{chunk_id}") for chunk, chunk_id in even_smaller_chunks)
+
+        outputs = CollapseOutput(args)
+        for calls in collapse_chunks(truvari.perf_iter("read", even_smaller_chunks), matcher, args.threads):
+            with truvari.perf_stage("write"):
+                for call in calls:
+                    outputs.write(call, args.median_info)
+
+        with truvari.perf_stage("close"):
+            outputs.close()
+            outputs.dump_log()
+        if args.shard:
+            truvari.write_shard_manifest(f"{args.output}.shard.json", "collapse", args.shard,
+                                         {"output": args.output, "redundant_output": args.redundant_output},
+                                         stats=outputs["stats_box"])
+    if matcher.seqsim_cache is not None:
+        matcher.seqsim_cache.log_stats()
+        matcher.seqsim_cache.close()
     logging.info("Finished collapse")
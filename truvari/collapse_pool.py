@@ -0,0 +1,165 @@
+"""
+Collapses chunks of calls in a pool of processes
+
+Workers are sent :class:`CollapseView` of a chunk's calls instead of the pysam records and return which calls
+collapsed by their index in the chunk. The parent process places the records back into the results before they're
+consolidated and written, so the output is identical to a single process run.
+"""
+import multiprocessing
+from collections import deque
+
+import truvari
+import truvari.collapse as trucollapse
+from truvari.matching import VariantView
+
+
+class CollapseView(VariantView):
+    """
+    :class:`truvari.VariantView` with the features collapsing also needs: the QUAL, every sample's genotypes packed
+    by :meth:`truvari.pack_gts` (only when `gts`) and the allele counts (only when `ac`).
+
+    pysam records with the same contents are equal, so duplicate calls are removed together when one is collapsed.
+    Views made by :meth:`make_views` hold the index of the first record in their chunk they're equal to as `dup`
+    and compare on it to collapse the same way.
+
+    Example
+        >>> import pysam
+        >>> import truvari
+        >>> from truvari.collapse_pool import CollapseView
+        >>> v = pysam.VariantFile('repo_utils/test_files/variants/multi.vcf.gz')
+        >>> view = CollapseView(next(v), gts=True, ac=True)
+        >>> view.gts.tolist(), view.ac
+        ([[-1, -1], [1, 0], [-1, -1]], [1, 1])
+    """
+    __slots__ = ["qual", "gts", "ac", "dup"]
+
+    def __init__(self, entry, gts=False, ac=False):
+        super().__init__(entry)
+        self.qual = entry.qual
+        self.gts = truvari.pack_gts([_.allele_indices for _ in entry.samples.values()]) if gts else None
+        self.ac = truvari.allele_freq_annos(entry)["AC"] if ac else None
+        self.dup = None
+
+    def __eq__(self, other):
+        if not isinstance(other, CollapseView):
+            return NotImplemented
+        if self.dup is None:
+            return self is other
+        return self.dup == other.dup
+
+    def __hash__(self):
+        return id(self) if self.dup is None else hash(self.dup)
+
+    def __getstate__(self):
+        return {key: getattr(self, key) for key in VariantView.__slots__ + CollapseView.__slots__
+                if key != "record"}
+
+
+def make_views(calls, gts=False, ac=False):
+    """
+    Make the :class:`CollapseView` of a chunk's calls with their `dup` set
+    """
+    views = []
+    firsts = {}
+    for idx, call in enumerate(calls):
+        view = CollapseView(call, gts, ac)
+        same = firsts.setdefault((view.start, view.stop, view.ref, view.alts), [])
+        view.dup = next((_ for _ in same if calls[_] == call), idx)
+        if view.dup == idx:
+            same.append(idx)
+        views.append(view)
+    return views
+
+
+def collapse_chunks(chunks, matcher, threads, inflight=None):
+    """
+    Given an iterable of chunks (from :meth:`truvari.collapse.tree_dist_chunker`), yield each chunk's consolidated
+    CollapsedCalls in order. The chunks are collapsed by a pool of `threads` processes. At most `inflight` chunks
+    (default threads * 4) are held in memory while waiting on their results.
+    """
+    inflight = inflight if inflight is not None else threads * 4
+    worker_attrs = {"keep": matcher.keep, "hap": matcher.hap, "gt": matcher.gt, "chain": matcher.chain}
+    pending = deque()
+    with multiprocessing.Pool(threads, initializer=_init_collapse_worker,
+                              initargs=(matcher.params, worker_attrs, truvari.perf_active())) as pool:
+        for chunk_dict, chunk_id in chunks:
+            calls = chunk_dict['base']
+            job = None
+            # A single call has nothing to collapse with and isn't worth sending to the pool
+            if len(calls) > 1:
+                views = make_views(calls, matcher.gt != 'off', matcher.keep == 'common')
+                job = pool.apply_async(_collapse_packed_chunk, (views, chunk_id))
+            pending.append((chunk_dict, chunk_id, job))
+            if len(pending) >= inflight:
+                yield collect_chunk(matcher, *pending.popleft())
+        while pending:
+            yield collect_chunk(matcher, *pending.popleft())
+
+
+def collect_chunk(matcher, chunk_dict, chunk_id, job=None):
+    """
+    Finish a chunk sent to the pool by `collapse_chunks` by placing its original records back into the results
+    and consolidating them. Chunks without a job are collapsed here
+    """
+    with truvari.perf_chunk("collapse", len(chunk_dict['base'])):
+        if job is None:
+            return trucollapse.collapse_chunk((chunk_dict, chunk_id), matcher)
+        result, cache_counts, perf = job.get()
+        if matcher.seqsim_cache is not None:
+            matcher.seqsim_cache.add_counts(*cache_counts)
+        truvari.perf_merge(perf)
+        calls = chunk_dict['base']
+        for m_collap in result:
+            m_collap.entry = calls[m_collap.entry]
+            for match in m_collap.matches:
+                if match.base is not None:
+                    match.base = calls[match.base]
+                if match.comp is not None:
+                    match.comp = calls[match.comp]
+        return trucollapse.consolidate_chunk(result, chunk_dict['__filtered'], matcher)
+
+
+####################
+# Parallel Helpers #
+####################
+_WORKER_MATCHER = None
+
+
+def _init_collapse_worker(params, attrs, perf):
+    """
+    Pool initializer. Every worker process holds its own Matcher set up like collapse_main's and, when perf, its
+    own :class:`truvari.PerfStats`
+    """
+    global _WORKER_MATCHER  # pylint: disable=global-statement
+    truvari.perf_worker(perf)
+    matcher = truvari.Matcher()
+    matcher.params = params
+    matcher.seqsim_cache = truvari.SeqSimCache.from_params(params)
+    for key, value in attrs.items():
+        setattr(matcher, key, value)
+    matcher.sorter = trucollapse.SORTS[matcher.keep]
+    matcher.picker = 'single'
+    _WORKER_MATCHER = matcher
+
+
+def _collapse_packed_chunk(views, chunk_id):
+    """
+    Collapse a chunk of :class:`CollapseView` inside a worker. The returned CollapsedCalls hold the index of their
+    entry and matches' base/comp inside the chunk instead of the call. Also returns the worker's seqsim cache
+    hits/misses and stage timings
+    """
+    result = trucollapse.collapse_calls(views, chunk_id, _WORKER_MATCHER)
+    index = {id(view): idx for idx, view in enumerate(views)}
+    for m_collap in result:
+        m_collap.entry = index[id(m_collap.entry)]
+        for match in m_collap.matches:
+            if match.base is not None:
+                match.base = index[id(match.base)]
+            if match.comp is not None:
+                match.comp = index[id(match.comp)]
+    cache = _WORKER_MATCHER.seqsim_cache
+    if cache is None:
+        return result, (0, 0), truvari.perf_pop()
+    # Workers are never closed, so their results are written to the on-disk store as each chunk finishes
+    cache.flush()
+    return result, cache.pop_counts(), truvari.perf_pop()
@@ -9,6 +9,8 @@ import edlib
 
 import truvari
 
+SV_ALT_MATCH = re.compile(r"\<(?P<SVTYPE>.*)\>")
+
 
 def coords_within(qstart, qend, rstart, rend, end_within):
     """
@@ -168,15 +170,22 @@ def entry_is_present(entry, sample=None, allow_missing=True):
         truvari.GT.HET, truvari.GT.HOM]
 
 
-def entry_seq_similarity(entryA, entryB):
+def entry_seq_similarity(entryA, entryB, min_sim=0, cache=None):
     """
     Calculate sequence similarity of two entries. If reference is not None,
     compare their shared reference context. Otherwise, use the unroll technique.
 
+    When `min_sim` is set, alignments stop early once the similarity can't reach `min_sim`.
+    Similarities at or above `min_sim` are exact. Otherwise, an upper bound that's below `min_sim` is returned.
+
     :param `entryA`: first entry
     :type `entryA`: :class:`pysam.VariantRecord`
     :param `entryB`: second entry
     :type `entryB`: :class:`pysam.VariantRecord`
+    :param `min_sim`: minimum similarity needed
+    :type `min_sim`: float, optional
+    :param `cache`: memoize results
+    :type `cache`: :class:`truvari.SeqSimCache`, optional
 
     :return: sequence similarity
     :rtype: float
@@ -187,9 +196,9 @@ def entry_seq_similarity(entryA, entryB):
 
     # Inversions handled differently
     if entry_variant_type(entryA) == truvari.SV.INV and entry_variant_type(entryB) == truvari.SV.INV:
-        allele1 = entryA.alts[0]
-        allele2 = entryB.alts[0]
-        return seqsim(allele1, allele2)
+        a_seq = entryA.alts[0].upper()
+        b_seq = entryB.alts[0].upper()
+        return cached_seqsim(a_seq, b_seq, 0, min_sim, cache)
 
     a_seq = entryA.ref if entry_variant_type(
         entryA) == truvari.SV.DEL else entryA.alts[0]
@@ -200,7 +209,7 @@ def entry_seq_similarity(entryA, entryB):
     st_dist, ed_dist = entry_distance(entryA, entryB)
 
     if st_dist == 0 or ed_dist == 0:
-        return seqsim(a_seq, b_seq)
+        return cached_seqsim(a_seq, b_seq, 0, min_sim, cache)
 
     # Directionality of rolling makes a difference
     if st_dist < 0:
@@ -208,9 +217,57 @@ def entry_seq_similarity(entryA, entryB):
     else:
         a_seq, b_seq = b_seq, a_seq
 
-    # Roll both ends and compute direct similarity
-    # Whichever is highest is how similar these sequences can be
-    return max(unroll_compare(a_seq, b_seq, st_dist), unroll_compare(b_seq, a_seq, -st_dist), seqsim(a_seq, b_seq))
+    return cached_seqsim(a_seq, b_seq, st_dist, min_sim, cache)
+
+
+def cached_seqsim(a_seq, b_seq, offset=0, min_sim=0, cache=None):
+    """
+    Sequence similarity of two alleles, unrolled by offset when it isn't 0.
+    Results are looked up in/stored to the cache when one is provided
+
+    :param `a_seq`: first allele
+    :type `a_seq`: string
+    :param `b_seq`: second allele
+    :type `b_seq`: string
+    :param `offset`: unroll distance between the alleles
+    :type `offset`: int
+    :param `min_sim`: minimum similarity needed
+    :type `min_sim`: float, optional
+    :param `cache`: memoize results
+    :type `cache`: :class:`truvari.SeqSimCache`, optional
+
+    :return: sequence similarity
+    :rtype: float
+
+    Example
+        >>> import truvari
+        >>> cache = truvari.SeqSimCache()
+        >>> truvari.cached_seqsim("ACGTACGT", "CGTACGTA", 1, cache=cache)
+        1.0
+        >>> truvari.cached_seqsim("ACGTACGT", "CGTACGTA", 1, cache=cache)
+        1.0
+        >>> cache.hits, cache.misses
+        (1, 1)
+    """
+    key = None
+    if cache is not None:
+        key = cache.make_key(a_seq, b_seq, offset)
+        ret = cache.get(key, min_sim)
+        if ret is not None:
+            return ret
+
+    if offset == 0:
+        ret = best_seqsim([(a_seq, b_seq)], min_sim)
+    else:
+        # Roll both ends and compute direct similarity
+        # Whichever is highest is how similar these sequences can be
+        ret = best_seqsim([(a_seq, unroll(b_seq, offset)),
+                           (b_seq, unroll(a_seq, -offset)),
+                           (a_seq, b_seq)], min_sim)
+
+    if cache is not None:
+        cache.put(key, ret, min_sim <= 0 or ret >= min_sim)
+    return ret
 
 
 def entry_reciprocal_overlap(entry1, entry2, ins_inflate=True):
@@ -279,11 +336,13 @@ def entry_size(entry):
         abs(len(vcf.REF) - len(str(vcf.ALT[0])))
 
     :param `entry`: entry to look at
-    :type `entry`: :class:`pysam.VariantRecord`
+    :type `entry`: :class:`pysam.VariantRecord` or :class:`truvari.VariantView`
 
     :return: the entry's size
     :rtype: int
     """
+    if isinstance(entry, truvari.VariantView):
+        return entry.size
     if "SVLEN" in entry.info:
         if type(entry.info["SVLEN"]) in [list, tuple]:
             size = abs(entry.info["SVLEN"][0])
@@ -388,12 +447,13 @@ def entry_variant_type(entry):
         - Otherwise, assume 'UNK'
 
     :param `entry`:
-    :type `entry`: :class:`pysam.VariantRecord`
+    :type `entry`: :class:`pysam.VariantRecord` or :class:`truvari.VariantView`
 
     :return: SV type
     :rtype: :class:`truvari.SV`
     """
-    sv_alt_match = re.compile(r"\<(?P<SVTYPE>.*)\>")
+    if isinstance(entry, truvari.VariantView):
+        return entry.svtype
 
     ret_type = None
     if "SVTYPE" in entry.info:
@@ -411,7 +471,7 @@ def entry_variant_type(entry):
         elif len(entry.ref) == len(entry.alts[0]):
             ret_type = "SNP" if len(entry.ref) == 1 else "UNK"
         return truvari.get_svtype(ret_type)
-    mat = sv_alt_match.match(entry.alts[0]) if entry.alts is not None else None
+    mat = SV_ALT_MATCH.match(entry.alts[0]) if entry.alts is not None else None
     if mat is not None:
         return truvari.get_svtype(mat.groupdict()["SVTYPE"])
     return truvari.get_svtype("UNK")
@@ -434,9 +494,7 @@ def entry_overlaps_tree(entry, tree):
     Figure out if an entry overlaps with any tree bundaries
     """
     qstart, qend = truvari.entry_boundaries(entry)
-
-    m_ovl = tree[entry.chrom].overlap(qstart, qend)
-    return len(m_ovl) > 0
+    return tree[entry.chrom].overlaps(qstart, qend)
 
 def entry_within(entry, rstart, rend):
     """
@@ -520,23 +578,100 @@ def reciprocal_overlap(astart, aend, bstart, bend):
     return ovl_pct
 
 
-def seqsim(allele1, allele2):
+def seqsim(allele1, allele2, min_sim=0):
     """
     Calculate similarity of two sequences
 
+    When `min_sim` is set, the alignment stops early once the similarity can't reach `min_sim`.
+    Similarities at or above `min_sim` are exact. Otherwise, an upper bound that's below `min_sim` is returned.
+
     :param `allele1`: first entry
     :type `allele1`: :class:`pysam.VariantRecord`
     :param `allele2`: second entry
     :type `allele2`: :class:`pysam.VariantRecord`
+    :param `min_sim`: minimum similarity needed
+    :type `min_sim`: float, optional
 
     :return: sequence similarity
     :rtype: float
+
+    Example
+        >>> import truvari
+        >>> truvari.seqsim("ACGTACGTAC", "ACGTTCGTAC")
+        0.95
+        >>> truvari.seqsim("ACGTACGTAC", "ACGTTCGTAC", 0.9)
+        0.95
+        >>> truvari.seqsim("ACGTACGTAC", "TTTTTTTTTT", 0.9) < 0.9
+        True
     """
     allele1 = allele1.upper()
     allele2 = allele2.upper()
-    scr = edlib.align(allele1, allele2)
-    totlen = len(allele1) + len(allele2)
-    return (totlen - scr["editDistance"]) / totlen
+    return best_seqsim([(allele1, allele2)], min_sim)
+
+
+def max_edit_distance(totlen, min_sim):
+    """
+    Largest edit distance between sequences with a combined length of `totlen`
+    which still has a :meth:`seqsim` of at least `min_sim`
+
+    :param `totlen`: sum of the sequences' lengths
+    :type `totlen`: int
+    :param `min_sim`: minimum similarity
+    :type `min_sim`: float
+
+    :return: edit distance or -1 if any is allowed
+    :rtype: int
+
+    Example
+        >>> import truvari
+        >>> truvari.max_edit_distance(20, 0.7)
+        6
+        >>> truvari.max_edit_distance(20, 0)
+        -1
+    """
+    if min_sim <= 0 or totlen == 0:
+        return -1
+    dist = int(totlen * (1 - min_sim)) + 1
+    # Step back to the exact similarity comparison to avoid floating point surprises
+    while dist > 0 and (totlen - dist) / totlen < min_sim:
+        dist -= 1
+    return dist
+
+
+def best_seqsim(pairs, min_sim=0):
+    """
+    Calculate the highest :meth:`seqsim` of sequence pairs which all have the same combined length.
+    Each alignment is bounded by the best edit distance found so far and `min_sim`, so
+    pairs stop aligning as soon as they can't improve the result.
+
+    :param `pairs`: list of tuples of upper-case sequences
+    :type `pairs`: list
+    :param `min_sim`: minimum similarity needed
+    :type `min_sim`: float, optional
+
+    :return: highest sequence similarity or an upper bound below `min_sim` when none reach it
+    :rtype: float
+    """
+    totlen = len(pairs[0][0]) + len(pairs[0][1])
+    max_dist = max_edit_distance(totlen, min_sim)
+    # The length difference is the fewest edits possible
+    if max_dist != -1 and abs(len(pairs[0][0]) - len(pairs[0][1])) > max_dist:
+        return max(0, totlen - max_dist - 1) / totlen
+
+    best = None
+    bound = max_dist
+    for allele1, allele2 in pairs:
+        dist = edlib.align(allele1, allele2, k=bound)["editDistance"]
+        if dist == -1:
+            continue
+        best = dist
+        if best == 0:
+            break
+        bound = best - 1
+
+    if best is None:
+        return max(0, totlen - max_dist - 1) / totlen
+    return (totlen - best) / totlen
 
 
 def sizesim(sizeA, sizeB):
@@ -559,7 +694,29 @@ def sizesim(sizeA, sizeB):
     return min(sizeA, sizeB) / float(max(sizeA, sizeB)), sizeA - sizeB
 
 
-def unroll_compare(seqA, seqB, p):
+def unroll(seq, p):
+    """
+    Rotate a sequence so its last `p` bases (modulo its length) come first.
+    See :meth:`unroll_compare`
+
+    :param `seq`: sequence
+    :type `seq`: string
+    :param `p`: how many bases to rotate
+    :type `p`: integer
+
+    :return: rotated sequence
+    :rtype: string
+
+    Example
+        >>> import truvari
+        >>> truvari.unroll("ACGTT", 2)
+        'TTACG'
+    """
+    f = p % len(seq)
+    return seq[-f:] + seq[:-f]
+
+
+def unroll_compare(seqA, seqB, p, min_sim=0):
     """
     Unroll two sequences and compare.
     See https://gist.github.com/ACEnglish/1e7421c46ee10c71bee4c03982e5df6c for details
@@ -570,13 +727,13 @@ def unroll_compare(seqA, seqB, p):
     :type `seqB`: string
     :param `p`: how many bases upstream seqA is from seqB
     :type `p`: integer
+    :param `min_sim`: minimum similarity needed. See :meth:`seqsim`
+    :type `min_sim`: float, optional
 
     :return: sequence similarity of seqA vs seqB after unrolling
     :rtype: float
     """
-    f = p % len(seqB)
-    uB = seqB[-f:] + seqB[:-f]
-    return seqsim(seqA, uB)
+    return seqsim(seqA, unroll(seqB, p), min_sim)
 
 def entry_resolved(entry):
     """
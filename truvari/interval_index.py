@@ -0,0 +1,295 @@
+"""
+Intervals of a contig held in sorted numpy arrays
+"""
+from collections import namedtuple
+
+import numpy as np
+
+Interval = namedtuple("Interval", ["begin", "end", "data"], defaults=[None])
+
+
+class IntervalIndex():
+    """
+    Half-open [begin, end) intervals with optional data. Answers the same queries as an
+    :class:`intervaltree.IntervalTree` (`overlap`, `at`, `envelop`, `merge_overlaps`, `chop`) from
+    sorted begin/end arrays. Like an IntervalTree, identical intervals are only held once and merging
+    overlaps drops the data of merged intervals. Queries return lists of :class:`Interval` sorted by begin
+    and end.
+
+    Intervals added with `addi` are sorted into the arrays by the next query, so building by adding many
+    intervals is cheap. Use `from_arrays` for large numbers of intervals.
+
+    Example
+        >>> import truvari
+        >>> idx = truvari.IntervalIndex.from_tuples([(10, 20, 'a'), (15, 30, 'b'), (40, 50, 'c')])
+        >>> [_.data for _ in idx.overlap(18, 41)]
+        ['a', 'b', 'c']
+        >>> idx.at(20)
+        [Interval(begin=15, end=30, data='b')]
+        >>> idx.merge_overlaps()
+        >>> list(idx)
+        [Interval(begin=10, end=30, data=None), Interval(begin=40, end=50, data='c')]
+        >>> list(idx.extend(5))
+        [Interval(begin=5, end=35, data=None), Interval(begin=35, end=55, data=None)]
+    """
+    __slots__ = ("_begins", "_ends", "_data", "_max_ends", "_pending")
+
+    def __init__(self, intervals=None):
+        self._begins = np.zeros(0, dtype=np.int64)
+        self._ends = np.zeros(0, dtype=np.int64)
+        self._data = None
+        self._max_ends = self._ends
+        self._pending = []
+        if intervals is not None:
+            for intv in intervals:
+                self.addi(*intv)
+
+    @classmethod
+    def from_tuples(cls, tuples):
+        """
+        Make an index from (begin, end) or (begin, end, data) tuples
+        """
+        return cls(tuples)
+
+    @classmethod
+    def from_arrays(cls, begins, ends, data=None):
+        """
+        Make an index from arrays of the intervals' begins, ends, and optionally data
+        """
+        ret = cls()
+        begins = np.asarray(begins, dtype=np.int64)
+        ends = np.asarray(ends, dtype=np.int64)
+        if (ends <= begins).any():
+            raise ValueError("Intervals must have begin < end")
+        ret.set_arrays(begins, ends, None if data is None else np.asarray(data))
+        return ret
+
+    @classmethod
+    def from_sorted(cls, begins, ends, data=None, max_ends=None):
+        """
+        Make an index from arrays which are already sorted and without identical intervals, such as those of
+        another index. The arrays are used as is (e.g. memory-mapped arrays stay mapped) and aren't checked
+        """
+        ret = cls()
+        ret._begins = begins
+        ret._ends = ends
+        ret._data = data
+        if max_ends is None:
+            max_ends = np.maximum.accumulate(ends) if len(ends) else ends
+        ret._max_ends = max_ends
+        return ret
+
+    def addi(self, begin, end, data=None):
+        """
+        Add the interval [begin, end)
+        """
+        if end <= begin:
+            raise ValueError(f"Null interval {begin}-{end}")
+        self._pending.append((begin, end, data))
+
+    def add(self, interval):
+        """
+        Add an :class:`Interval`
+        """
+        self.addi(*interval)
+
+    def set_arrays(self, begins, ends, data=None):
+        """
+        Replace the intervals with the arrays. They're sorted and identical intervals are removed
+        """
+        if data is not None and data.dtype != object:
+            order = np.lexsort((data, ends, begins))
+        else:
+            order = np.lexsort((ends, begins))
+        begins, ends = begins[order], ends[order]
+        data = data[order] if data is not None else None
+
+        same = (begins[1:] == begins[:-1]) & (ends[1:] == ends[:-1])
+        if same.any():
+            keep = np.ones(len(begins), dtype=bool)
+            if data is None:
+                keep[1:] = ~same
+            else:
+                run = [data[0]]
+                for pos in range(1, len(begins)):
+                    if not same[pos - 1]:
+                        run = [data[pos]]
+                    elif data[pos] in run:
+                        keep[pos] = False
+                    else:
+                        run.append(data[pos])
+            begins, ends = begins[keep], ends[keep]
+            data = data[keep] if data is not None else None
+        self._begins = begins
+        self._ends = ends
+        self._data = data
+        self._max_ends = np.maximum.accumulate(ends) if len(ends) else ends
+
+    def _build(self):
+        """
+        Sort the added intervals into the arrays
+        """
+        if not self._pending:
+            return
+        pending = self._pending
+        self._pending = []
+        begins = np.concatenate([self._begins, np.array([_[0] for _ in pending], dtype=np.int64)])
+        ends = np.concatenate([self._ends, np.array([_[1] for _ in pending], dtype=np.int64)])
+        data = None
+        if self._data is not None or any(_[2] is not None for _ in pending):
+            data = np.empty(len(begins), dtype=object)
+            if self._data is not None:
+                data[:len(self._begins)] = self._data
+            for pos, intv in enumerate(pending, len(self._begins)):
+                data[pos] = intv[2]
+        self.set_arrays(begins, ends, data)
+
+    @property
+    def begins(self):
+        """
+        Sorted begins of the intervals
+        """
+        self._build()
+        return self._begins
+
+    @property
+    def ends(self):
+        """
+        Ends of the intervals in the order of the `begins`
+        """
+        self._build()
+        return self._ends
+
+    @property
+    def max_ends(self):
+        """
+        Running maximum of the `ends`
+        """
+        self._build()
+        return self._max_ends
+
+    @property
+    def data(self):
+        """
+        Data of the intervals in the order of the `begins`, or None if no interval has data
+        """
+        self._build()
+        return self._data
+
+    def interval(self, pos):
+        """
+        The :class:`Interval` at a position of the sorted intervals
+        """
+        data = self._data[pos:pos + 1].tolist()[0] if self._data is not None else None
+        return Interval(int(self._begins[pos]), int(self._ends[pos]), data)
+
+    def _intervals(self, positions):
+        """
+        The :class:`Interval` at each position of the sorted intervals
+        """
+        begins = self._begins[positions].tolist()
+        ends = self._ends[positions].tolist()
+        data = self._data[positions].tolist() if self._data is not None else [None] * len(begins)
+        return [Interval(*_) for _ in zip(begins, ends, data)]
+
+    def __len__(self):
+        self._build()
+        return len(self._begins)
+
+    def __iter__(self):
+        self._build()
+        return iter(self._intervals(slice(None)))
+
+    def _overlapping(self, begin, end):
+        """
+        Positions of the intervals overlapping [begin, end)
+        """
+        self._build()
+        if end <= begin:
+            return np.zeros(0, dtype=np.int64)
+        # Only intervals beginning before the end can overlap and the first which ends after begin is found
+        # through the running max of the ends
+        upper = np.searchsorted(self._begins, end, side='left')
+        lower = np.searchsorted(self._max_ends[:upper], begin, side='right')
+        return lower + np.flatnonzero(self._ends[lower:upper] > begin)
+
+    def overlap(self, begin, end):
+        """
+        Intervals overlapping [begin, end)
+        """
+        return self._intervals(self._overlapping(begin, end))
+
+    def overlaps(self, begin, end):
+        """
+        True if any interval overlaps [begin, end)
+        """
+        return len(self._overlapping(begin, end)) != 0
+
+    def at(self, point):
+        """
+        Intervals holding the point
+        """
+        return self.overlap(point, point + 1)
+
+    def envelop(self, begin, end):
+        """
+        Intervals entirely within [begin, end)
+        """
+        self._build()
+        lower = np.searchsorted(self._begins, begin, side='left')
+        upper = np.searchsorted(self._begins, end, side='left')
+        return self._intervals(lower + np.flatnonzero(self._ends[lower:upper] <= end))
+
+    def merge_overlaps(self, strict=True):
+        """
+        Merge overlapping intervals. Unless strict, intervals that only touch are also merged.
+        Merged intervals lose their data
+        """
+        self._build()
+        if len(self._begins) < 2:
+            return
+        # A new interval starts where the begin is past every previous end
+        prev_max = self._max_ends[:-1]
+        starts = np.concatenate([[True], self._begins[1:] >= prev_max if strict else self._begins[1:] > prev_max])
+        if starts.all():
+            return
+        first = np.flatnonzero(starts)
+        last = np.concatenate([first[1:], [len(starts)]]) - 1
+        data = None
+        if self._data is not None:
+            data = np.empty(len(first), dtype=object)
+            data[:] = None
+            single = first == last
+            data[single] = self._data[first[single]]
+        self.set_arrays(self._begins[first], self._max_ends[last], data)
+
+    def extend(self, pad):
+        """
+        Returns a new index of every interval extended by pad on both sides with their overlaps merged.
+        Begins stop at 0 and the data is dropped
+        """
+        self._build()
+        ret = IntervalIndex()
+        if len(self._begins):
+            ret.set_arrays(np.maximum(self._begins - pad, 0), self._ends + pad)
+        ret.merge_overlaps()
+        return ret
+
+    def chop(self, begin, end):
+        """
+        Remove [begin, end) from the intervals. Remaining pieces keep their data
+        """
+        positions = self._overlapping(begin, end)
+        if positions.size == 0:
+            return
+        keep = np.ones(len(self._begins), dtype=bool)
+        keep[positions] = False
+        pieces = []
+        for intv in self._intervals(positions):
+            if intv.begin < begin:
+                pieces.append((intv.begin, begin, intv.data))
+            if end < intv.end:
+                pieces.append((end, intv.end, intv.data))
+        data = self._data[keep] if self._data is not None else None
+        self.set_arrays(self._begins[keep], self._ends[keep], data)
+        self._pending = pieces
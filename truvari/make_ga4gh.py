@@ -10,7 +10,6 @@ from collections import defaultdict
 
 import pysam
 import pandas as pd
-from intervaltree import IntervalTree
 
 import truvari
 
@@ -53,7 +52,7 @@ def build_tree(regions, buffer=0):
     """
     Build tree from regions
     """
-    tree = defaultdict(IntervalTree)
+    tree = defaultdict(truvari.IntervalIndex)
     for _, i in regions.iterrows():
         tree[i['chrom']].addi(i['start'] - buffer, i['end'] + buffer + 1)
     for i in tree:
@@ -2,10 +2,13 @@
 Comparison engine
 """
 import types
+import heapq
+import queue
 import logging
+import threading
 from collections import Counter, defaultdict
 from functools import total_ordering
-import pysam
+import numpy as np
 import truvari
 
 
@@ -89,7 +92,8 @@ class Matcher():
 
         self.reference = None
         if self.params.reference is not None:
-            self.reference = pysam.FastaFile(self.params.reference)
+            self.reference = truvari.ReferenceCache(self.params.reference)
+        self.seqsim_cache = truvari.SeqSimCache.from_params(self.params)
 
     @staticmethod
     def make_match_params():
@@ -116,6 +120,8 @@ class Matcher():
         params.ignore_monref = True
         params.check_multi = True
         params.check_monref = True
+        params.cache_size = 0
+        params.cache_dir = None
         return params
 
     @staticmethod
@@ -143,6 +149,8 @@ class Matcher():
         ret.pick = args.pick if "pick" in args else "single"
         ret.check_monref = True
         ret.check_multi = True
+        ret.cache_size = args.cache_size if "cache_size" in args else 0
+        ret.cache_dir = args.cache_dir if "cache_dir" in args else None
         return ret
 
     def filter_call(self, entry, base=False):
@@ -233,13 +241,18 @@ class Matcher():
                 return ret
 
         if self.params.pctseq > 0:
-            ret.seqsim = truvari.entry_seq_similarity(base, comp)
-            if ret.seqsim < self.params.pctseq:
+            # Exact similarities of failed pairs aren't needed when short circuiting
+            with truvari.perf_stage("seqsim"):
+                seqsim = truvari.entry_seq_similarity(base, comp, self.params.pctseq if short_circuit else 0,
+                                                      self.seqsim_cache)
+            if seqsim < self.params.pctseq:
                 logging.debug("%s and %s sequence similarity is too low (%.3ff)",
-                              str(base), str(comp), ret.seqsim)
+                              str(base), str(comp), seqsim)
                 ret.state = False
                 if short_circuit:
+                    # Only a bound of the similarity is known, so it's left unset like the checks not run
                     return ret
+            ret.seqsim = seqsim
         else:
             ret.seqsim = 0
 
@@ -248,12 +261,453 @@ class Matcher():
 
         return ret
 
+    def screen_matrix(self, base_variants, comp_variants):
+        """
+        Vectorized version of the type, refdist, pctsize, and pctovl checks of
+        `build_match` over every base/comp pair.
+
+        Returns a namespace holding `failed`, a base x comp numpy array of the check where each pair first
+        failed (see `SCREEN_*`), the variants, and the `base`/`comp` features from :meth:`call_arrays`.
+        Only `SCREEN_PASS` pairs need a full `build_match`
+        """
+        base = call_arrays(base_variants)
+        comp = call_arrays(comp_variants)
+        failed = np.full((len(base_variants), len(comp_variants)), SCREEN_PASS, dtype=np.int8)
+
+        # Mark failures from the last check to the first so each pair holds its first failure
+        b_start = base["ovl_start"][:, None]
+        b_end = base["ovl_end"][:, None]
+        c_start = comp["ovl_start"][None, :]
+        c_end = comp["ovl_end"][None, :]
+        ovl_len = np.minimum(b_end, c_end) - np.maximum(b_start, c_start)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ovlpct = np.where(ovl_len > 0,
+                              ovl_len / np.maximum(b_end - b_start, c_end - c_start),
+                              0)
+        failed[ovlpct < self.params.pctovl] = SCREEN_OVL
+
+        # Sizes of 0 are treated as 1 unless both are 0
+        b_size = base["size"][:, None]
+        c_size = comp["size"][None, :]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sizesim = np.where((b_size == 0) & (c_size == 0), 1,
+                               np.maximum(np.minimum(b_size, c_size), 1) / np.maximum(np.maximum(b_size, c_size), 1))
+        failed[sizesim < self.params.pctsize] = SCREEN_SIZE
+
+        # truvari.overlaps(bstart - refdist, bend + refdist, cstart, cend)
+        near = (np.maximum(base["start"][:, None] - self.params.refdist, comp["start"][None, :])
+                < np.minimum(base["end"][:, None] + self.params.refdist, comp["end"][None, :]))
+        failed[~near] = SCREEN_DIST
+
+        if not self.params.typeignore:
+            b_type = base["svtype"]
+            c_type = comp["svtype"]
+            if self.params.dup_to_ins:
+                b_type = np.where(b_type == truvari.SV.DUP.value, truvari.SV.INS.value, b_type)
+                c_type = np.where(c_type == truvari.SV.DUP.value, truvari.SV.INS.value, c_type)
+            failed[b_type[:, None] != c_type[None, :]] = SCREEN_TYPE
+
+        return types.SimpleNamespace(failed=failed, base=base, comp=comp,
+                                     base_variants=base_variants, comp_variants=comp_variants)
+
+    def screened_match(self, screen, bid, cid, matid=None, skip_gt=False):
+        """
+        Build the MatchResult of the pair at [bid, cid] of a `screen_matrix`.
+        Pairs which passed the screen are given to `build_match`. Pairs which failed get
+        the same MatchResult as `build_match` with short_circuit without running the comparisons again
+        """
+        base = screen.base_variants[bid]
+        comp = screen.comp_variants[cid]
+        failed = screen.failed[bid, cid]
+        if failed == SCREEN_PASS:
+            return self.build_match(base, comp, matid, skip_gt, short_circuit=True)
+
+        ret = MatchResult()
+        ret.base = base
+        ret.comp = comp
+        ret.matid = matid
+        if failed < SCREEN_SIZE:
+            return ret
+
+        ret.sizesim, ret.sizediff = truvari.sizesim(int(screen.base["size"][bid]),
+                                                    int(screen.comp["size"][cid]))
+        if failed == SCREEN_SIZE:
+            return ret
+
+        if not skip_gt:
+            if "GT" in base.samples[self.params.bSample]:
+                ret.base_gt = base.samples[self.params.bSample]["GT"]
+                ret.base_gt_count = sum(1 for _ in ret.base_gt if _ == 1)
+            if "GT" in comp.samples[self.params.cSample]:
+                ret.comp_gt = comp.samples[self.params.cSample]["GT"]
+                ret.comp_gt_count = sum(1 for _ in ret.comp_gt if _ == 1)
+            ret.gt_match = abs(ret.base_gt_count - ret.comp_gt_count)
+
+        ret.ovlpct = truvari.reciprocal_overlap(int(screen.base["ovl_start"][bid]),
+                                                int(screen.base["ovl_end"][bid]),
+                                                int(screen.comp["ovl_start"][cid]),
+                                                int(screen.comp["ovl_end"][cid]))
+        return ret
+
+
+# Which `Matcher.build_match` check a pair first fails inside `Matcher.screen_matrix`
+SCREEN_PASS = 0
+SCREEN_TYPE = 1
+SCREEN_DIST = 2
+SCREEN_SIZE = 3
+SCREEN_OVL = 4
+
+
+def call_arrays(variants):
+    """
+    Load the coordinates, sizes, and svtypes of a list of variants into numpy arrays.
+    ovl_start/ovl_end are the INS inflated boundaries used for reciprocal overlap
+    """
+    num = len(variants)
+    ret = {"start": np.zeros(num, dtype=np.int64),
+           "end": np.zeros(num, dtype=np.int64),
+           "ovl_start": np.zeros(num, dtype=np.int64),
+           "ovl_end": np.zeros(num, dtype=np.int64),
+           "size": np.zeros(num, dtype=np.int64),
+           "svtype": np.zeros(num, dtype=np.int8)}
+    for idx, entry in enumerate(variants):
+        start, end = truvari.entry_boundaries(entry)
+        size = truvari.entry_size(entry)
+        svtype = truvari.entry_variant_type(entry)
+        ret["start"][idx] = start
+        ret["end"][idx] = end
+        ret["size"][idx] = size
+        ret["svtype"][idx] = svtype.value
+        if svtype == truvari.SV.INS:
+            start -= size // 2
+            end += size // 2
+        ret["ovl_start"][idx] = start
+        ret["ovl_end"][idx] = end
+    return ret
+
+
+class MatchMatrix():
+    """
+    Base x comp matrix of MatchResults made by :meth:`truvari.Bench.build_matrix`.
+    The `state`, `score`, and `base_gt_count`/`comp_gt_count` of every pair are held in numpy arrays
+    for the match pickers. Indexing (e.g. `match_matrix[bid, cid]`) returns the pair's MatchResult.
+    Pairs which weren't `add`-ed while filling the matrix get theirs built by `builder(bid, cid)` when first used
+    """
+    sparse = False
+
+    def __init__(self, num_base, num_comp, builder=None):
+        shape = (num_base, num_comp)
+        self.state = np.zeros(shape, dtype=bool)
+        self.score = np.zeros(shape, dtype=np.float64)
+        self.base_gt_count = np.zeros(shape, dtype=np.int64)
+        self.comp_gt_count = np.zeros(shape, dtype=np.int64)
+        self.results = {}
+        self.builder = builder
+
+    @property
+    def shape(self):
+        """
+        (number of base calls, number of comp calls)
+        """
+        return self.state.shape
+
+    def set_gt_counts(self, mask, base_counts, comp_counts):
+        """
+        Set the gt counts of the pairs in mask from lists of every base/comp call's count
+        """
+        self.base_gt_count[mask] = np.broadcast_to(np.array(base_counts)[:, None], self.shape)[mask]
+        self.comp_gt_count[mask] = np.broadcast_to(np.array(comp_counts)[None, :], self.shape)[mask]
+
+    def add(self, bid, cid, match):
+        """
+        Place a MatchResult into the matrix
+        """
+        self.results[(bid, cid)] = match
+        self.state[bid, cid] = match.state
+        self.score[bid, cid] = match.score
+        self.base_gt_count[bid, cid] = match.base_gt_count
+        self.comp_gt_count[bid, cid] = match.comp_gt_count
+
+    def __getitem__(self, idx):
+        idx = (int(idx[0]), int(idx[1]))
+        ret = self.results.get(idx)
+        if ret is None:
+            ret = self.builder(*idx)
+            self.results[idx] = ret
+        return ret
+
+    def order(self):
+        """
+        Flat indices of the pairs sorted from worst to best match (state, then score)
+        """
+        keys = np.empty(self.shape, dtype=[("state", bool), ("score", np.float64)])
+        keys["state"] = self.state
+        keys["score"] = self.score
+        return np.argsort(keys, axis=None)
+
+    def ranked_pairs(self):
+        """
+        Yields the (bid, cid) of every pair from best to worst match
+        """
+        num_comp = self.shape[1]
+        for flat_idx in reversed(self.order().tolist()):
+            yield divmod(flat_idx, num_comp)
+
+    def gt_counts(self, bid, cid):
+        """
+        The pair's base_gt_count and comp_gt_count
+        """
+        return int(self.base_gt_count[bid, cid]), int(self.comp_gt_count[bid, cid])
+
+    def best_comp(self, bid):
+        """
+        Index of the base's best comp. Ties go to the first
+        """
+        return best_index(self.state[bid], self.score[bid])
+
+    def best_base(self, cid):
+        """
+        Index of the comp's best base. Ties go to the first
+        """
+        return best_index(self.state[:, cid], self.score[:, cid])
+
+
+class SparseMatchMatrix():
+    """
+    :class:`MatchMatrix` holding only the candidate pairs `add`-ed to it. Used for groups of calls
+    too large for a full matrix (see :meth:`candidate_pairs`). Pairs which weren't added are never picked.
+    Indexing with None for the base or comp (e.g. `match_matrix[bid, None]`) returns `builder(bid, None)`,
+    a MatchResult of the call alone
+    """
+    sparse = True
+
+    def __init__(self, num_base, num_comp, builder):
+        self.shape = (num_base, num_comp)
+        self.results = {}
+        self.builder = builder
+        self.base_pairs = defaultdict(list)
+        self.comp_pairs = defaultdict(list)
+
+    def add(self, bid, cid, match):
+        """
+        Place a MatchResult into the matrix
+        """
+        self.results[(bid, cid)] = match
+        self.base_pairs[bid].append(cid)
+        self.comp_pairs[cid].append(bid)
+
+    def __getitem__(self, idx):
+        if idx[0] is None or idx[1] is None:
+            return self.builder(*idx)
+        return self.results[(int(idx[0]), int(idx[1]))]
+
+    def ranked_pairs(self):
+        """
+        Yields the (bid, cid) of every pair from best to worst match
+        """
+        pairs = sorted(self.results)
+        keys = np.empty(len(pairs), dtype=[("state", bool), ("score", np.float64)])
+        keys["state"] = [self.results[_].state for _ in pairs]
+        keys["score"] = [self.results[_].score for _ in pairs]
+        for idx in reversed(np.argsort(keys).tolist()):
+            yield pairs[idx]
+
+    def gt_counts(self, bid, cid):
+        """
+        The pair's base_gt_count and comp_gt_count
+        """
+        match = self.results[(bid, cid)]
+        return match.base_gt_count, match.comp_gt_count
+
+    def best_comp(self, bid):
+        """
+        Index of the base's best comp or None if it has no pairs. Ties go to the first
+        """
+        return self.best_pair([(bid, cid) for cid in sorted(self.base_pairs[bid])], 1)
+
+    def best_base(self, cid):
+        """
+        Index of the comp's best base or None if it has no pairs. Ties go to the first
+        """
+        return self.best_pair([(bid, cid) for bid in sorted(self.comp_pairs[cid])], 0)
+
+    def best_pair(self, pairs, which):
+        """
+        Best match of the pairs. Returns pair[which] or None when there are no pairs
+        """
+        best = None
+        for pair in pairs:
+            if best is None or self.results[best] < self.results[pair]:
+                best = pair
+        return best[which] if best is not None else None
+
+
+def best_index(state, score):
+    """
+    Index of the best state/score in the arrays
+    """
+    return int(np.argmax(np.where(state == state.max(), score, -np.inf)))
+
+
+def gt_count(entry, sample=0):
+    """
+    Number of alternate alleles in a sample's GT, the same as `MatchResult.base_gt_count`
+    """
+    fmt = entry.samples[sample]
+    return sum(1 for _ in fmt["GT"] if _ == 1) if "GT" in fmt else 0
+
+
+# With short_circuit, `Bench.compare_calls` splits chunks with more calls than this by `candidate_components`
+# and compares groups with more calls than this using `candidate_pairs`
+DENSE_CHUNK_SIZE = 5000
+
+
+def refdist_windows(base_variants, comp_variants, refdist):
+    """
+    Lists of the starts and ends of the base calls' refdist windows followed by the comp calls' boundaries.
+    A base/comp pair is within refdist when their spans overlap, the same as `Matcher.build_match`'s
+    overlaps(bstart - refdist, bend + refdist, cstart, cend)
+    """
+    base = call_arrays(base_variants)
+    comp = call_arrays(comp_variants)
+    starts = np.concatenate([base["start"] - refdist, comp["start"]]).tolist()
+    ends = np.concatenate([base["end"] + refdist, comp["end"]]).tolist()
+    return starts, ends
+
+
+def candidate_pairs(base_variants, comp_variants, refdist):
+    """
+    Find every base/comp pair which is within refdist of each other with a sweep over the calls' positions.
+    Only pairs which are found can pass `Matcher.build_match`'s refdist check
+
+    Returns a list of (bid, cid) tuples
+    """
+    num_base = len(base_variants)
+    starts, ends = refdist_windows(base_variants, comp_variants, refdist)
+    ret = []
+    # Open calls of the base and comp with their ends in heaps for removing them once they're passed
+    active = ({}, {})
+    closing = ([], [])
+    for idx in sorted(range(len(starts)), key=starts.__getitem__):
+        start = starts[idx]
+        side = 0 if idx < num_base else 1
+        other = 1 - side
+        while closing[other] and closing[other][0][0] <= start:
+            del active[other][heapq.heappop(closing[other])[1]]
+        if ends[idx] <= start:
+            continue
+        # Every open call of the other side overlaps this one
+        for open_idx in active[other]:
+            ret.append((idx, open_idx - num_base) if side == 0 else (open_idx, idx - num_base))
+        active[side][idx] = True
+        heapq.heappush(closing[side], (ends[idx], idx))
+    return ret
+
+
+def candidate_components(base_variants, comp_variants, refdist):
+    """
+    Split a chunk's calls into the groups connected by base/comp pairs which are within refdist of each other.
+    Calls in different groups can't match, so each group can be compared separately.
+    Found with a sweep over the calls' positions, so only neighboring calls are checked
+
+    Returns a list of tuples of the base and comp indices in each group
+    """
+    num_base = len(base_variants)
+    starts, ends = refdist_windows(base_variants, comp_variants, refdist)
+
+    parent = list(range(len(starts)))
+
+    def find(idx):
+        while parent[idx] != idx:
+            parent[idx] = parent[parent[idx]]
+            idx = parent[idx]
+        return idx
+
+    # Heaps of (end, index) of the base and comp calls still open at the sweep's position
+    active = ([], [])
+    for idx in sorted(range(len(starts)), key=starts.__getitem__):
+        start = starts[idx]
+        end = ends[idx]
+        others = active[1] if idx < num_base else active[0]
+        while others and others[0][0] <= start:
+            heapq.heappop(others)
+        if end <= start:
+            continue
+        if others:
+            # Every open call of the other side overlaps this one and is now in its group.
+            # Only the one reaching furthest needs to stay open to connect later calls
+            for _, other in others:
+                parent[find(other)] = find(idx)
+            others[:] = [max(others)]
+        heapq.heappush(active[0] if idx < num_base else active[1], (end, idx))
+
+    groups = {}
+    for idx in range(len(starts)):
+        b_ids, c_ids = groups.setdefault(find(idx), ([], []))
+        if idx < num_base:
+            b_ids.append(idx)
+        else:
+            c_ids.append(idx - num_base)
+    return list(groups.values())
+
+
 ############################
 # Parsing and set building #
 ############################
 
 
-def file_zipper(*start_files):
+class VariantView():  # pylint: disable=too-many-instance-attributes
+    """
+    Features of a :class:`pysam.VariantRecord` computed once for matching. The comparison methods
+    (e.g. :meth:`truvari.entry_size`) use the precomputed values instead of pysam's INFO/FORMAT accessors.
+
+    Only the `sample`'s GT is held. The original entry is kept in `record`, but isn't pickled so
+    views can be sent to other processes.
+
+    Example
+        >>> import pysam
+        >>> import truvari
+        >>> v = pysam.VariantFile('repo_utils/test_files/variants/input1.vcf.gz')
+        >>> view = truvari.VariantView(next(v))
+        >>> view.size, view.svtype, view.samples[0]["GT"]
+        (14, <SV.INS: 2>, (1, 1))
+        >>> truvari.entry_size(view)
+        14
+    """
+    __slots__ = ["record", "chrom", "pos", "start", "stop", "id", "ref", "alts", "filter",
+                 "samples", "size", "svtype"]
+
+    def __init__(self, entry, sample=0):
+        self.record = entry
+        self.chrom = entry.chrom
+        self.pos = entry.pos
+        self.start = entry.start
+        self.stop = entry.stop
+        self.id = entry.id
+        self.ref = entry.ref
+        self.alts = entry.alts
+        self.filter = tuple(entry.filter)
+        fmt = entry.samples[sample] if len(entry.samples) else {}
+        self.samples = {sample: {"GT": fmt["GT"]} if "GT" in fmt else {}}
+        self.size = truvari.entry_size(entry)
+        self.svtype = truvari.entry_variant_type(entry)
+
+    def __getstate__(self):
+        return {key: getattr(self, key) for key in self.__slots__ if key != "record"}
+
+    def __setstate__(self, state):
+        self.record = None
+        for key, value in state.items():
+            setattr(self, key, value)
+
+    def __str__(self):
+        if self.record is not None:
+            return str(self.record)
+        alt = self.alts[0] if self.alts else "."
+        return f"{self.chrom}\t{self.pos}\t{self.id or '.'}\t{self.ref}\t{alt}"
+
+
+def file_zipper(*start_files, contigs=None):
     """
     Zip files to yield the entries in order.
     Each file must be sorted in the same order.
@@ -261,68 +715,130 @@ def file_zipper(*start_files):
     where key is the identifier (so we know which file the yielded entry came from)
     and iterable is usually a pysam.VariantFile
 
+    Entries are ordered by their contig's position in the VCF header (then start) and merged with a heap,
+    so each yielded entry costs O(log N) for N files. Contigs missing from the headers are ordered as
+    they're first seen. Iterables with a `header` (e.g. :class:`truvari.PreparedBase`) have its contigs
+    ordered before their first entry. Ties go to the earlier file in start_files.
+
+    Files with different headers must be zipped by one order (e.g. :meth:`truvari.region_filter` of every
+    file given the same contigs). When contigs is given, it's the order and the headers only order contigs
+    missing from it.
+
     yields key, pysam.VariantRecord
     """
-    markers = []  # list of lists: [name, file_handler, top_entry]
+    contig_order = {name: idx for idx, name in enumerate(contigs or [])}
+
+    def contig_index(entry):
+        """
+        Position of the entry's contig, learning the header's order the first time it's seen
+        """
+        idx = contig_order.get(entry.chrom)
+        if idx is None:
+            header = getattr(entry, "header", None)
+            if header is not None:
+                for ctg in header.contigs:
+                    contig_order.setdefault(ctg, len(contig_order))
+            idx = contig_order.setdefault(entry.chrom, len(contig_order))
+        return idx
+
+    heap = []  # list of tuples: (contig_index, start, file_index, top_entry)
+    handlers = []
     file_counts = Counter()
     for name, i in start_files:
+        file_idx = len(handlers)
+        for ctg in getattr(getattr(i, "header", None), "contigs", []):
+            contig_order.setdefault(ctg, len(contig_order))
+        i = iter(i)
+        handlers.append((name, i))
         try:
-            markers.append([name, i, next(i)])
+            entry = next(i)
         except StopIteration:
             # For when there are no variants in the file
-            pass
-
-    while markers:
-        # Get the first entry among each of the files' tops
-        first_idx = 0
-        for idx, mk in enumerate(markers[1:]):
-            idx += 1
-            if mk[2].chrom < markers[first_idx][2].chrom or \
-                    (mk[2].chrom == markers[first_idx][2].chrom and mk[2].start < markers[first_idx][2].start):
-                first_idx = idx
-        name, fh, entry = markers[first_idx]
+            continue
+        heap.append((contig_index(entry), entry.start, file_idx, entry))
+    heapq.heapify(heap)
+
+    while heap:
+        _, _, file_idx, entry = heap[0]
+        name, fh = handlers[file_idx]
         file_counts[name] += 1
         try:
             # update this file's top
-            markers[first_idx][2] = next(fh)
+            nxt = next(fh)
+            heapq.heapreplace(heap, (contig_index(nxt), nxt.start, file_idx, nxt))
         except StopIteration:
             # This file is done
-            markers.pop(first_idx)
+            heapq.heappop(heap)
         yield name, entry
     logging.info("Zipped %d variants %s", sum(
         file_counts.values()), file_counts)
 
 
-def chunker(matcher, *files):
+def needs_resolve(matcher, record):
     """
-    Given a Matcher and multiple files, zip them and create chunks
+    Returns True if the record is a symbolic SV whose sequence the matcher needs resolved by :meth:`resolve_sv`
+    """
+    return matcher.params.pctseq != 0 and (record.alleles_variant_types[-1] == 'BND'
+                                           or record.alts[0].startswith('<'))
+
 
-    Yields tuple of the chunk of calls, and an identifier of the chunk
+def prepare_calls(matcher, *files, views=False, contigs=None):
+    """
+    Given a Matcher and multiple files, zip them and check each call. Filtered calls, including symbolic SVs
+    which couldn't be resolved, are yielded with the key '__filtered'. Files of views (e.g. a
+    :class:`truvari.PreparedBase`) were already checked and are yielded as is. The files are zipped in the
+    order of contigs (see :meth:`file_zipper`)
+
+    Yields tuples of the call's file key and the call.
+    If views, calls are :class:`VariantView` of the matcher's bSample/cSample for 'base'/other files
     """
-    call_counts = Counter()
-    chunk_count = 0
-    cur_chrom = None
-    cur_end = 0
-    cur_chunk = defaultdict(list)
     unresolved_warned = False
-    for key, entry in file_zipper(*files):
+    for key, entry in file_zipper(*files, contigs=contigs):
+        if isinstance(entry, VariantView):
+            yield key, entry
+            continue
+        record = entry
+        sample = matcher.params.bSample if key == 'base' else matcher.params.cSample
+        if views:
+            entry = VariantView(record, sample)
         if matcher.filter_call(entry, key == 'base'):
-            cur_chunk['__filtered'].append(entry)
-            call_counts['__filtered'] += 1
+            yield '__filtered', entry
             continue
 
         # check symbolic, resolve if needed/possible
-        if matcher.params.pctseq != 0 and (entry.alleles_variant_types[-1] == 'BND' or entry.alts[0].startswith('<')):
-            was_resolved = resolve_sv(entry,
-                                      matcher.reference,
-                                      matcher.params.dup_to_ins)
+        if needs_resolve(matcher, record):
+            with truvari.perf_stage("resolve_sv"):
+                was_resolved = resolve_sv(record,
+                                          matcher.reference,
+                                          matcher.params.dup_to_ins)
             if not was_resolved:
                 if not unresolved_warned:
                     logging.warning("Some symbolic SVs couldn't be resolved")
                     unresolved_warned = True
-                cur_chunk['__filtered'].append(entry)
-                call_counts['__filtered'] += 1
+                yield '__filtered', entry
                 continue
+            if views:
+                entry = VariantView(record, sample)
+        yield key, entry
+
+
+def chunker(matcher, *files, views=False, contigs=None):
+    """
+    Given a Matcher and multiple files, zip them in the order of contigs (see :meth:`file_zipper`) and create chunks
+
+    Yields tuple of the chunk of calls, and an identifier of the chunk.
+    If views, calls are :class:`VariantView` of the matcher's bSample/cSample for 'base'/'comp' files
+    """
+    call_counts = Counter()
+    chunk_count = 0
+    cur_chrom = None
+    cur_end = 0
+    cur_chunk = defaultdict(list)
+    for key, entry in prepare_calls(matcher, *files, views=views, contigs=contigs):
+        call_counts[key] += 1
+        if key == '__filtered':
+            cur_chunk['__filtered'].append(entry)
+            continue
 
         new_chrom = cur_chrom and entry.chrom != cur_chrom
         new_chunk = cur_end and cur_end + matcher.params.chunksize < entry.start
@@ -337,7 +853,6 @@ def chunker(matcher, *files):
         cur_chrom = entry.chrom
         cur_end = max(entry.stop, cur_end)
         cur_chunk[key].append(entry)
-        call_counts[key] += 1
 
     chunk_count += 1
     logging.info("%d chunks of %d variants %s", chunk_count,
@@ -345,11 +860,71 @@ def chunker(matcher, *files):
     yield cur_chunk, chunk_count
 
 
+def prefetch(iterable, size=4):
+    """
+    Iterate `iterable` in a background thread, holding up to `size` items ready for the consumer.
+    This lets reading/decoding (e.g. a :meth:`chunker`) overlap with the work done on each item.
+    Exceptions raised by the iterable are re-raised to the consumer. A size of 0 iterates without a thread
+
+    Example
+        >>> import truvari
+        >>> list(truvari.prefetch(range(5), 2))
+        [0, 1, 2, 3, 4]
+    """
+    if size <= 0:
+        yield from iterable
+        return
+
+    ready = queue.Queue(size)
+    stop = threading.Event()
+
+    def put(item):
+        """
+        Put an item on the queue unless the consumer has stopped. Returns False when stopped
+        """
+        while not stop.is_set():
+            try:
+                ready.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def fill():
+        """
+        Reader thread
+        """
+        try:
+            for item in iterable:
+                if not put((True, item)):
+                    return
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            put((False, e))
+            return
+        put((False, None))
+
+    reader = threading.Thread(target=fill, daemon=True)
+    reader.start()
+    try:
+        while True:
+            is_item, item = ready.get()
+            if is_item:
+                yield item
+            elif item is None:
+                break
+            else:
+                raise item
+    finally:
+        stop.set()
+        reader.join()
+
+
 RC = str.maketrans("ATCG", "TAGC")
+RC_BYTES = bytes.maketrans(b"ATCG", b"TAGC")
 
 def resolve_sv(entry, ref, dup_to_ins=False):
     """
-    Attempts to resolve an SV's REF/ALT sequences
+    Attempts to resolve an SV's REF/ALT sequences from a :class:`truvari.ReferenceCache` (or :class:`pysam.FastaFile`)
     """
     if ref is None or entry.alts[0] in ['<CNV>', '<INS>'] or entry.start > ref.get_reference_length(entry.chrom):
         return False
@@ -358,18 +933,24 @@ def resolve_sv(entry, ref, dup_to_ins=False):
             and truvari.entry_variant_type(entry) == truvari.SV.DEL:
         entry.alts = ['<DEL>']
 
-    seq = ref.fetch(entry.chrom, entry.start, entry.stop)
-    if entry.alts[0] == '<DEL>':
+    alt = entry.alts[0]
+    if alt not in ['<DEL>', '<INV>'] and not (alt == '<DUP>' and dup_to_ins):
+        return False
+
+    if isinstance(ref, truvari.ReferenceCache):
+        raw = ref.fetch_bytes(entry.chrom, entry.start, entry.stop)
+    else:
+        raw = ref.fetch(entry.chrom, entry.start, entry.stop).encode()
+    seq = raw.decode()
+    if alt == '<DEL>':
         entry.ref = seq
         entry.alts = [seq[0]]
-    elif entry.alts[0] == '<INV>':
+    elif alt == '<INV>':
         entry.ref = seq
-        entry.alts = [seq.translate(RC)[::-1]]
-    elif entry.alts[0] == '<DUP>' and dup_to_ins:
+        entry.alts = [raw.translate(RC_BYTES)[::-1].decode()]
+    else:
         entry.ref = seq[0]
         entry.alts = [seq]
         entry.stop = entry.start + 1
-    else:
-        return False
 
     return True
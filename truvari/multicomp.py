@@ -0,0 +1,221 @@
+"""
+Bench one base VCF against many comparison VCFs
+"""
+import os
+import copy
+import json
+import logging
+from collections import Counter, defaultdict, deque
+
+import pysam
+
+import truvari
+
+
+def comp_names(comp_vcfs):
+    """
+    Name of each comparison VCF's output subdirectory
+
+    :param `comp_vcfs`: comparison VCF filenames
+    :type `comp_vcfs`: list
+
+    :return: the basenames without the .vcf.gz extension
+    :rtype: list
+
+    Example
+        >>> import truvari
+        >>> truvari.comp_names(["calls/callerA.vcf.gz", "other/callerB.vcf.gz"])
+        ['callerA', 'callerB']
+    """
+    ret = []
+    for fn in comp_vcfs:
+        name = os.path.basename(fn)
+        for ext in [".gz", ".vcf"]:
+            if name.endswith(ext):
+                name = name[:-len(ext)]
+        ret.append(name)
+    return ret
+
+
+def route_chunks(matcher, calls, num, call_counts):
+    """
+    Given a Matcher and calls routed to any of `num` benches, create every bench's chunks as :meth:`truvari.chunker`
+    would from only the calls routed to it. calls yields tuples of the routed benches' indexes, the chunk key
+    ('base' or 'comp'), and the call. call_counts is the Counter of calls filled by calls for logging.
+
+    Yields tuples of the bench's index and its next (chunk, identifier) tuple
+    """
+    chunk_counts = [0] * num
+    cur_chroms = [None] * num
+    cur_ends = [0] * num
+    cur_chunks = [defaultdict(list) for _ in range(num)]
+    for targets, chunk_key, entry in calls:
+        for idx in targets:
+            new_chrom = cur_chroms[idx] and entry.chrom != cur_chroms[idx]
+            new_chunk = cur_ends[idx] and cur_ends[idx] + matcher.params.chunksize < entry.start
+            if new_chunk or new_chrom:
+                chunk_counts[idx] += 1
+                yield idx, (cur_chunks[idx], chunk_counts[idx])
+                cur_chroms[idx] = None
+                cur_ends[idx] = 0
+                cur_chunks[idx] = defaultdict(list)
+
+            cur_chroms[idx] = entry.chrom
+            cur_ends[idx] = max(entry.stop, cur_ends[idx])
+            cur_chunks[idx][chunk_key].append(entry)
+
+    for idx, chunk in enumerate(cur_chunks):
+        chunk_counts[idx] += 1
+        yield idx, (chunk, chunk_counts[idx])
+    logging.info("%d chunks of %d variants %s", sum(chunk_counts),
+                 sum(call_counts.values()), call_counts)
+
+
+def multi_chunker(matcher, base, comps, views=False, contigs=None):
+    """
+    Given a Matcher, a base file, and a list of comparison files, zip them and create every comparison file's
+    chunks. Base calls are only parsed, filtered, and resolved once and are shared by every comparison's chunks.
+
+    Yields tuples of the comparison file's index and its next (chunk, identifier) tuple as made by
+    :meth:`truvari.chunker` of the base and that comparison file alone.
+    """
+    files = [('base', base)] + [(f"comp{idx}", comp) for idx, comp in enumerate(comps)]
+    call_counts = Counter()
+
+    def routed():
+        for key, entry in truvari.prepare_calls(matcher, *files, views=views, contigs=contigs):
+            call_counts[key] += 1
+            # Bench doesn't write filtered calls, so they aren't kept in the chunks
+            if key == 'base':
+                yield range(len(comps)), 'base', entry
+            elif key != '__filtered':
+                yield [int(key[len("comp"):])], 'comp', entry
+
+    yield from route_chunks(matcher, routed(), len(comps), call_counts)
+
+
+class MultiCompBench():
+    """
+    Runs a :class:`truvari.Bench` of one base VCF against each of many comparison VCFs in a single pass.
+
+    The base VCF is read, filtered, and has its symbolic SVs resolved once. Every comparison VCF gets its own
+    chunks holding the shared base calls, so each comparison's results are identical to a separate bench.
+
+    .. code-block:: python
+
+        m_bench = truvari.Bench(matcher, base_vcf, outdir=outdir)
+        multi = truvari.MultiCompBench(m_bench, ["callerA.vcf.gz", "callerB.vcf.gz"])
+        for comp_vcf, output in multi.run():
+            print(comp_vcf, output.stats_box["f1"])
+
+    Each comparison's outputs are written in a subdirectory of the bench's outdir named by
+    :meth:`truvari.comp_names` and `multi.txt` holds a table of every comparison's stats.
+    """
+    TABLE = ("multi.txt", "comp")
+
+    def __init__(self, bench, comp_vcfs):
+        """
+        The bench holds the base, outdir, and Matcher. Its comp_vcf is ignored
+        """
+        self.bench = bench
+        self.comp_vcfs = comp_vcfs
+        self.names = comp_names(comp_vcfs)
+        self.keys = comp_vcfs
+        if len(set(self.names)) != len(self.names):
+            raise ValueError(f"Comparison VCFs need unique names {self.names}")
+
+    def comp_bench(self, idx):
+        """
+        Make the Bench of a comparison VCF
+        """
+        ret = copy.copy(self.bench)
+        ret.comp_vcf = self.comp_vcfs[idx]
+        ret.outdir = os.path.join(self.bench.outdir, self.names[idx])
+        ret.do_logging = False
+        ret.refine_candidates = []
+        return ret
+
+    def describe(self, param_dict):
+        """
+        Add the comparisons to the run's param_dict and return its description
+        """
+        param_dict["comp"] = self.comp_vcfs
+        return f"Benching {len(self.comp_vcfs)} comparison VCFs"
+
+    def make_chunks(self, records=True):
+        """
+        Returns the includebed's region tree and the chunks of every comparison VCF.
+        Prepared bases only read their records when `records`
+        """
+        base = self.bench.open_base(records)
+        comps = [pysam.VariantFile(_) for _ in self.comp_vcfs]
+        region_tree, regions_extended = self.bench.make_regions(base)
+        for comp_vcf, comp in zip(self.comp_vcfs, comps):
+            excluding = set(comp.header.contigs.keys()) - set(base.header.contigs.keys())
+            if excluding:
+                logging.warning("Excluding %d contigs present in %s header but not baseline calls.",
+                                len(excluding), comp_vcf)
+
+        contigs = truvari.header_sorted_contigs(base, regions_extended.keys())
+        base_i = self.bench.base_calls(base, region_tree, contigs)
+        comps_i = [truvari.region_filter(_, regions_extended, bench_overlaps=self.bench.bench_overlaps,
+                                         contigs=contigs)
+                   for _ in comps]
+        chunks = truvari.prefetch(truvari.perf_iter("read", multi_chunker(self.bench.matcher, base_i, comps_i,
+                                                                          views=True, contigs=contigs)),
+                                  self.bench.prefetch)
+        return region_tree, chunks
+
+    def run(self, write_vcfs=True):
+        """
+        Bench every comparison VCF. Returns a list of each comparison VCF and its :class:`truvari.BenchOutput`
+        """
+        os.mkdir(self.bench.outdir)
+        if self.bench.do_logging:
+            truvari.setup_logging(self.bench.debug, truvari.LogFileStderr(
+                os.path.join(self.bench.outdir, "log.txt")), show_version=True)
+        param_dict = self.bench.param_dict()
+        param_dict.update(vars(self.bench.matcher.params))
+        logging.info("%s:\n%s", self.describe(param_dict), json.dumps(param_dict, indent=4))
+        with open(os.path.join(self.bench.outdir, 'params.json'), 'w') as fout:
+            json.dump(param_dict, fout)
+
+        benches = [self.comp_bench(idx) for idx in range(len(self.keys))]
+        outputs = [truvari.BenchOutput(_, _.matcher, write_vcfs) for _ in benches]
+        region_tree, chunks = self.make_chunks(write_vcfs)
+
+        # compare_chunks keeps the order of the chunks, so the comp of each result is remembered as it's sent
+        order = deque()
+
+        def tagged():
+            for idx, chunk in chunks:
+                order.append(idx)
+                yield chunk
+
+        for result in self.bench.compare_chunks(tagged()):
+            idx = order.popleft()
+            benches[idx].refine_candidates.extend(self.bench.refine_candidates)
+            self.bench.refine_candidates.clear()
+            benches[idx].write_result(outputs[idx], result, region_tree)
+
+        for m_bench, output in zip(benches, outputs):
+            with open(os.path.join(m_bench.outdir, 'candidate.refine.bed'), 'w') as fout:
+                fout.write("\n".join(m_bench.refine_candidates))
+            output.close_outputs()
+        if self.bench.matcher.seqsim_cache is not None:
+            self.bench.matcher.seqsim_cache.log_stats()
+            self.bench.matcher.seqsim_cache.close()
+
+        self.write_table(outputs)
+        return list(zip(self.keys, outputs))
+
+    def write_table(self, outputs):
+        """
+        Write every comparison's stats to the `TABLE`
+        """
+        fn, key = self.TABLE
+        with open(os.path.join(self.bench.outdir, fn), 'w') as fout:
+            fout.write("\t".join([key] + truvari.SWEEP_STATS) + '\n')
+            for name, output in zip(self.names, outputs):
+                row = [name] + [output.stats_box[_] for _ in truvari.SWEEP_STATS]
+                fout.write("\t".join(str(_) for _ in row) + '\n')
@@ -0,0 +1,263 @@
+"""
+Stage timing and peak memory instrumentation
+"""
+import sys
+import json
+import time
+import bisect
+import cProfile
+import resource
+import threading
+import contextlib
+from collections import Counter, defaultdict
+
+# Upper bounds of the chunk latency histogram's bins in seconds
+LATENCY_BINS = [0.001, 0.01, 0.1, 1, 10, 100]
+
+# ru_maxrss is in bytes on macOS and kilobytes elsewhere
+RSS_PER_MB = 1024 * 1024 if sys.platform == "darwin" else 1024
+
+_ACTIVE = None
+_OFF = contextlib.nullcontext()
+
+
+def peak_rss_mb(who=resource.RUSAGE_SELF):
+    """
+    Peak resident set size in megabytes of this process or, with RUSAGE_CHILDREN, its largest waited for child
+    """
+    return resource.getrusage(who).ru_maxrss / RSS_PER_MB
+
+
+class PerfStats():
+    """
+    Accumulates the wall time, calls, and peak RSS of named stages and histograms of chunk sizes and latencies.
+    Stages can be nested and timed from multiple threads (e.g. reading chunks inside :meth:`truvari.prefetch`),
+    so their times can overlap. Stats of worker processes are sent back by :meth:`pop` and added with :meth:`merge`.
+
+    Example
+        >>> import truvari
+        >>> perf = truvari.PerfStats()
+        >>> with perf.stage("work"):
+        ...     pass
+        >>> perf.add_chunk(12, 0.002)
+        >>> stats = perf.to_dict()
+        >>> stats["stages"]["work"]["calls"], stats["chunks"]["sizes"], stats["chunks"]["seconds"]
+        (1, {'<=16': 1}, {'<=0.01': 1})
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages = defaultdict(lambda: {"calls": 0, "seconds": 0.0, "peak_rss_mb": 0})
+        self.chunk_sizes = Counter()
+        self.chunk_seconds = Counter()
+        self.lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """
+        Time the block as a call of the stage
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name, seconds, calls=1):
+        """
+        Add calls taking seconds to a stage, sampling the peak RSS
+        """
+        rss = peak_rss_mb()
+        with self.lock:
+            stage = self.stages[name]
+            stage["calls"] += calls
+            stage["seconds"] += seconds
+            stage["peak_rss_mb"] = max(stage["peak_rss_mb"], rss)
+
+    def add_chunk(self, size, seconds):
+        """
+        Count a chunk of size calls which took seconds in the histograms.
+        Sizes are binned by powers of two and seconds by `LATENCY_BINS`
+        """
+        with self.lock:
+            self.chunk_sizes[1 << max(size - 1, 0).bit_length()] += 1
+            self.chunk_seconds[bisect.bisect_left(LATENCY_BINS, seconds)] += 1
+
+    def pop(self):
+        """
+        Returns the stages and chunk histograms counted since the last pop and resets them
+
+        Example
+            >>> import truvari
+            >>> worker = truvari.PerfStats()
+            >>> worker.add("work", 0.5)
+            >>> worker.add_chunk(3, 0.5)
+            >>> perf = truvari.PerfStats()
+            >>> perf.add("work", 0.25)
+            >>> perf.merge(worker.pop())
+            >>> perf.stages["work"]["calls"], perf.stages["work"]["seconds"], dict(perf.chunk_sizes)
+            (2, 0.75, {4: 1})
+            >>> worker.pop()["stages"]
+            {}
+        """
+        with self.lock:
+            ret = {"stages": {name: dict(stage) for name, stage in self.stages.items()},
+                   "chunk_sizes": self.chunk_sizes,
+                   "chunk_seconds": self.chunk_seconds}
+            self.stages.clear()
+            self.chunk_sizes = Counter()
+            self.chunk_seconds = Counter()
+        return ret
+
+    def merge(self, stats):
+        """
+        Add the stats returned by another PerfStats' :meth:`pop` (e.g. a worker process's).
+        Stages' peak RSS is the largest of the processes which ran them
+        """
+        with self.lock:
+            for name, other in stats["stages"].items():
+                stage = self.stages[name]
+                stage["calls"] += other["calls"]
+                stage["seconds"] += other["seconds"]
+                stage["peak_rss_mb"] = max(stage["peak_rss_mb"], other["peak_rss_mb"])
+            self.chunk_sizes.update(stats["chunk_sizes"])
+            self.chunk_seconds.update(stats["chunk_seconds"])
+
+    def to_dict(self):
+        """
+        Returns the stats as a dict
+        """
+        with self.lock:
+            stages = {name: dict(stage) for name, stage in sorted(self.stages.items())}
+            sizes = {f"<={size}": cnt for size, cnt in sorted(self.chunk_sizes.items())}
+            seconds = {(f"<={LATENCY_BINS[idx]}" if idx < len(LATENCY_BINS) else f">{LATENCY_BINS[-1]}"): cnt
+                       for idx, cnt in sorted(self.chunk_seconds.items())}
+        return {"wall_seconds": time.perf_counter() - self.start,
+                "peak_rss_mb": peak_rss_mb(),
+                "children_peak_rss_mb": peak_rss_mb(resource.RUSAGE_CHILDREN),
+                "stages": stages,
+                "chunks": {"count": sum(self.chunk_sizes.values()), "sizes": sizes, "seconds": seconds}}
+
+    def write_json(self, out_name):
+        """
+        Write stats as json to file
+        """
+        with open(out_name, 'w') as fout:
+            json.dump(self.to_dict(), fout, indent=4)
+
+
+def perf_active():
+    """
+    Returns whether instrumentation is on
+    """
+    return _ACTIVE is not None
+
+
+def perf_worker(active):
+    """
+    Set up instrumentation inside a worker process. When active (the parent's :meth:`perf_active`), the worker's
+    stages are counted in a new :class:`PerfStats` for :meth:`perf_pop` to send back. Otherwise it's turned off
+    """
+    global _ACTIVE  # pylint: disable=global-statement
+    _ACTIVE = PerfStats() if active else None
+
+
+def perf_pop():
+    """
+    Returns the active :class:`PerfStats`' :meth:`PerfStats.pop` or None when instrumentation is off
+    """
+    return _ACTIVE.pop() if _ACTIVE is not None else None
+
+
+def perf_merge(stats):
+    """
+    Add a worker's :meth:`perf_pop` to the active :class:`PerfStats`. Does nothing when either is off
+    """
+    if _ACTIVE is not None and stats is not None:
+        _ACTIVE.merge(stats)
+
+
+def perf_stage(name):
+    """
+    Context manager timing a stage of the active :class:`PerfStats`. Does nothing when instrumentation is off
+    """
+    return _ACTIVE.stage(name) if _ACTIVE is not None else _OFF
+
+
+def perf_chunk(name, size):
+    """
+    Context manager timing a chunk of size calls as a stage and in the active :class:`PerfStats`' histograms.
+    Does nothing when instrumentation is off
+    """
+    return _timed_chunk(_ACTIVE, name, size) if _ACTIVE is not None else _OFF
+
+
+@contextlib.contextmanager
+def _timed_chunk(perf, name, size):
+    """
+    Time the block as a chunk of the perf
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        perf.add(name, seconds)
+        perf.add_chunk(size, seconds)
+
+
+def perf_iter(name, iterable):
+    """
+    Time making each item of the iterable as a stage of the active :class:`PerfStats`.
+    Returns the iterable when instrumentation is off
+    """
+    if _ACTIVE is None:
+        return iterable
+    return _timed_iter(_ACTIVE, name, iterable)
+
+
+def _timed_iter(perf, name, iterable):
+    """
+    Yield the iterable's items, timing each as a stage of the perf
+    """
+    iterator = iter(iterable)
+    while True:
+        start = time.perf_counter()
+        item = next(iterator, _OFF)
+        perf.add(name, time.perf_counter() - start)
+        if item is _OFF:
+            return
+        yield item
+
+
+@contextlib.contextmanager
+def perf_run(out_json=None, profile=None):
+    """
+    Turn on instrumentation while running the block and write the :class:`PerfStats` to out_json when it finishes.
+    With a profile filename, the block's main thread is also run under cProfile and its pstats are dumped there.
+    Without either, instrumentation stays off
+
+    .. code-block:: python
+
+        with truvari.perf_run("perf.json", "profile.pstats"):
+            m_bench.run()
+    """
+    global _ACTIVE  # pylint: disable=global-statement
+    if out_json is None and profile is None:
+        yield None
+        return
+    _ACTIVE = perf = PerfStats()
+    prof = cProfile.Profile() if profile is not None else None
+    try:
+        if prof is not None:
+            prof.enable()
+        yield perf
+        if prof is not None:
+            prof.disable()
+            prof.dump_stats(profile)
+        if out_json is not None:
+            perf.write_json(out_json)
+    finally:
+        if prof is not None:
+            prof.disable()
+        _ACTIVE = None
@@ -15,7 +15,6 @@ from collections import defaultdict
 import pysam
 import pyabpoa
 from pysam import samtools
-from intervaltree import IntervalTree
 from pywfa.align import WavefrontAligner
 import truvari
 
@@ -66,9 +65,9 @@ def merged_region_file(regions, buff=100):
     n_reg = 0
     with open(out_file_name, 'w') as fout:
         for chrom in sorted(m_dict.keys()):
-            intvs = IntervalTree.from_tuples(m_dict[chrom])
+            intvs = truvari.IntervalIndex.from_tuples(m_dict[chrom])
             intvs.merge_overlaps()
-            for i in sorted(intvs):
+            for i in intvs:
                 fout.write(f"{chrom}:{i.begin}-{i.end}\n")
                 n_reg += 1
     if n_reg == 0:
@@ -129,7 +128,7 @@ def make_consensus(data, ref_fn, passonly=True, max_size=50000):
     o_samp = 'p:' + sample if prefix else sample
     ret = {}
 
-    tree = defaultdict(IntervalTree)
+    tree = defaultdict(truvari.IntervalIndex)
     for ref in list(reference.references):
         chrom, start, end = re.split(':|-', ref)
         start = int(start)
@@ -0,0 +1,141 @@
+"""
+Match pickers turn a chunk's :class:`truvari.MatchMatrix` into the MatchResults that are reported
+"""
+import copy
+import itertools
+from collections import Counter
+
+
+def pick_multi_matches(match_matrix):
+    """
+    Given a :class:`MatchMatrix` or :class:`SparseMatchMatrix`
+    Pick each base/comp call's best match
+    """
+    ret = []
+    for bid in range(match_matrix.shape[0]):
+        b_max = copy.copy(match_matrix[bid, match_matrix.best_comp(bid)])
+        b_max.comp = None
+        ret.append(b_max)
+
+    for cid in range(match_matrix.shape[1]):
+        c_max = copy.copy(match_matrix[match_matrix.best_base(cid), cid])
+        c_max.base = None
+        ret.append(c_max)
+    return ret
+
+
+def pick_ac_matches(match_matrix):
+    """
+    Given a :class:`MatchMatrix` or :class:`SparseMatchMatrix`
+    Find upto allele count mumber of matches
+    """
+    ret = []
+    base_cnt, comp_cnt = match_matrix.shape
+    used_comp = Counter()
+    used_base = Counter()
+    for b_key, c_key in match_matrix.ranked_pairs():
+        # No more matches to find
+        if base_cnt == 0 and comp_cnt == 0:
+            break
+        base_gt_count, comp_gt_count = match_matrix.gt_counts(b_key, c_key)
+        # This is a trick
+        base_is_used = used_base[b_key] >= base_gt_count
+        comp_is_used = used_comp[c_key] >= comp_gt_count
+        # Only write the comp (FP)
+        if base_cnt == 0 and not comp_is_used:
+            to_process = copy.copy(match_matrix[b_key, c_key])
+            to_process.base = None
+            to_process.multi = to_process.state
+            to_process.state = False
+            comp_cnt -= 1
+            if used_comp[c_key] == 0:  # Only write as F if it hasn't been a T
+                ret.append(to_process)
+            used_comp[c_key] = 9
+        # Only write the base (FN)
+        elif comp_cnt == 0 and not base_is_used:
+            to_process = copy.copy(match_matrix[b_key, c_key])
+            to_process.comp = None
+            to_process.multi = to_process.state
+            to_process.state = False
+            base_cnt -= 1
+            if used_base[b_key] == 0:  # Only write as F if it hasn't been a T
+                ret.append(to_process)
+            used_base[b_key] = 9
+        # Write both (any state)
+        elif not base_is_used and not comp_is_used:
+            to_process = copy.copy(match_matrix[b_key, c_key])
+            # Don't write twice
+            if used_base[b_key] != 0:
+                to_process.base = None
+            if used_comp[c_key] != 0:
+                to_process.comp = None
+
+            used_base[b_key] += comp_gt_count
+            used_comp[c_key] += base_gt_count
+            # All used up
+            if used_base[b_key] >= base_gt_count:
+                base_cnt -= 1
+            if used_comp[c_key] >= comp_gt_count:
+                comp_cnt -= 1
+
+            # Safety edge case check
+            if to_process.base is not None or to_process.comp is not None:
+                ret.append(to_process)
+
+    if match_matrix.sparse:
+        # Calls without any written pair are written alone
+        written = {id(_.base) for _ in ret} | {id(_.comp) for _ in ret}
+        for lone in itertools.chain((match_matrix[bid, None] for bid in range(match_matrix.shape[0])),
+                                    (match_matrix[None, cid] for cid in range(match_matrix.shape[1]))):
+            if id(lone.base if lone.base is not None else lone.comp) not in written:
+                ret.append(lone)
+    return ret
+
+
+def pick_single_matches(match_matrix):
+    """
+    Given a :class:`MatchMatrix` or :class:`SparseMatchMatrix`, find the single best match for calls
+    Once all best pairs yielded, the unpaired calls are set to FP/FN and yielded
+    """
+    num_base, num_comp = match_matrix.shape
+    base_free = [True] * num_base
+    comp_free = [True] * num_comp
+    ret = []
+
+    used_pairs = []
+    # Every pair is available until either call is used, so stop once one side is used up
+    max_pairs = min(num_base, num_comp)
+    for idx in match_matrix.ranked_pairs():
+        if len(used_pairs) == max_pairs:
+            break
+        if base_free[idx[0]] and comp_free[idx[1]]:
+            base_free[idx[0]] = False
+            comp_free[idx[1]] = False
+            used_pairs.append(idx)
+            ret.append(match_matrix[idx])
+
+    used_base, used_comp = zip(*used_pairs) if used_pairs else ([], [])
+    # FNs
+    for base_col in set(range(num_base)) - set(used_base):
+        comp_col = match_matrix.best_comp(base_col)
+        to_process = copy.copy(match_matrix[base_col, comp_col])
+        to_process.comp = None  # The comp will be written elsewhere
+        to_process.multi = to_process.state
+        to_process.state = False
+        ret.append(to_process)
+
+    # FPs
+    for comp_col in set(range(num_comp)) - set(used_comp):
+        base_col = match_matrix.best_base(comp_col)
+        to_process = copy.copy(match_matrix[base_col, comp_col])
+        to_process.base = None  # The base will be written elsewhere
+        to_process.multi = to_process.state
+        to_process.state = False
+        ret.append(to_process)
+    return ret
+
+
+PICKERS = {"single": pick_single_matches,
+           "ac": pick_ac_matches,
+           "multi": pick_multi_matches
+           }
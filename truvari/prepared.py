@@ -0,0 +1,286 @@
+"""
+Base calls filtered and resolved once, saved for reuse by later benches
+"""
+import os
+import json
+import logging
+
+import pysam
+import numpy as np
+
+import truvari
+
+PREPARED_VERSION = 1
+
+
+def prepared_params(params, includebed=None, bench_overlaps=False):
+    """
+    The parameters which change the calls kept by :meth:`prepare_base`
+
+    :param `params`: A :class:`truvari.Matcher`'s params
+    :type `params`: :class:`types.SimpleNamespace`
+    :param `includebed`: Bench's includebed
+    :type `includebed`: string, optional
+    :param `bench_overlaps`: Bench's bench_overlaps
+    :type `bench_overlaps`: bool, optional
+
+    :return: parameters which must be the same for a bench to use a prepared base
+    :rtype: dict
+
+    Example
+        >>> import truvari
+        >>> params = truvari.Matcher.make_match_params()
+        >>> truvari.prepared_params(params)["sizemin"]
+        50
+    """
+    resolve = params.pctseq != 0
+    return {"sizemin": params.sizemin,
+            "sizemax": params.sizemax,
+            "passonly": params.passonly,
+            "present": params.no_ref in ["a", "b"] or params.pick == "ac",
+            "bSample": params.bSample,
+            "resolve": resolve,
+            "reference": params.reference if resolve else None,
+            "dup_to_ins": params.dup_to_ins if resolve else False,
+            "includebed": includebed,
+            "bench_overlaps": bench_overlaps}
+
+
+def sample_name(header, sample):
+    """
+    Name of a sample given by its name or index in the header
+    """
+    return header.samples[sample] if isinstance(sample, int) else sample
+
+
+def is_prepared(path):
+    """
+    Returns True if path is a base prepared by :meth:`prepare_base`
+    """
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, "prepared.json"))
+
+
+def pack_strings(strings):
+    """
+    Pack strings into a uint8 array of their bytes and an array of each string's offsets
+
+    Example
+        >>> import truvari
+        >>> data, offsets = truvari.pack_strings(["AC", "", "GTT"])
+        >>> offsets.tolist()
+        [0, 2, 2, 5]
+        >>> truvari.unpack_strings(data, offsets, 1, 3)
+        ['', 'GTT']
+    """
+    encoded = [_.encode() for _ in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(_) for _ in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def unpack_strings(data, offsets, begin, end):
+    """
+    Unpack the strings begin:end from :meth:`pack_strings` arrays
+    """
+    block = data[offsets[begin]:offsets[end]].tobytes()
+    bounds = (offsets[begin:end + 1] - offsets[begin]).tolist()
+    return [block[bounds[i]:bounds[i + 1]].decode() for i in range(end - begin)]
+
+
+def pack_gts(gts):
+    """
+    Pack genotypes into an array padded to the max ploidy with -2. Missing alleles are -1.
+    Calls without a GT are all -2
+
+    Example
+        >>> import truvari
+        >>> truvari.pack_gts([(0, 1), (None, None), None, (1,)]).tolist()
+        [[0, 1], [-1, -1], [-2, -2], [1, -2]]
+    """
+    ploidy = max((len(_) for _ in gts if _), default=1)
+    ret = np.full((len(gts), ploidy), -2, dtype=np.int16)
+    for idx, gt in enumerate(gts):
+        if gt:
+            ret[idx, :len(gt)] = [-1 if _ is None else _ for _ in gt]
+    return ret
+
+
+def prepare_base(bench, out_dir):
+    """
+    Filter the bench's base calls, resolve their symbolic SVs, and save the :class:`truvari.VariantView`
+    features needed for matching as columns of numpy arrays in out_dir. The kept records are also saved
+    to `calls.vcf.gz` for writing bench's output vcfs. Returns the number of calls saved.
+
+    The prepared base can be given to a :class:`truvari.Bench` as its base_vcf in place of the VCF as long as
+    the bench's :meth:`prepared_params` are unchanged.
+    """
+    params = bench.matcher.params
+    base = pysam.VariantFile(bench.base_vcf)
+    region_tree, _ = bench.make_regions(base)
+    base_i = truvari.region_filter(base, region_tree, bench_overlaps=bench.bench_overlaps)
+
+    os.mkdir(out_dir)
+    records = pysam.VariantFile(os.path.join(out_dir, "calls.vcf.gz"), 'wz', header=base.header)
+    contigs = {}
+    cols = {"chrom": [], "start": [], "stop": [], "size": [], "svtype": [], "gt": []}
+    strs = {"id": [], "ref": [], "alts": [], "filter": []}
+    for key, view in truvari.prepare_calls(bench.matcher, ('base', base_i), views=True):
+        if key == '__filtered':
+            continue
+        records.write(view.record)
+        cols["chrom"].append(contigs.setdefault(view.chrom, len(contigs)))
+        cols["start"].append(view.start)
+        cols["stop"].append(view.stop)
+        cols["size"].append(view.size)
+        cols["svtype"].append(view.svtype.value)
+        cols["gt"].append(view.samples[params.bSample].get("GT"))
+        strs["id"].append(view.id or "")
+        strs["ref"].append(view.ref)
+        strs["alts"].append(",".join(view.alts))
+        strs["filter"].append(";".join(view.filter))
+
+    records.close()
+    pysam.tabix_index(os.path.join(out_dir, "calls.vcf.gz"), preset="vcf")
+    np.save(os.path.join(out_dir, "gt.npy"), pack_gts(cols["gt"]))
+    for name, dtype in [("chrom", np.int32), ("start", np.int64), ("stop", np.int64),
+                        ("size", np.int64), ("svtype", np.int8)]:
+        np.save(os.path.join(out_dir, f"{name}.npy"), np.array(cols[name], dtype=dtype))
+    for name, values in strs.items():
+        data, offsets = pack_strings(values)
+        np.save(os.path.join(out_dir, f"{name}.data.npy"), data)
+        np.save(os.path.join(out_dir, f"{name}.offsets.npy"), offsets)
+
+    meta = {"version": PREPARED_VERSION,
+            "base": bench.base_vcf,
+            "calls": len(cols["chrom"]),
+            "contigs": list(contigs),
+            "params": prepared_params(params, bench.includebed, bench.bench_overlaps)}
+    meta["params"]["bSample"] = sample_name(base.header, params.bSample)
+    with open(os.path.join(out_dir, "prepared.json"), 'w') as fout:
+        json.dump(meta, fout, indent=4)
+    logging.info("Prepared %d base calls in %s", meta["calls"], out_dir)
+    return meta["calls"]
+
+
+class PreparedBase():
+    """
+    Base calls saved by :meth:`prepare_base`. The columns are memory-mapped and iterating yields
+    :class:`truvari.VariantView`. The base VCF's header is in `header`.
+
+    When `records` is False, the views have no original record and only the columns are read.
+    :meth:`load` holds the views in memory for repeated benches (e.g. by `truvari serve`) and the
+    `region_tree`, when set, is reused by :meth:`truvari.Bench.make_regions`.
+
+    .. code-block:: python
+
+        prepared = truvari.PreparedBase("prepared_dir/")
+        for view in prepared:
+            print(view.chrom, view.start, view.size)
+    """
+
+    def __init__(self, path, records=True, batch_size=10000):
+        """
+        Load the prepared base in path. Calls are made batch_size at a time
+        """
+        self.path = path
+        self.records = records
+        self.batch_size = batch_size
+        self.views = None
+        self.region_tree = None
+        with open(os.path.join(path, "prepared.json"), 'r') as fh:
+            self.meta = json.load(fh)
+        if self.meta["version"] != PREPARED_VERSION:
+            raise ValueError(f"Prepared base {path} is version {self.meta['version']}. "
+                             f"Expected {PREPARED_VERSION}")
+        self.header = pysam.VariantFile(os.path.join(path, "calls.vcf.gz")).header
+        self.sample = self.meta["params"]["bSample"]
+        self.sample_idx = list(self.header.samples).index(self.sample)
+        self.columns = {}
+        for name in ["chrom", "start", "stop", "size", "svtype", "gt"]:
+            self.columns[name] = np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r')
+        for name in ["id", "ref", "alts", "filter"]:
+            self.columns[name] = (np.load(os.path.join(path, f"{name}.data.npy"), mmap_mode='r'),
+                                  np.load(os.path.join(path, f"{name}.offsets.npy"), mmap_mode='r'))
+
+    def __len__(self):
+        return self.meta["calls"]
+
+    def mismatched(self, params):
+        """
+        Returns the names of the :meth:`prepared_params` which differ from those used to prepare
+        """
+        params = dict(params, bSample=sample_name(self.header, params.get("bSample")))
+        return [key for key, value in self.meta["params"].items() if params.get(key) != value]
+
+    def load(self):
+        """
+        Read every call into memory so later iterations don't reread the files. Returns self
+        """
+        self.views = list(self.read_views())
+        return self
+
+    def __iter__(self):
+        if self.views is not None:
+            return iter(self.views)
+        return self.read_views()
+
+    def ordered(self, contigs):
+        """
+        Yield the views with their contigs in the order of contigs (see :meth:`truvari.file_zipper`).
+        Contigs missing from it follow in their prepared order
+        """
+        names = self.meta["contigs"]
+        rank = {name: idx for idx, name in enumerate(contigs)}
+        order = sorted(range(len(names)), key=lambda code: rank.get(names[code], len(rank)))
+        if order == list(range(len(names))):
+            yield from self
+            return
+        # Each contig's calls are consecutive and their codes increase in the prepared order
+        bounds = np.searchsorted(self.columns["chrom"], np.arange(len(names) + 1)).tolist()
+        for code in order:
+            if self.views is not None:
+                yield from self.views[bounds[code]:bounds[code + 1]]
+            else:
+                yield from self.read_views(bounds[code], bounds[code + 1], names[code])
+
+    def read_views(self, begin=0, end=None, chrom=None):
+        """
+        Yield the :class:`truvari.VariantView` of the calls from begin to end from the files. When they're
+        the calls of a single chrom, it's given so their records are fetched. Raises a ValueError when a record
+        of `calls.vcf.gz` isn't the call of its row in the columns
+        """
+        contigs = self.meta["contigs"]
+        end = len(self) if end is None else end
+        records = ()
+        if self.records:
+            records = pysam.VariantFile(os.path.join(self.path, "calls.vcf.gz"))
+            records = records.fetch(chrom) if chrom is not None else records
+        records = iter(records)
+        for start in range(begin, end, self.batch_size):
+            stop = min(start + self.batch_size, end)
+            batch = {name: self.columns[name][start:stop].tolist()
+                     for name in ["chrom", "start", "stop", "size", "svtype", "gt"]}
+            for name in ["id", "ref", "alts", "filter"]:
+                batch[name] = unpack_strings(*self.columns[name], start, stop)
+            for idx in range(stop - start):
+                view = truvari.VariantView.__new__(truvari.VariantView)
+                view.chrom = contigs[batch["chrom"][idx]]
+                view.start = batch["start"][idx]
+                view.pos = view.start + 1
+                view.stop = batch["stop"][idx]
+                view.id = batch["id"][idx] or None
+                view.ref = batch["ref"][idx]
+                view.alts = tuple(batch["alts"][idx].split(','))
+                view.filter = tuple(batch["filter"][idx].split(';')) if batch["filter"][idx] else ()
+                gt = tuple(None if _ == -1 else _ for _ in batch["gt"][idx] if _ != -2)
+                # The sample can be looked up by its name or index
+                fmt = {"GT": gt} if gt else {}
+                view.samples = {self.sample: fmt, self.sample_idx: fmt}
+                view.size = batch["size"][idx]
+                view.svtype = truvari.SV(batch["svtype"][idx])
+                view.record = next(records, None)
+                if self.records and (view.record is None or (view.record.chrom, view.record.pos, view.record.ref)
+                                     != (view.chrom, view.pos, view.ref)):
+                    raise ValueError(f"Prepared base {self.path} calls.vcf.gz doesn't match its columns at row "
+                                     f"{start + idx} ({view.chrom}:{view.pos})")
+                yield view
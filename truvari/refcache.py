@@ -0,0 +1,76 @@
+"""
+Windowed reads of a reference for resolving symbolic SVs
+"""
+import pysam
+
+# Bases read ahead of a fetch so following fetches of sorted records are sliced from memory
+REF_WINDOW = 1 << 20
+
+
+class ReferenceCache():
+    """
+    Reads a :class:`pysam.FastaFile` in windows held as bytes. A fetch outside the current window reads a new
+    window from its start to at least `window` bases ahead, so the symbolic SVs of a sorted VCF are resolved by
+    slicing a few large reads instead of making a faidx read per record. A window of None holds whole contigs and
+    0 reads exactly each fetch.
+
+    Has the `fetch` and `get_reference_length` of a :class:`pysam.FastaFile`, so it can be used in its place.
+
+    Example
+        >>> import truvari
+        >>> ref = truvari.ReferenceCache("repo_utils/test_files/references/reference.fa")
+        >>> ref.fetch("chr20", 500000, 500010)
+        'AGTGTAATAC'
+        >>> ref.fetch_bytes("chr20", 500005, 500010)
+        b'AATAC'
+        >>> ref.fetch("chr20", 999995, 1000010)
+        'GTAGC'
+        >>> ref.get_reference_length("chr20")
+        1000000
+    """
+
+    def __init__(self, reference, window=REF_WINDOW):
+        """
+        reference is a fasta filename or an open :class:`pysam.FastaFile`
+        """
+        self.fasta = pysam.FastaFile(reference) if isinstance(reference, str) else reference
+        self.window = window
+        self.lengths = {}
+        self.chrom = None
+        self.begin = 0
+        self.seq = b""
+
+    def get_reference_length(self, chrom):
+        """
+        Length of a contig. Raises KeyError if it isn't in the reference
+        """
+        if chrom not in self.lengths:
+            self.lengths[chrom] = self.fasta.get_reference_length(chrom)
+        return self.lengths[chrom]
+
+    def load(self, chrom, start, stop):
+        """
+        Read the window starting at start which holds [start, stop)
+        """
+        length = self.get_reference_length(chrom)
+        if self.window is None:
+            start, end = 0, length
+        else:
+            end = min(max(stop, start + self.window), length)
+        self.chrom = chrom
+        self.begin = start
+        self.seq = self.fasta.fetch(chrom, start, end).encode()
+
+    def fetch_bytes(self, chrom, start, stop):
+        """
+        Bases of [start, stop) as bytes
+        """
+        if chrom != self.chrom or start < self.begin or stop > self.begin + len(self.seq):
+            self.load(chrom, start, stop)
+        return self.seq[start - self.begin:stop - self.begin]
+
+    def fetch(self, chrom, start, stop):
+        """
+        Bases of [start, stop) as a string
+        """
+        return self.fetch_bytes(chrom, start, stop).decode()
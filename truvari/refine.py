@@ -14,7 +14,6 @@ from collections import defaultdict
 import pysam
 import pandas as pd
 from pysam import bcftools
-from intervaltree import IntervalTree
 
 import truvari
 from truvari.phab import check_requirements as phab_check_requirements
@@ -47,7 +46,7 @@ def intersect_beds(bed_a, bed_b):
             count += 1
             s_inc.append(a_intv[a_idx])
             a_idx += 1
-        shared[chrom] = IntervalTree(s_inc)
+        shared[chrom] = truvari.IntervalIndex(s_inc)
     return shared, count
 
 
@@ -176,7 +175,7 @@ def recount_variant_report(orig_dir, phab_dir, regions):
     Count original variants not in refined regions and
     consolidate with the refined counts.
     """
-    tree = defaultdict(IntervalTree)
+    tree = defaultdict(truvari.IntervalIndex)
     n_regions = regions[regions["refined"]].copy()
     for _, row in n_regions.iterrows():
         tree[row['chrom']].addi(row['start'], row['end'] + 1)
@@ -313,6 +312,8 @@ def parse_args(args):
                         help="Alignment method for phab (%(default)s)")
     parser.add_argument("-m", "--mafft-params", type=str, default=DEFAULT_MAFFT_PARAM,
                         help="Parameters for mafft, wrap in a single quote (%(default)s)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Run under cProfile and write its stats to refine.pstats")
     parser.add_argument("--debug", action="store_true",
                         help="Verbose logging")
     args = parser.parse_args(args)
@@ -389,18 +390,29 @@ def refine_main(cmdargs):
                           show_version=True)
     logging.info("Params:\n%s", json.dumps(vars(args), indent=4))
 
+    profile = os.path.join(args.benchdir, "refine.pstats") if args.profile else None
+    with truvari.perf_run(os.path.join(args.benchdir, "refine.perf.json"), profile):
+        run_refine(args, params)
+    logging.info("Finished refine")
+
+
+def run_refine(args, params):
+    """
+    Refine the bench directory's regions and write the reports
+    """
     # Stratify.
-    regions = initial_stratify(args.benchdir,
-                               resolve_regions(params, args),
-                               args.threads)
-
-    # Figure out which to reevaluate
-    if args.use_original_vcfs:
-        base_vcf, comp_vcf = params.base, params.comp
-        regions["refined"] = original_stratify(base_vcf, comp_vcf, regions)
-    else:
-        base_vcf, comp_vcf = consolidate_bench_vcfs(args.benchdir)
-        regions["refined"] = (regions["in_fn"] > 0) & (regions["in_fp"] > 0)
+    with truvari.perf_stage("stratify"):
+        regions = initial_stratify(args.benchdir,
+                                   resolve_regions(params, args),
+                                   args.threads)
+
+        # Figure out which to reevaluate
+        if args.use_original_vcfs:
+            base_vcf, comp_vcf = params.base, params.comp
+            regions["refined"] = original_stratify(base_vcf, comp_vcf, regions)
+        else:
+            base_vcf, comp_vcf = consolidate_bench_vcfs(args.benchdir)
+            regions["refined"] = (regions["in_fn"] > 0) & (regions["in_fp"] > 0)
     logging.info("%d regions to be refined", regions["refined"].sum())
 
     reeval_bed = truvari.make_temp_filename(suffix=".bed")
@@ -414,10 +426,12 @@ def refine_main(cmdargs):
                       .tolist())
     # Except if there aren't any regions. Then we need to do all that accounting...
     # And then skip the benchmarking
-    truvari.phab(to_eval_coords, base_vcf, args.reference, phab_vcf, buffer=0 if args.use_region_coords else PHAB_BUFFER,
-                 mafft_params=args.mafft_params, comp_vcf=comp_vcf, prefix_comp=True,
-                 threads=args.threads, method=args.align, passonly=params.passonly,
-                 max_size=params.sizemax)
+    with truvari.perf_stage("phab"):
+        truvari.phab(to_eval_coords, base_vcf, args.reference, phab_vcf,
+                     buffer=0 if args.use_region_coords else PHAB_BUFFER,
+                     mafft_params=args.mafft_params, comp_vcf=comp_vcf, prefix_comp=True,
+                     threads=args.threads, method=args.align, passonly=params.passonly,
+                     max_size=params.sizemax)
 
     # Now run bench on the phab harmonized variants
     logging.info("Running bench")
@@ -426,20 +440,20 @@ def refine_main(cmdargs):
     outdir = os.path.join(args.benchdir, "phab_bench")
     m_bench = truvari.Bench(matcher=matcher, base_vcf=phab_vcf, comp_vcf=phab_vcf, outdir=outdir,
                             includebed=reeval_bed, short_circuit=True)
-    m_bench.run()
-
-    regions = refined_stratify(outdir, to_eval_coords, regions, args.threads)
-
-    summary = (recount_variant_report(args.benchdir, outdir, regions)
-               if args.recount else make_variant_report(regions))
-    summary.clean_out()
-    summary.write_json(os.path.join(
-        args.benchdir, 'refine.variant_summary.json'))
-
-    report = make_region_report(regions)
-    regions.to_csv(os.path.join(
-        args.benchdir, 'refine.regions.txt'), sep='\t', index=False)
-    with open(os.path.join(args.benchdir, "refine.region_summary.json"), 'w') as fout:
-        fout.write(json.dumps(report, indent=4))
-
-    logging.info("Finished refine")
+    with truvari.perf_stage("bench"):
+        m_bench.run()
+
+    with truvari.perf_stage("report"):
+        regions = refined_stratify(outdir, to_eval_coords, regions, args.threads)
+
+        summary = (recount_variant_report(args.benchdir, outdir, regions)
+                   if args.recount else make_variant_report(regions))
+        summary.clean_out()
+        summary.write_json(os.path.join(
+            args.benchdir, 'refine.variant_summary.json'))
+
+        report = make_region_report(regions)
+        regions.to_csv(os.path.join(
+            args.benchdir, 'refine.regions.txt'), sep='\t', index=False)
+        with open(os.path.join(args.benchdir, "refine.region_summary.json"), 'w') as fout:
+            fout.write(json.dumps(report, indent=4))
@@ -5,15 +5,17 @@ import os
 import sys
 import copy
 import logging
-from collections import defaultdict, deque
+from collections import defaultdict
 
-from intervaltree import IntervalTree
 import truvari
+from truvari import anno_cache
+from truvari.interval_index import IntervalIndex
+from truvari.vcf_index import read_vcf_index, plan_fetches, stream_cost
 
 
 def build_region_tree(vcfA, vcfB=None, includebed=None):
     """
-    Build a dict of chrom:IntervalTree containing regions
+    Build a dict of chrom:IntervalIndex containing regions
     """
     contigA_set = set(vcfA.header.contigs.keys())
     contigB_set = set(vcfB.header.contigs.keys()) if vcfB else contigA_set
@@ -22,7 +24,7 @@ def build_region_tree(vcfA, vcfB=None, includebed=None):
         logging.info("Including %d bed regions", counter)
         return all_regions
 
-    all_regions = defaultdict(IntervalTree)
+    all_regions = defaultdict(IntervalIndex)
     excluding = contigB_set - contigA_set
     if excluding:
         logging.warning(
@@ -40,7 +42,7 @@ def build_region_tree(vcfA, vcfB=None, includebed=None):
 
 def merge_region_tree_overlaps(tree):
     """
-    Runs IntervalTree.merge_overlaps on all trees. Returns list of all chromosomes having overlapping regions
+    Runs IntervalIndex.merge_overlaps on all trees. Returns list of all chromosomes having overlapping regions
     and the pre_post totals
     """
     chr_with_overlaps = []
@@ -61,18 +63,16 @@ def extend_region_tree(tree, pad):
     Returns a copy of this tree
     """
     logging.info("Extending the regions by %d bases", pad)
-    n_tree = copy.deepcopy(tree)
-
+    n_tree = copy.copy(tree)
     for chrom in n_tree:
-        n_tree[chrom] = IntervalTree.from_tuples(
-            ((max(0, i.begin - pad), i.end + pad)) for i in n_tree[chrom])
-
+        n_tree[chrom] = as_index(n_tree[chrom]).extend(pad)
     truvari.merge_region_tree_overlaps(n_tree)
     return n_tree
 
-def build_anno_tree(filename, chrom_col=0, start_col=1, end_col=2, one_based=False, comment='#', idxfmt=None):
+def build_anno_tree(filename, chrom_col=0, start_col=1, end_col=2, one_based=False, comment='#', idxfmt=None,
+                    cache=True):
     """
-    Build an dictionary of IntervalTrees for each chromosome from tab-delimited annotation file
+    Build an dictionary of IntervalIndexes for each chromosome from tab-delimited annotation file
 
     By default, the file is assumed to be a bed-format. If custom chrom/start/end are used, the columns can be
     specified.
@@ -81,6 +81,9 @@ def build_anno_tree(filename, chrom_col=0, start_col=1, end_col=2, one_based=Fal
     make intervals with data="num 0", "num 1". By default the data will be interger line number.
     If intervals will be compared between anno_trees, set idxfmt to ""
 
+    Large files are parsed once and their intervals saved in a sidecar cache (`filename.tvidx`) which later
+    calls memory-map instead of parsing the file. See :mod:`truvari.anno_cache`
+
     :param `filename`: Path to file to parse, can be compressed
     :type `filename`: string
     :param `chrom_col`: Index of column in file with chromosome
@@ -97,58 +100,148 @@ def build_anno_tree(filename, chrom_col=0, start_col=1, end_col=2, one_based=Fal
     :type `comment`: string, optional
     :param `idxfmt`: Index of column in file with chromosome
     :type `idxfmt`: string, optional
+    :param `cache`: Load/save the intervals from/to the file's sidecar cache
+    :type `cache`: bool, optional
 
-    :return: dictionary with chromosome keys and :class:`intervaltree.IntervalTree` values
+    :return: dictionary with chromosome keys and :class:`truvari.IntervalIndex` values
     :rtype: dict
     """
+    params = {"chrom_col": chrom_col, "start_col": start_col, "end_col": end_col,
+              "one_based": one_based, "comment": comment}
+    cache = cache and anno_cache.cacheable(filename)
+    loaded = anno_cache.load_anno_cache(filename, params) if cache else None
+    if loaded is not None:
+        tree, idx = loaded
+    else:
+        tree, idx = parse_anno_tree(filename, **params)
+        if cache:
+            anno_cache.save_anno_cache(filename, params, tree, idx, anno_cache.file_md5(filename))
+
+    if idxfmt is not None:
+        for chrom, index in tree.items():
+            tree[chrom] = IntervalIndex.from_arrays(index.begins, index.ends,
+                                                    [idxfmt.format(_) for _ in index.data.tolist()])
+    return tree, idx
+
+
+def parse_anno_tree(filename, *, chrom_col=0, start_col=1, end_col=2, one_based=False, comment='#'):
+    """
+    Parse the file for :meth:`build_anno_tree` with the line numbers as data
+    """
     idx = 0
     correction = 1 if one_based else 0
-    ttree = defaultdict(list)
+    ttree = defaultdict(lambda: ([], [], []))
     for line in truvari.opt_gz_open(filename):
         if line.startswith(comment):
             continue
         data = line.strip().split('\t')
-        chrom = data[chrom_col]
-        start = int(data[start_col]) - correction
-        end = int(data[end_col])
-        if idxfmt is not None:
-            m_idx = idxfmt.format(idx)
-        else:
-            m_idx = idx
-        ttree[chrom].append((start, end + 1, m_idx))
+        starts, ends, idxs = ttree[data[chrom_col]]
+        starts.append(int(data[start_col]) - correction)
+        ends.append(int(data[end_col]) + 1)
+        idxs.append(idx)
         idx += 1
     tree = {}
-    for chrom in ttree:
-        tree[chrom] = IntervalTree.from_tuples(ttree[chrom])
+    for chrom, (starts, ends, idxs) in ttree.items():
+        tree[chrom] = IntervalIndex.from_arrays(starts, ends, idxs)
     return tree, idx
 
 
-def region_filter(vcf, tree, inside=True, with_region=False, bench_overlaps=False):
+def as_index(intervals):
     """
-    Chooses to stream or fetch entries inside/outside a VCF
-    If the VCF is over 25Mb or the number of regions is above 1k, use stream
+    Returns intervals (e.g. an :class:`intervaltree.IntervalTree`) as a :class:`truvari.IntervalIndex`
     """
-    sz = os.stat(vcf.filename)
-    if (not inside or sz.st_size > (25 *  2**20) or sum(len(_) for _ in tree.values()) > 1000) and not bench_overlaps:
-        return region_filter_stream(vcf, tree, inside, with_region)
+    if isinstance(intervals, IntervalIndex):
+        return intervals
+    return IntervalIndex.from_tuples(intervals)
 
-    return region_filter_fetch(vcf, tree, with_region, overlap=bench_overlaps)
 
-def region_filter_fetch(vcf, tree, with_region=False, overlap=False):
+def header_sorted_contigs(vcf, chroms, contigs=None):
+    """
+    Sort chroms by their order in contigs, which defaults to the vcf's header. Chroms missing from it are sorted
+    by name after the others. Iterables zipped by :meth:`truvari.file_zipper` must be in the same order, so
+    VCFs with different headers are given one order as contigs
     """
-    Given a VariantRecord iter and defaultdict(IntervalTree),
+    order = {name: idx for idx, name in enumerate(vcf.header.contigs if contigs is None else contigs)}
+    return sorted(chroms, key=lambda chrom: (order.get(chrom, len(order)), chrom))
+
+def region_filter(vcf, tree, inside=True, with_region=False, bench_overlaps=False, contigs=None):
+    """
+    Chooses to stream or fetch entries inside/outside a VCF. The tree's contigs are read in the order of
+    contigs (default the VCF's header, see :meth:`header_sorted_contigs`).
+    Only streaming can find entries outside regions and only fetching can find entries overlapping regions.
+    Otherwise, the VCF's index is used to estimate the compressed bytes each would read (see
+    :meth:`choose_fetch`) and the cheaper is used. Without an index, VCFs over 25Mb or with over 1k regions
+    are streamed
+    """
+    if bench_overlaps:
+        return region_filter_fetch(vcf, tree, with_region, overlap=True, contigs=contigs)
+    if not inside:
+        return region_filter_stream(vcf, tree, inside, with_region, contigs)
+
+    windows = choose_fetch(vcf, tree)
+    if windows is None:
+        sz = os.stat(vcf.filename)
+        if sz.st_size > (25 * 2**20) or sum(len(_) for _ in tree.values()) > 1000:
+            return region_filter_stream(vcf, tree, inside, with_region, contigs)
+        return region_filter_fetch(vcf, tree, with_region, contigs=contigs)
+    if windows is False:
+        return region_filter_stream(vcf, tree, inside, with_region, contigs)
+    return region_filter_fetch(vcf, tree, with_region, windows=windows, contigs=contigs)
+
+def choose_fetch(vcf, tree):
+    """
+    Estimate the compressed bytes fetching and streaming the tree's regions would read from the VCF's
+    tabix/CSI index. Nearby regions are coalesced into shared fetch windows (see :meth:`truvari.vcf_index.plan_fetches`).
+
+    Returns the fetch windows as a dict of chrom: positions of the regions starting each window if fetching
+    is cheaper, False if streaming is cheaper, and None if the VCF has no readable index
+    """
+    vcf_fn = os.fsdecode(vcf.filename)
+    offsets = read_vcf_index(vcf_fn, list(vcf.header.contigs))
+    if offsets is None:
+        return None
+    windows = {}
+    fetch_bytes = 0
+    stream_bytes = 0
+    n_regions = 0
+    for chrom in tree:
+        index = as_index(tree[chrom])
+        if not index:
+            continue
+        windows[chrom], cost = plan_fetches(offsets.get(chrom), index.begins, index.ends, index.max_ends)
+        fetch_bytes += cost
+        stream_bytes += stream_cost(offsets.get(chrom))
+        n_regions += len(index)
+    n_windows = sum(len(_) for _ in windows.values())
+    if fetch_bytes < stream_bytes:
+        logging.info("Fetching %d regions in %d windows of %s (~%d vs ~%d compressed bytes to stream)",
+                     n_regions, n_windows, vcf_fn, fetch_bytes, stream_bytes)
+        return windows
+    logging.info("Streaming %d regions of %s (~%d vs ~%d compressed bytes to fetch %d windows)",
+                 n_regions, vcf_fn, stream_bytes, fetch_bytes, n_windows)
+    return False
+
+def region_filter_fetch(vcf, tree, with_region=False, overlap=False, windows=None, contigs=None):
+    """
+    Given a VariantRecord iter and defaultdict(IntervalIndex),
     yield variants which are inside/outside the tree regions
     The region associated with the entry can be retuned also when using with_region.
     with_region returns (entry, (chrom, Interval))
     Can only check for variants within a region
+    By default each region is fetched separately. windows from :meth:`choose_fetch` fetch consecutive
+    non-overlapping regions together. Contigs are read in the order of contigs (default the VCF's header)
     """
     seen = set()
 
     ret_type = (lambda x, y, z: (x, (y, z))) if with_region else (lambda x, y, z: x)
-    for chrom in sorted(tree.keys()):
-        for intv in sorted(tree[chrom]):
+    for chrom in header_sorted_contigs(vcf, tree.keys(), contigs):
+        index = as_index(tree[chrom])
+        firsts = windows[chrom].tolist() if windows is not None and chrom in windows else range(len(index))
+        lasts = list(firsts[1:]) + [len(index)]
+        for first, last in zip(firsts, lasts):
+            intvs = [index.interval(_) for _ in range(first, last)]
             try:
-                for entry in vcf.fetch(chrom, intv.begin, intv.end):
+                for entry, intv in fetch_window(vcf, chrom, intvs):
                     if not overlap:
                         if truvari.entry_within(entry, intv.begin, intv.end - 1):
                             yield ret_type(entry, chrom, intv)
@@ -163,72 +256,104 @@ def region_filter_fetch(vcf, tree, with_region=False, overlap=False):
                 logging.warning("Unable to fetch %s from %s",
                                 chrom, vcf.filename)
 
+def fetch_window(vcf, chrom, intvs):
+    """
+    Fetch the span of sorted, non-overlapping intervals and yield each entry with every interval it would be
+    fetched by on its own
+    """
+    if len(intvs) == 1:
+        for entry in vcf.fetch(chrom, intvs[0].begin, intvs[0].end):
+            yield entry, intvs[0]
+        return
+    cur_idx = 0
+    for entry in vcf.fetch(chrom, intvs[0].begin, intvs[-1].end):
+        # entries come sorted by start, so intervals ending before one can't hold later ones
+        while cur_idx < len(intvs) and intvs[cur_idx].end <= entry.start:
+            cur_idx += 1
+        # like htslib, records are at least one base long
+        stop = max(entry.stop, entry.start + 1)
+        for intv in intvs[cur_idx:]:
+            if intv.begin >= stop:
+                break
+            yield entry, intv
+
 
-def region_filter_stream(vcf, tree, inside=True, with_region=False):
+def region_filter_stream(vcf, tree, inside=True, with_region=False, contigs=None):
     """
-    Given a VariantRecord iter and defaultdict(IntervalTree),
+    Given a VariantRecord iter and defaultdict(IntervalIndex),
     yield variants which are inside/outside the tree regions
     The region associated with the entry can be retuned also when using with_region.
     with_region returns (entry, (chrom, Interval))
+    Contigs are read in the order of contigs (default the VCF's header)
     """
-    chroms = sorted(tree.keys())
-    ret_type = (lambda x, y, z: (x, (y, z))) if with_region else (lambda x, y, z: x)
-    for chrom in chroms:
-        cur_tree = deque(sorted(tree[chrom]))
-        try:
-            cur_intv = cur_tree.popleft()
-        except IndexError:
-            # region-less chromosome
-            if not inside:
-                try:
-                    for cur_entry in vcf.fetch(chrom):
-                        yield ret_type(cur_entry, chrom, cur_intv)
-                except ValueError:
-                    pass  # region on chromosome not in vcf
-            continue
-
-        try:
-            cur_iter = vcf.fetch(chrom)
-        except ValueError:
-            continue  # region on chromosome not in vcf
-        try:
-            cur_entry = next(cur_iter)
-        except StopIteration:
-            # variant-less chromosome
-            continue
-        cur_start, cur_end = truvari.entry_boundaries(cur_entry)
-
-        while True:
-            # if start is after this interval, we need the next interval
-            if cur_start > cur_intv.end:
-                try:
-                    cur_intv = cur_tree.popleft()
-                except IndexError:
-                    if not inside:
-                        # pass this back before flush after the while
-                        yield ret_type(cur_entry, chrom, cur_intv)
-                    break
-            # well before, we need the next entry
-            elif cur_end < cur_intv.begin:
-                if not inside:
-                    yield ret_type(cur_entry, chrom, cur_intv)
-                try:
-                    cur_entry = next(cur_iter)
-                    cur_start, cur_end = truvari.entry_boundaries(cur_entry)
-                except StopIteration:
-                    break
+    for chrom in header_sorted_contigs(vcf, tree.keys(), contigs):
+        index = as_index(tree[chrom])
+        for entry, pos in stream_contig(vcf, chrom, index, inside):
+            if with_region:
+                yield entry, (chrom, index.interval(pos) if pos is not None else None)
             else:
-                end_within = truvari.entry_variant_type(cur_entry) != truvari.SV.INS
-                is_within = truvari.coords_within(cur_start, cur_end, cur_intv.begin, cur_intv.end - 1, end_within)
-                if is_within == inside:
-                    yield ret_type(cur_entry, chrom, cur_intv)
-                try:
-                    cur_entry = next(cur_iter)
-                    cur_start, cur_end = truvari.entry_boundaries(cur_entry)
-                except StopIteration:
-                    break
-
-        # if we finished the intervals first, need to flush the rest of the outside entries
+                yield entry
+
+
+def stream_contig(vcf, chrom, index, inside=True):
+    """
+    Stream a contig's variants inside/outside the index's regions for :meth:`region_filter_stream`.
+    Yields the entries and the position in the index of their region
+    """
+    begins = index.begins.tolist()
+    ends = index.ends.tolist()
+    if not begins:
+        # region-less chromosome
         if not inside:
-            for cur_entry in cur_iter:
-                yield ret_type(cur_entry, chrom, cur_intv)
+            try:
+                for cur_entry in vcf.fetch(chrom):
+                    yield cur_entry, None
+            except ValueError:
+                pass  # region on chromosome not in vcf
+        return
+    cur_idx = 0
+
+    try:
+        cur_iter = vcf.fetch(chrom)
+    except ValueError:
+        return  # region on chromosome not in vcf
+    try:
+        cur_entry = next(cur_iter)
+    except StopIteration:
+        # variant-less chromosome
+        return
+    cur_start, cur_end = truvari.entry_boundaries(cur_entry)
+
+    while True:
+        # if start is after this interval, we need the next interval
+        if cur_start > ends[cur_idx]:
+            if cur_idx + 1 == len(begins):
+                if not inside:
+                    # pass this back before flush after the while
+                    yield cur_entry, cur_idx
+                break
+            cur_idx += 1
+        # well before, we need the next entry
+        elif cur_end < begins[cur_idx]:
+            if not inside:
+                yield cur_entry, cur_idx
+            try:
+                cur_entry = next(cur_iter)
+                cur_start, cur_end = truvari.entry_boundaries(cur_entry)
+            except StopIteration:
+                break
+        else:
+            end_within = truvari.entry_variant_type(cur_entry) != truvari.SV.INS
+            is_within = truvari.coords_within(cur_start, cur_end, begins[cur_idx], ends[cur_idx] - 1, end_within)
+            if is_within == inside:
+                yield cur_entry, cur_idx
+            try:
+                cur_entry = next(cur_iter)
+                cur_start, cur_end = truvari.entry_boundaries(cur_entry)
+            except StopIteration:
+                break
+
+    # if we finished the intervals first, need to flush the rest of the outside entries
+    if not inside:
+        for cur_entry in cur_iter:
+            yield cur_entry, cur_idx
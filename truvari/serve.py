@@ -0,0 +1,181 @@
+"""
+Hold prepared bases in memory and bench comparison VCFs against them on request
+
+Bases are made by `truvari bench --prepare-base`. Requests are POSTed as json holding the `args` of a
+`truvari bench` command line whose --base is a held base, e.g.
+    {"args": ["-b", "prepared/", "-c", "comp.vcf.gz", "-o", "output/", "--pctseq", "0.9"]}
+
+The response holds the output directory and the stats of every summary made.
+GET returns the held bases. Requests are run one at a time.
+"""
+import os
+import sys
+import json
+import signal
+import logging
+import argparse
+import functools
+import http.server
+import socketserver
+
+import truvari
+import truvari.bench as trubench
+
+
+def parse_args(args):
+    """
+    Pull the command line parameters
+    """
+    parser = argparse.ArgumentParser(prog="serve", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-b", "--base", type=str, nargs="+", required=True,
+                        help="Prepared bases to hold in memory")
+    parser.add_argument("--host", type=str, default="127.0.0.1",
+                        help="Address to serve on (%(default)s)")
+    parser.add_argument("--port", type=int, default=8008,
+                        help="Port to serve on (%(default)s)")
+    parser.add_argument("--socket", type=str, default=None,
+                        help="Serve on this unix socket instead of --host/--port")
+    parser.add_argument("--debug", action="store_true", default=False,
+                        help="Verbose logging")
+    return parser.parse_args(args)
+
+
+class BenchServer():
+    """
+    Holds :class:`truvari.PreparedBase` in memory with their region trees and runs bench requests against them.
+    Each request only pays for reading its comparison VCF
+
+    .. code-block:: python
+
+        server = truvari.BenchServer(["prepared/"])
+        status, response = server.bench({"args": ["-b", "prepared/", "-c", "comp.vcf.gz", "-o", "output/"]})
+    """
+
+    def __init__(self, bases):
+        """
+        Load the prepared bases
+        """
+        self.bases = {}
+        for path in bases:
+            path = os.path.abspath(path)
+            base = truvari.PreparedBase(path).load()
+            params = base.meta["params"]
+            base.region_tree, _ = truvari.Bench(includebed=params["includebed"],
+                                                bench_overlaps=params["bench_overlaps"]).make_regions(base)
+            self.bases[path] = base
+            logging.info("Holding %d calls of %s", len(base), path)
+
+    def status(self):
+        """
+        Returns the number of calls of each held base
+        """
+        return {"bases": {path: len(base) for path, base in self.bases.items()}}
+
+    def bench(self, request):
+        """
+        Run a request's bench. Returns the HTTP status code and the response
+        """
+        if not isinstance(request, dict) or not isinstance(request.get("args"), list):
+            return 400, {"error": "Request needs a list of bench 'args'"}
+        try:
+            args = trubench.parse_args([str(_) for _ in request["args"]])
+        except SystemExit:
+            return 400, {"error": "Bad bench args"}
+
+        base = self.bases.get(args.base)
+        if base is None:
+            return 404, {"error": f"Base {args.base} isn't held"}
+        if args.prepare_base or trubench.check_params(args) or trubench.check_inputs(args):
+            return 400, {"error": "Couldn't run bench. Please fix parameters"}
+
+        logging.info("Benching %s against %s", args.comp, args.base)
+        outputs = trubench.run_bench(trubench.make_bench(args, base), args)
+        return 200, {"output": args.output, "stats": [_.stats_box for _ in outputs]}
+
+
+class BenchRequestHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Hands requests to a :class:`BenchServer`
+    """
+
+    def __init__(self, *args, bench_server=None, **kwargs):
+        self.bench_server = bench_server
+        super().__init__(*args, **kwargs)
+
+    def respond(self, status, response):
+        """
+        Send a json response
+        """
+        body = json.dumps(response).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        """
+        Held bases
+        """
+        self.respond(200, self.bench_server.status())
+
+    def do_POST(self):
+        """
+        Bench request
+        """
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        except ValueError:
+            self.respond(400, {"error": "Request isn't json"})
+            return
+        try:
+            self.respond(*self.bench_server.bench(request))
+        except Exception as e:  # pylint: disable=broad-except
+            logging.exception("Bench request failed")
+            self.respond(500, {"error": str(e)})
+
+    def log_message(self, format, *args):
+        logging.debug(format, *args)
+
+
+class UnixHTTPServer(socketserver.UnixStreamServer):
+    """
+    HTTP over a unix socket
+    """
+
+    def get_request(self):
+        request, _ = super().get_request()
+        # BaseHTTPRequestHandler expects a (host, port) client address
+        return request, ("local", 0)
+
+
+def serve_main(cmdargs):
+    """
+    Main - entry point from command line
+    """
+    args = parse_args(cmdargs)
+    truvari.setup_logging(args.debug, show_version=True)
+    bad = [_ for _ in args.base if not truvari.is_prepared(_)]
+    if bad:
+        logging.error("Bases must be made by `truvari bench --prepare-base`: %s", ", ".join(bad))
+        sys.exit(100)
+
+    handler = functools.partial(BenchRequestHandler, bench_server=BenchServer(args.base))
+    if args.socket:
+        server = UnixHTTPServer(args.socket, handler)
+        where = args.socket
+    else:
+        server = http.server.HTTPServer((args.host, args.port), handler)
+        where = f"http://{args.host}:{args.port}"
+    logging.info("Serving on %s", where)
+    # Stop cleanly on kill so the socket is removed
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logging.info("Stopping")
+    finally:
+        server.server_close()
+        if args.socket:
+            os.remove(args.socket)
@@ -0,0 +1,526 @@
+"""
+Splits a bench's or collapse's regions into shards which are run separately and merges their outputs
+"""
+import os
+import copy
+import json
+import sys
+import shutil
+import logging
+import argparse
+import multiprocessing
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+import pysam
+
+import truvari
+from truvari.region_vcf_iter import as_index, header_sorted_contigs
+from truvari.vcf_index import offsets_at, offsets_after
+
+BENCH_VCFS = ["tp-base.vcf.gz", "tp-comp.vcf.gz", "fn.vcf.gz", "fp.vcf.gz"]
+MERGE_DESC = """
+Merge the --shard outputs of bench or collapse. Every shard must be given. VCFs are concatenated in shard order
+without re-sorting. Bench stats are summed and their performance recalculated
+"""
+# Name of a --shard bench output directory's manifest. collapse writes its manifest beside the output vcf
+SHARD_MANIFEST = "shard.json"
+
+
+def parse_shard(value):
+    """
+    Parse a 1-based `i/N` shard argument. Raises argparse.ArgumentTypeError if it's malformed
+    Used with :class:`argparse.ArgumentParser.add_argument` type parameter
+
+    :param `value`: shard argument
+    :type `value`: string
+
+    :return: 0-based shard index and number of shards
+    :rtype: tuple
+
+    Example
+        >>> import truvari
+        >>> truvari.parse_shard("2/4")
+        (1, 4)
+        >>> truvari.parse_shard("5/4")
+        Traceback (most recent call last):
+        argparse.ArgumentTypeError: Shard 5/4 isn't i/N with 1 <= i <= N
+    """
+    try:
+        idx, num = (int(_) for _ in value.split('/'))
+    except ValueError:
+        idx, num = 0, 0
+    if not 1 <= idx <= num:
+        raise argparse.ArgumentTypeError(f"Shard {value} isn't i/N with 1 <= i <= N")
+    return idx - 1, num
+
+
+def region_weights(chrom, index, vcf_offsets):
+    """
+    Estimated number of records in each of a contig's regions from the VCFs' :meth:`truvari.read_vcf_index`.
+    VCFs without an index or record counts add the regions' lengths instead
+    """
+    weights = np.zeros(len(index), dtype=float)
+    for offsets in vcf_offsets:
+        contig = offsets.get(chrom) if offsets is not None else None
+        if offsets is None or (contig is not None and contig.records is None):
+            weights += index.ends - index.begins
+        elif contig is not None and contig.end > contig.begin:
+            per_byte = contig.records / (contig.end - contig.begin)
+            weights += (offsets_after(contig, index.ends) - offsets_at(contig, index.begins)) * per_byte
+    return weights
+
+
+def shard_bounds(weights, splits, num):
+    """
+    Split consecutive regions into up to num (first, last) ranges of similar total weight. Ranges only begin at
+    regions where splits is True
+    """
+    # Weight before each region where a shard can start
+    before = np.concatenate([[0], np.cumsum(weights)[:-1]])
+    candidates = np.flatnonzero(splits)[1:]
+    starts = [0]
+    for shard in range(1, num):
+        target = weights.sum() * shard / num
+        remaining = candidates[candidates > starts[-1]]
+        if len(remaining) == 0:
+            break
+        best = remaining[np.argmin(np.abs(before[remaining] - target))]
+        if before[best] > before[starts[-1]]:
+            starts.append(int(best))
+    return list(zip(starts, starts[1:] + [len(weights)]))
+
+
+def plan_shards(region_tree, chroms, vcf_offsets, num, gap=None):
+    """
+    Split a merged region tree into up to num shards of consecutive regions with balanced estimated records.
+    Shards are only split between contigs or, when a gap is given, between regions further apart than it.
+    With a gap of at least the chunksize plus both sides' extend, no chunk of a bench would span two shards.
+
+    :param `region_tree`: merged regions
+    :type `region_tree`: dict
+    :param `chroms`: contigs of the tree in VCF header order
+    :type `chroms`: list
+    :param `vcf_offsets`: :meth:`truvari.read_vcf_index` of each VCF to be read
+    :type `vcf_offsets`: list
+    :param `num`: number of shards
+    :type `num`: int
+    :param `gap`: minimum distance between regions of different shards on a contig
+    :type `gap`: int, optional
+
+    :return: region trees of each shard in order
+    :rtype: list
+    """
+    pieces = []
+    for chrom in chroms:
+        index = as_index(region_tree[chrom])
+        if not index:
+            continue
+        splits = np.zeros(len(index), dtype=bool)
+        splits[0] = True
+        if gap is not None:
+            splits[1:] = index.begins[1:] - index.max_ends[:-1] > gap
+        pieces.append((chrom, index, splits, region_weights(chrom, index, vcf_offsets)))
+    if not pieces:
+        return []
+
+    bounds = shard_bounds(np.concatenate([_[3] for _ in pieces]), np.concatenate([_[2] for _ in pieces]), num)
+    shards = [{} for _ in bounds]
+    offset = 0
+    for chrom, index, *_ in pieces:
+        for shard, (first, last) in zip(shards, bounds):
+            lower, upper = max(first - offset, 0), min(last - offset, len(index))
+            if lower < upper:
+                shard[chrom] = truvari.IntervalIndex.from_sorted(index.begins[lower:upper], index.ends[lower:upper])
+        offset += len(index)
+    return shards
+
+
+def shard_regions(vcf, region_tree, shard, gap=None):
+    """
+    Region tree of one shard of a :class:`pysam.VariantFile`'s merged regions planned by :meth:`plan_shards`.
+    Every process given the same regions makes the same plan, so each can pick its own shard.
+    Shards past the end of a plan with fewer shards have no regions
+
+    :param `vcf`: indexed VCF being read
+    :type `vcf`: :class:`pysam.VariantFile`
+    :param `region_tree`: merged regions
+    :type `region_tree`: dict
+    :param `shard`: 0-based shard index and number of shards (see :meth:`parse_shard`)
+    :type `shard`: tuple
+    :param `gap`: minimum distance between regions of different shards on a contig
+    :type `gap`: int, optional
+
+    :return: the shard's regions
+    :rtype: dict
+    """
+    idx, num = shard
+    offsets = truvari.read_vcf_index(vcf.filename, list(vcf.header.contigs))
+    shards = plan_shards(region_tree, header_sorted_contigs(vcf, region_tree.keys()), [offsets], num, gap)
+    if idx >= len(shards):
+        logging.warning("Regions only split into %d shards. Shard %d/%d is empty", len(shards), idx + 1, num)
+        return {}
+    return shards[idx]
+
+
+def write_shard_manifest(filename, command, shard, outputs, **kwargs):
+    """
+    Write the manifest of a --shard's partial outputs for :meth:`load_shard_manifests`. Output paths are saved
+    relative to the manifest so shards can be moved before merging
+
+    :param `filename`: manifest to write
+    :type `filename`: string
+    :param `command`: command which made the shard
+    :type `command`: string
+    :param `shard`: 0-based shard index and number of shards
+    :type `shard`: tuple
+    :param `outputs`: paths of the shard's outputs by name
+    :type `outputs`: dict
+    :param `kwargs`: other information to save, e.g. stats
+    :type `kwargs`: dict
+    """
+    base = os.path.dirname(os.path.abspath(filename))
+    manifest = {"command": command,
+                "shard": shard[0],
+                "shards": shard[1],
+                "outputs": {key: os.path.relpath(os.path.abspath(path), base) for key, path in outputs.items()}}
+    manifest.update(kwargs)
+    with open(filename, 'w') as fout:
+        json.dump(manifest, fout, indent=4)
+
+
+def load_shard_manifests(paths):
+    """
+    Load the manifests of --shard outputs sorted by shard. Paths can be manifests or bench output directories
+    holding one. Output paths are made absolute
+
+    :param `paths`: manifests or directories
+    :type `paths`: list
+
+    :return: manifests
+    :rtype: list
+    """
+    ret = []
+    for path in paths:
+        if os.path.isdir(path):
+            path = os.path.join(path, SHARD_MANIFEST)
+        with open(path, 'r') as fh:
+            manifest = json.load(fh)
+        base = os.path.dirname(os.path.abspath(path))
+        manifest["outputs"] = {key: os.path.normpath(os.path.join(base, out))
+                               for key, out in manifest["outputs"].items()}
+        ret.append(manifest)
+    ret.sort(key=lambda m: m["shard"])
+    return ret
+
+
+def check_shard_manifests(manifests):
+    """
+    Checks the manifests are every shard of one command's run. Returns True if they aren't
+    """
+    if not manifests:
+        logging.error("No shards to merge")
+        return True
+    if len({(m["command"], m["shards"]) for m in manifests}) != 1:
+        logging.error("Shards are from different commands or numbers of shards")
+        return True
+    num = manifests[0]["shards"]
+    found = [m["shard"] for m in manifests]
+    if found != list(range(num)):
+        missing = sorted(set(range(num)) - set(found))
+        duplicate = sorted({_ for _ in found if found.count(_) > 1})
+        logging.error("Expected %d shards. Missing %s. Duplicated %s", num,
+                      [_ + 1 for _ in missing], [_ + 1 for _ in duplicate])
+        return True
+    return False
+
+
+def concat_vcfs(in_fns, out_fn):
+    """
+    Concatenate VCFs with the same header whose entries follow one another without re-sorting. Outputs ending
+    with .gz are bgzipped and indexed
+    """
+    compress = out_fn.endswith(".gz")
+    with pysam.BGZFile(out_fn, 'wb') if compress else open(out_fn, 'wb') as fout:
+        for idx, fn in enumerate(in_fns):
+            buf = []
+            for line in truvari.opt_gz_open(fn):
+                if idx == 0 or not line.startswith('#'):
+                    buf.append(line)
+                if len(buf) >= 10000:
+                    fout.write("".join(buf).encode())
+                    buf = []
+            fout.write("".join(buf).encode())
+    if compress:
+        pysam.tabix_index(out_fn, force=True, preset="vcf")
+
+
+def merge_stats(stats):
+    """
+    Sum the counts of :class:`truvari.StatsBox` (e.g. loaded from summary.json) and recalculate their performance
+
+    :param `stats`: stats to sum
+    :type `stats`: list
+
+    :return: summed stats
+    :rtype: :class:`truvari.StatsBox`
+
+    Example
+        >>> import truvari
+        >>> a = {"TP-base": 2, "TP-comp": 2, "FP": 0, "FN": 2, "gt_matrix": {"(0, 1)": {"(0, 1)": 2}}}
+        >>> b = {"TP-base": 2, "TP-comp": 2, "FP": 2, "FN": 0, "gt_matrix": {"(0, 1)": {"(1, 1)": 1}}}
+        >>> box = truvari.merge_stats([a, b])
+        >>> box["precision"], box["recall"], dict(box["gt_matrix"]["(0, 1)"])
+        (0.6666666666666666, 0.6666666666666666, {'(0, 1)': 2, '(1, 1)': 1})
+    """
+    ret = truvari.StatsBox()
+    for box in stats:
+        for key, value in box.items():
+            if key == "gt_matrix":
+                for base_gt, comp_gts in value.items():
+                    ret["gt_matrix"][base_gt].update(comp_gts)
+            elif key in ret and key not in ["precision", "recall", "f1", "gt_concordance"]:
+                ret[key] += value
+    ret.calc_performance()
+    return ret
+
+
+MergedBenchOutput = namedtuple("MergedBenchOutput", ["stats_box", "vcf_filenames"])
+MergedBenchOutput.__doc__ = """
+Outputs of benches merged by :meth:`merge_bench_dirs`. Like a :class:`truvari.BenchOutput`, vcf_filenames holds
+the merged vcfs by key (tpb, tpc, fn, fp) and stats_box the summed :class:`truvari.StatsBox`
+"""
+
+
+def merge_bench_dirs(in_dirs, outdir, write_vcfs=True):
+    """
+    Merge the outputs of benches of consecutive regions (e.g. shards from :meth:`plan_shards`) into outdir. VCFs
+    are concatenated in order, summary.json stats are summed, and candidate.refine.bed regions are combined.
+
+    :param `in_dirs`: bench output directories in order
+    :type `in_dirs`: list
+    :param `outdir`: existing directory to write into
+    :type `outdir`: string
+    :param `write_vcfs`: merge the VCFs
+    :type `write_vcfs`: bool, optional
+
+    :return: the merged outputs
+    :rtype: :class:`MergedBenchOutput`
+    """
+    stats = []
+    for in_dir in in_dirs:
+        with open(os.path.join(in_dir, "summary.json"), 'r') as fh:
+            stats.append(json.load(fh, object_pairs_hook=OrderedDict))
+    stats_box = merge_stats(stats)
+    stats_box.write_json(os.path.join(outdir, "summary.json"))
+
+    vcf_filenames = {}
+    if write_vcfs:
+        for key, name in zip(["tpb", "tpc", "fn", "fp"], BENCH_VCFS):
+            vcf_filenames[key] = os.path.join(outdir, name)
+            concat_vcfs([os.path.join(_, name) for _ in in_dirs], vcf_filenames[key])
+
+    candidates = []
+    for in_dir in in_dirs:
+        with open(os.path.join(in_dir, "candidate.refine.bed"), 'r') as fh:
+            candidates.extend(_ for _ in fh.read().split('\n') if _)
+    with open(os.path.join(outdir, "candidate.refine.bed"), 'w') as fout:
+        fout.write("\n".join(candidates))
+    return MergedBenchOutput(stats_box, vcf_filenames)
+
+
+def merge_collapse_shards(manifests, output, redundant_output):
+    """
+    Merge the outputs of every shard of a --shard collapse. The kept and redundant VCFs are concatenated in order
+    and the stats summed
+
+    :param `manifests`: checked manifests sorted by shard (see :meth:`load_shard_manifests`)
+    :type `manifests`: list
+    :param `output`: merged output vcf
+    :type `output`: string
+    :param `redundant_output`: merged redundant vcf
+    :type `redundant_output`: string
+
+    :return: summed stats
+    :rtype: dict
+    """
+    concat_vcfs([m["outputs"]["output"] for m in manifests], output)
+    concat_vcfs([m["outputs"]["redundant_output"] for m in manifests], redundant_output)
+    stats = {}
+    for manifest in manifests:
+        for key, value in manifest["stats"].items():
+            stats[key] = stats.get(key, 0) + value
+    return stats
+
+
+class ShardedBench():
+    """
+    Runs a :class:`truvari.Bench` as shards of its regions benched by separate processes and merges their outputs
+    into the bench's outdir.
+
+    The includebed's merged regions (or every contig without one) are split by :meth:`plan_shards` into shards
+    with similar numbers of records estimated from the VCFs' indexes. Each process opens its own VCFs and only
+    reads its shard's regions (see :meth:`truvari.region_filter`), so no process reads the whole VCF. Shards are
+    split where no chunk could span them, so the merged outputs hold the same calls and stats as a single
+    bench. Only the MatchIds differ, since their chunk ids are prefixed by the shard's index.
+
+    .. code-block:: python
+
+        m_bench = truvari.Bench(matcher, base_vcf, comp_vcf, outdir, includebed="regions.bed")
+        output = truvari.ShardedBench(m_bench, 4).run()
+        print(output.stats_box["f1"])
+
+    Each shard is benched in `outdir/shards/shard_N`, which is removed after merging unless the bench is `debug`.
+    """
+
+    def __init__(self, bench, shards):
+        """
+        The bench holds the base, comp, outdir, and Matcher
+        """
+        self.bench = bench
+        self.shards = shards
+
+    def plan(self):
+        """
+        Returns the region trees of each shard
+        """
+        base = pysam.VariantFile(self.bench.base_vcf)
+        comp = pysam.VariantFile(self.bench.comp_vcf)
+        region_tree, _ = self.bench.make_regions(base, comp)
+        gap = None
+        if not self.bench.bench_overlaps:
+            gap = self.bench.matcher.params.chunksize + 2 * self.bench.extend + 1
+        vcf_offsets = [truvari.read_vcf_index(_.filename, list(_.header.contigs)) for _ in [base, comp]]
+        return plan_shards(region_tree, header_sorted_contigs(base, region_tree.keys()), vcf_offsets,
+                           self.shards, gap)
+
+    def shard_bench(self, idx, region_tree, outdir):
+        """
+        Make the Bench of a shard. Its matcher is made by the shard's process
+        """
+        ret = copy.copy(self.bench)
+        ret.matcher = None
+        ret.outdir = outdir
+        ret.region_tree = region_tree
+        ret.shard_id = idx
+        ret.threads = 1
+        ret.do_logging = False
+        ret.refine_candidates = []
+        return ret
+
+    def run(self, write_vcfs=True):
+        """
+        Bench every shard and merge their outputs. Returns the :class:`MergedBenchOutput`
+        """
+        os.mkdir(self.bench.outdir)
+        if self.bench.do_logging:
+            truvari.setup_logging(self.bench.debug, truvari.LogFileStderr(
+                os.path.join(self.bench.outdir, "log.txt")), show_version=True)
+        param_dict = self.bench.param_dict()
+        param_dict.update(vars(self.bench.matcher.params))
+        param_dict["shards"] = self.shards
+        logging.info("Params:\n%s", json.dumps(param_dict, indent=4))
+        with open(os.path.join(self.bench.outdir, 'params.json'), 'w') as fout:
+            json.dump(param_dict, fout)
+
+        with truvari.perf_stage("shard"):
+            trees = self.plan()
+        logging.info("Benching %d shards of %d regions", len(trees),
+                     sum(len(index) for tree in trees for index in tree.values()))
+        shard_root = os.path.join(self.bench.outdir, "shards")
+        os.mkdir(shard_root)
+        shard_dirs = [os.path.join(shard_root, f"shard_{idx}") for idx in range(len(trees))]
+        jobs = [(self.shard_bench(idx, tree, shard_dir), self.bench.matcher.params, write_vcfs,
+                 truvari.perf_active())
+                for idx, (tree, shard_dir) in enumerate(zip(trees, shard_dirs))]
+        with multiprocessing.Pool(max(len(jobs), 1)) as pool:
+            for perf in pool.starmap(_run_shard, jobs):
+                truvari.perf_merge(perf)
+
+        with truvari.perf_stage("merge"):
+            output = merge_bench_dirs(shard_dirs, self.bench.outdir, write_vcfs)
+        if not self.bench.debug:
+            shutil.rmtree(shard_root)
+        return output
+
+    def run_shard(self, idx, write_vcfs=True):
+        """
+        Bench only shard idx of the plan into the bench's outdir and write its manifest. Every shard can be run by
+        a separate job and their outdirs merged by `truvari merge-shards`. Returns the :class:`truvari.BenchOutput`
+        """
+        trees = self.plan()
+        self.bench.region_tree = trees[idx] if idx < len(trees) else {}
+        self.bench.shard_id = idx
+        output = self.bench.run(write_vcfs)
+        if idx >= len(trees):
+            logging.warning("Regions only split into %d shards. Shard %d/%d is empty", len(trees), idx + 1,
+                            self.shards)
+        write_shard_manifest(os.path.join(self.bench.outdir, SHARD_MANIFEST), "bench", (idx, self.shards),
+                             {"dir": self.bench.outdir}, write_vcfs=write_vcfs)
+        return output
+
+
+def _run_shard(bench, params, write_vcfs, perf):
+    """
+    Bench a shard inside its own process. When perf, returns the shard's stage timings
+    """
+    truvari.perf_worker(perf)
+    matcher = truvari.Matcher()
+    matcher.params = params
+    if params.reference is not None:
+        matcher.reference = truvari.ReferenceCache(params.reference)
+    matcher.seqsim_cache = truvari.SeqSimCache.from_params(params)
+    bench.matcher = matcher
+    bench.run(write_vcfs)
+    return truvari.perf_pop()
+
+
+def parse_args(args):
+    """
+    Pull the command line parameters
+    """
+    parser = argparse.ArgumentParser(prog="merge-shards", description=MERGE_DESC,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("shards", metavar="SHARD", nargs="+",
+                        help="bench --shard output directories or collapse --shard manifests (OUTPUT.shard.json)")
+    parser.add_argument("-o", "--output", type=str, required=True,
+                        help="Output directory of benches or output vcf of collapses")
+    parser.add_argument("-c", "--redundant-output", type=str, default="redundant.vcf",
+                        help="Collapse's merged redundant variants (%(default)s)")
+    parser.add_argument("--debug", action="store_true", default=False,
+                        help="Verbose logging")
+    return parser.parse_args(args)
+
+
+def merge_shards_main(cmdargs):
+    """
+    Main
+    """
+    args = parse_args(cmdargs)
+    missing = [_ for _ in args.shards if not os.path.exists(os.path.join(_, SHARD_MANIFEST) if os.path.isdir(_)
+                                                            else _)]
+    if missing:
+        logging.error("Shard manifests %s do not exist", ", ".join(missing))
+        sys.exit(100)
+    manifests = load_shard_manifests(args.shards)
+    if check_shard_manifests(manifests):
+        sys.exit(100)
+
+    command = manifests[0]["command"]
+    if command == "bench":
+        if os.path.exists(args.output):
+            logging.error("Output directory '%s' already exists", args.output)
+            sys.exit(100)
+        os.mkdir(args.output)
+        truvari.setup_logging(args.debug, truvari.LogFileStderr(os.path.join(args.output, "log.txt")),
+                              show_version=True)
+        in_dirs = [m["outputs"]["dir"] for m in manifests]
+        output = merge_bench_dirs(in_dirs, args.output, manifests[0]["write_vcfs"])
+        shutil.copy(os.path.join(in_dirs[0], "params.json"), os.path.join(args.output, "params.json"))
+        logging.info("Stats: %s", json.dumps(output.stats_box, indent=4))
+    else:
+        truvari.setup_logging(args.debug, show_version=True)
+        stats = merge_collapse_shards(manifests, args.output, args.redundant_output)
+        logging.info("Wrote %d Variants", stats["out_cnt"])
+        logging.info("%d variants collapsed into %d variants", stats["collap_cnt"], stats["kept_cnt"])
+    logging.info("Merged %d %s shards", len(manifests), command)
@@ -0,0 +1,165 @@
+"""
+Memoization of sequence similarity results
+"""
+import os
+import logging
+import sqlite3
+import hashlib
+from collections import OrderedDict
+
+
+class SeqSimCache():
+    """
+    Bounded LRU of :meth:`truvari.entry_seq_similarity` results with an optional on-disk sqlite store.
+
+    Results are keyed by a hash of the two compared alleles plus their unroll offset. Because
+    similarities can be bounded by a `min_sim` (see :meth:`truvari.seqsim`), each result also
+    records whether it is exact or only an upper bound.
+
+    Results are written to the on-disk store in batches of `batch_size` and by :meth:`flush`/:meth:`close`.
+
+    Example
+        >>> import truvari
+        >>> cache = truvari.SeqSimCache(max_size=2)
+        >>> key = cache.make_key("ACGT", "ACTT", 0)
+        >>> cache.get(key)
+        >>> cache.put(key, 0.875)
+        >>> cache.get(key)
+        0.875
+        >>> cache.hits, cache.misses
+        (1, 1)
+    """
+
+    def __init__(self, max_size=100000, cache_dir=None, batch_size=1000):
+        """
+        Initialize. max_size is the number of results held in memory. When cache_dir
+        is provided, results are also stored in `cache_dir/seqsim.sqlite`
+        """
+        self.max_size = max_size
+        self.memory = OrderedDict()
+        self.batch_size = batch_size
+        self.unsaved = {}
+        self.hits = 0
+        self.misses = 0
+        self.db = None
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            self.db = sqlite3.connect(os.path.join(cache_dir, "seqsim.sqlite"), timeout=60)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA synchronous=OFF")
+            self.db.execute(("CREATE TABLE IF NOT EXISTS seqsim "
+                             "(key BLOB PRIMARY KEY, sim REAL, exact INTEGER)"))
+            self.db.commit()
+
+    @staticmethod
+    def from_params(params):
+        """
+        Build a SeqSimCache from a :class:`truvari.Matcher`'s params.
+        Returns None when params don't turn on caching. A cache_dir without a cache_size holds the default
+        max_size in memory so lookups don't all go to the on-disk store
+        """
+        size = getattr(params, "cache_size", 0)
+        cache_dir = getattr(params, "cache_dir", None)
+        if not size and cache_dir is None:
+            return None
+        if not size:
+            return SeqSimCache(cache_dir=cache_dir)
+        return SeqSimCache(size, cache_dir)
+
+    @staticmethod
+    def make_key(allele1, allele2, offset=0):
+        """
+        Hash the alleles and their unroll offset into a key
+        """
+        return hashlib.blake2b(f"{allele1}\t{allele2}\t{offset}".encode(), digest_size=16).digest()
+
+    def get(self, key, min_sim=0):
+        """
+        Return the similarity stored for key or None if it isn't stored.
+        Upper bounds are only returned when they're below `min_sim`
+        """
+        found = self.memory.get(key)
+        if found is not None:
+            self.memory.move_to_end(key)
+        elif self.db is not None:
+            found = self.unsaved.get(key)
+            if found is None:
+                row = self.db.execute("SELECT sim, exact FROM seqsim WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    found = (row[0], bool(row[1]))
+            if found is not None:
+                self.remember(key, found)
+
+        if found is not None:
+            sim, exact = found
+            if exact or (min_sim > 0 and sim < min_sim):
+                self.hits += 1
+                return sim
+        self.misses += 1
+        return None
+
+    def put(self, key, sim, exact=True):
+        """
+        Store a similarity. When not exact, sim is an upper bound of the similarity
+        """
+        self.remember(key, (sim, exact))
+        if self.db is not None:
+            self.unsaved[key] = (sim, exact)
+            if len(self.unsaved) >= self.batch_size:
+                self.flush()
+
+    def flush(self):
+        """
+        Write the results put since the last flush to the on-disk store in one transaction
+        """
+        if self.db is None or not self.unsaved:
+            return
+        self.db.executemany("INSERT OR REPLACE INTO seqsim VALUES (?, ?, ?)",
+                            [(key, sim, int(exact)) for key, (sim, exact) in self.unsaved.items()])
+        self.db.commit()
+        self.unsaved = {}
+
+    def remember(self, key, value):
+        """
+        Put a value into the in-memory LRU, evicting the oldest when full
+        """
+        if not self.max_size:
+            return
+        self.memory[key] = value
+        self.memory.move_to_end(key)
+        if len(self.memory) > self.max_size:
+            self.memory.popitem(last=False)
+
+    def pop_counts(self):
+        """
+        Return the hits and misses counted since the last call and reset them
+        """
+        ret = (self.hits, self.misses)
+        self.hits = 0
+        self.misses = 0
+        return ret
+
+    def add_counts(self, hits, misses):
+        """
+        Add counts from another cache (e.g. a worker process's)
+        """
+        self.hits += hits
+        self.misses += misses
+
+    def log_stats(self):
+        """
+        Write the hit/miss counts to the log
+        """
+        total = self.hits + self.misses
+        pct = self.hits / total * 100 if total else 0
+        logging.info("Sequence similarity cache: %d hits, %d misses (%.1f%% hit rate)",
+                     self.hits, self.misses, pct)
+
+    def close(self):
+        """
+        Close the on-disk store
+        """
+        if self.db is not None:
+            self.flush()
+            self.db.close()
+            self.db = None
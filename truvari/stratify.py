@@ -6,12 +6,10 @@ import logging
 import argparse
 import multiprocessing
 from functools import partial
-from collections import defaultdict
 
 import pysam
 import numpy as np
 import pandas as pd
-from intervaltree import IntervalTree
 
 import truvari
 
@@ -47,18 +45,25 @@ def count_entries(vcf, chroms, regions, within):
     """
     if isinstance(vcf, str):
         vcf = pysam.VariantFile(vcf)
-    tree = defaultdict(IntervalTree)
-    counts_idx = {}
-    counts = [0] * len(regions)
-    for idx, row in enumerate(zip(chroms, regions)):
-        chrom, coords = row
-        start, end = coords
-        tree[chrom].addi(start, end + 1)
-        counts_idx[(chrom, start, end)] = idx
+    chroms = np.asarray(chroms)
+    regions = np.asarray(regions, dtype=np.int64).reshape(-1, 2)
+    starts, ends = regions[:, 0], regions[:, 1]
+    idxs = np.arange(len(regions))
+    # Regions with the same coordinates are counted once, in the last of them
+    order = np.lexsort((-idxs, ends, starts, chroms))
+    dup = np.zeros(len(order), dtype=bool)
+    dup[1:] = ((chroms[order][1:] == chroms[order][:-1]) & (starts[order][1:] == starts[order][:-1])
+               & (ends[order][1:] == ends[order][:-1]))
+    order = order[~dup]
+
+    tree = {}
+    for chrom in np.unique(chroms[order]):
+        m_order = order[chroms[order] == chrom]
+        tree[chrom] = truvari.IntervalIndex.from_arrays(starts[m_order], ends[m_order] + 1, idxs[m_order])
+    counts = np.zeros(len(regions), dtype=np.int64)
     for _, location in truvari.region_filter(vcf, tree, inside=within, with_region=True):
-        key = (location[0], location[1].begin, location[1].end - 1)
-        counts[counts_idx[key]] += 1
-    return counts
+        counts[location[1].data] += 1
+    return counts.tolist()
 
 
 def benchdir_count_entries(benchdir, regions, within=True, threads=4):
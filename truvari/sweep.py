@@ -0,0 +1,153 @@
+"""
+Bench a base/comp pair at a grid of matching thresholds
+"""
+import os
+import copy
+import json
+import logging
+import argparse
+import itertools
+
+import truvari
+
+SWEEP_PARAMS = ["refdist", "pctseq", "pctsize", "pctovl", "pick"]
+
+SWEEP_STATS = ["TP-base", "TP-comp", "FP", "FN", "precision", "recall", "f1", "gt_concordance"]
+
+
+def parse_sweep(sweeps):
+    """
+    Parse `bench --sweep` values into a grid
+
+    :param `sweeps`: strings of 'param=value1,value2,...'
+    :type `sweeps`: list
+
+    :return: the values of each param
+    :rtype: dict
+
+    Raises ValueError for unknown params or bad values
+
+    Example
+        >>> import truvari
+        >>> truvari.parse_sweep(["pctseq=0.5,0.9", "refdist=100"])
+        {'pctseq': [0.5, 0.9], 'refdist': [100]}
+    """
+    convert = {"refdist": truvari.restricted_int,
+               "pctseq": truvari.restricted_float,
+               "pctsize": truvari.restricted_float,
+               "pctovl": truvari.restricted_float,
+               "pick": str}
+    grid = {}
+    for sweep in sweeps:
+        param, _, values = sweep.partition('=')
+        if param not in SWEEP_PARAMS:
+            raise ValueError(f"Can't sweep '{param}'. Choose from {SWEEP_PARAMS}")
+        try:
+            grid[param] = [convert[param](_) for _ in values.split(',')]
+        except (ValueError, argparse.ArgumentTypeError) as e:
+            raise ValueError(f"Bad {param} values '{values}': {e}") from e
+        if param == "pick" and not set(grid[param]).issubset(truvari.PICKERS):
+            raise ValueError(f"Bad pick values '{values}'. Choose from {list(truvari.PICKERS)}")
+    return grid
+
+
+class BenchSweep():
+    """
+    Runs a :class:`truvari.Bench` at every point of a grid of matching parameters while only parsing
+    the VCFs and aligning each pair of sequences once.
+
+    The points share the chunks and compare each one in order of increasing pctseq. Their Matchers share a
+    :class:`truvari.SeqSimCache`, so a similarity aligned by an earlier point is reused by the later ones.
+    Because each point compares and picks exactly like a separate run, the summaries are identical to
+    separate benches.
+
+    .. code-block:: python
+
+        m_bench = truvari.Bench(matcher, base_vcf, comp_vcf, outdir)
+        sweep = truvari.BenchSweep(m_bench, {"pctseq": [0.5, 0.7, 0.9], "refdist": [100, 500]})
+        for point, output in sweep.run():
+            print(point, output.stats_box["f1"])
+
+    Each point's summary.json is written in a subdirectory of the bench's outdir, and `sweep.txt` holds
+    a table of every point's stats. Points are compared in a single process.
+    """
+
+    def __init__(self, bench, grid):
+        """
+        The bench holds the files, outdir, and the Matcher with the parameters not in the grid
+        """
+        self.bench = bench
+        self.grid = grid
+        self.points = [dict(zip(grid, values)) for values in itertools.product(*grid.values())]
+
+    def point_bench(self, idx, point, cache):
+        """
+        Make the Bench of a grid point
+        """
+        matcher = copy.copy(self.bench.matcher)
+        matcher.params = copy.copy(matcher.params)
+        for key, value in point.items():
+            setattr(matcher.params, key, value)
+        matcher.seqsim_cache = cache
+        ret = copy.copy(self.bench)
+        ret.matcher = matcher
+        ret.outdir = os.path.join(self.bench.outdir, f"point_{idx}")
+        ret.do_logging = False
+        ret.refine_candidates = []
+        return ret
+
+    def run(self):
+        """
+        Bench every point. Returns a list of each point and its :class:`truvari.BenchOutput`
+        """
+        os.mkdir(self.bench.outdir)
+        if self.bench.do_logging:
+            truvari.setup_logging(self.bench.debug, truvari.LogFileStderr(
+                os.path.join(self.bench.outdir, "log.txt")), show_version=True)
+        param_dict = self.bench.param_dict()
+        param_dict.update(vars(self.bench.matcher.params))
+        param_dict["sweep"] = self.grid
+        logging.info("Sweeping %d points:\n%s", len(self.points), json.dumps(param_dict, indent=4))
+        with open(os.path.join(self.bench.outdir, 'params.json'), 'w') as fout:
+            json.dump(param_dict, fout)
+
+        cache = self.bench.matcher.seqsim_cache
+        if cache is None:
+            cache = truvari.SeqSimCache()
+        benches = [self.point_bench(idx, point, cache) for idx, point in enumerate(self.points)]
+        outputs = [truvari.BenchOutput(_, _.matcher, write_vcfs=False) for _ in benches]
+
+        # Symbolic SVs are only resolved when pctseq != 0 and pick ac filters calls that aren't present, so points
+        # which make different chunks are chunked separately
+        groups = {}
+        for idx, m_bench in enumerate(benches):
+            params = m_bench.matcher.params
+            groups.setdefault((params.pctseq != 0, params.pick == 'ac'), []).append(idx)
+        for group in groups.values():
+            # Looser points first so their similarities can be reused by the stricter points
+            group.sort(key=lambda idx: benches[idx].matcher.params.pctseq)
+            region_tree, chunks = benches[group[0]].make_chunks(records=False)
+            for chunk in chunks:
+                for idx in group:
+                    result = benches[idx].compare_chunk(chunk)
+                    benches[idx].write_result(outputs[idx], result, region_tree)
+
+        for m_bench, output in zip(benches, outputs):
+            with open(os.path.join(m_bench.outdir, 'candidate.refine.bed'), 'w') as fout:
+                fout.write("\n".join(m_bench.refine_candidates))
+            output.close_outputs()
+        cache.log_stats()
+        cache.close()
+
+        self.write_table(outputs)
+        return list(zip(self.points, outputs))
+
+    def write_table(self, outputs):
+        """
+        Write every point's parameters and stats to `sweep.txt`
+        """
+        with open(os.path.join(self.bench.outdir, "sweep.txt"), 'w') as fout:
+            fout.write("\t".join(["point"] + list(self.grid) + SWEEP_STATS) + '\n')
+            for idx, (point, output) in enumerate(zip(self.points, outputs)):
+                row = [f"point_{idx}"] + [point[_] for _ in self.grid] + [output.stats_box[_] for _ in SWEEP_STATS]
+                fout.write("\t".join(str(_) for _ in row) + '\n')
@@ -436,6 +436,20 @@ def compress_index_vcf(fn, fout=None, remove=True):
         os.remove(fn)
 
 
+def vcf_sort_key(entry):
+    """
+    Key to sort entries in the same order as `bcftools sort`. That's by contig index in the
+    header, position, then the case-insensitive alleles
+
+    :param `entry`: entry to sort
+    :type `entry`: :class:`pysam.VariantRecord`
+
+    :return: sort key
+    :rtype: tuple
+    """
+    return entry.rid, entry.pos, tuple(_.lower() for _ in entry.alleles)
+
+
 def check_vcf_index(vcf_path):
     """
     Return true if an index file is found for the vcf
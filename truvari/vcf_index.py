@@ -0,0 +1,222 @@
+"""
+Reads tabix/CSI indexes to estimate how many compressed bytes fetching or streaming regions of a VCF reads
+"""
+import os
+import gzip
+import struct
+import logging
+from collections import namedtuple
+
+import numpy as np
+
+# Estimated compressed bytes each fetch costs on top of the bytes of its region for the index lookup, seek, and
+# decompressing the rest of the first BGZF block
+FETCH_COST_BYTES = 1 << 15
+TBI_SHIFT = 14
+TBI_DEPTH = 5
+
+ContigOffsets = namedtuple("ContigOffsets", ["starts", "offsets", "begin", "end", "records"])
+ContigOffsets.__doc__ = """
+Compressed file offsets of a contig's records. starts are sorted positions and offsets are the offsets of the
+first records overlapping or after them. begin/end are the offsets of the contig's first record and past its last.
+records is the number of records in the contig, or None if the index doesn't hold it
+"""
+
+
+def index_filename(vcf_fn):
+    """
+    Path of the VCF's .tbi or .csi index, or None
+    """
+    for ext in [".tbi", ".csi"]:
+        if os.path.exists(vcf_fn + ext):
+            return vcf_fn + ext
+    return None
+
+
+def pseudo_bin(depth):
+    """
+    Number of the bin holding a contig's begin/end offsets and record counts
+    """
+    return ((1 << (3 * depth + 3)) - 1) // 7 + 1
+
+
+def parse_bins(buf, pos, has_loffset):
+    """
+    Parse a contig's bins starting at pos. Returns dict of bin: (loffset, chunks) and the position after
+    """
+    n_bin = struct.unpack_from("<i", buf, pos)[0]
+    pos += 4
+    bins = {}
+    for _ in range(n_bin):
+        b_num = struct.unpack_from("<I", buf, pos)[0]
+        pos += 4
+        loffset = None
+        if has_loffset:
+            loffset = struct.unpack_from("<Q", buf, pos)[0]
+            pos += 8
+        n_chunk = struct.unpack_from("<i", buf, pos)[0]
+        pos += 4
+        chunks = np.frombuffer(buf, dtype="<u8", count=n_chunk * 2, offset=pos).reshape(-1, 2)
+        pos += n_chunk * 16
+        bins[b_num] = (loffset, chunks)
+    return bins, pos
+
+
+def contig_offsets(bins, starts, voffsets, pseudo):
+    """
+    Make a contig's :class:`ContigOffsets` from its bins and virtual offsets of sorted positions
+    """
+    records = None
+    if pseudo in bins:
+        chunks = bins.pop(pseudo)[1]
+        begin, end = (int(_) >> 16 for _ in chunks[0])
+        if len(chunks) > 1:
+            records = int(chunks[1][0])
+    else:
+        all_chunks = [_[1] for _ in bins.values() if len(_[1])]
+        if not all_chunks:
+            return None
+        all_chunks = np.concatenate(all_chunks)
+        begin, end = int(all_chunks[:, 0].min()) >> 16, int(all_chunks[:, 1].max()) >> 16
+    offsets = np.asarray(voffsets, dtype=np.uint64) >> np.uint64(16)
+    offsets = np.maximum.accumulate(np.maximum(offsets.astype(np.int64), begin)) if len(offsets) else \
+        np.zeros(0, dtype=np.int64)
+    return ContigOffsets(np.asarray(starts, dtype=np.int64), offsets, begin, end, records)
+
+
+def parse_tbi(buf):
+    """
+    Parse a tabix index. Returns dict of contig: :class:`ContigOffsets`
+    """
+    n_ref = struct.unpack_from("<i", buf, 4)[0]
+    l_nm = struct.unpack_from("<i", buf, 32)[0]
+    names = buf[36:36 + l_nm].split(b'\0')[:n_ref]
+    pos = 36 + l_nm
+    pseudo = pseudo_bin(TBI_DEPTH)
+    ret = {}
+    for name in names:
+        bins, pos = parse_bins(buf, pos, False)
+        n_intv = struct.unpack_from("<i", buf, pos)[0]
+        pos += 4
+        ioff = np.frombuffer(buf, dtype="<u8", count=n_intv, offset=pos)
+        pos += n_intv * 8
+        starts = np.arange(n_intv, dtype=np.int64) << TBI_SHIFT
+        offsets = contig_offsets(bins, starts[ioff != 0], ioff[ioff != 0], pseudo)
+        if offsets is not None:
+            ret[name.decode()] = offsets
+    return ret
+
+
+def parse_csi(buf, contigs=None):
+    """
+    Parse a CSI index. Contig names are read from the index's tabix header or, for BCFs, given in order.
+    Returns dict of contig: :class:`ContigOffsets`
+    """
+    min_shift, depth, l_aux = struct.unpack_from("<iii", buf, 4)
+    pos = 16
+    if l_aux >= 28:
+        l_nm = struct.unpack_from("<i", buf, pos + 24)[0]
+        names = [_.decode() for _ in buf[pos + 28:pos + 28 + l_nm].split(b'\0')]
+    else:
+        names = list(contigs or [])
+    pos += l_aux
+    n_ref = struct.unpack_from("<i", buf, pos)[0]
+    pos += 4
+    pseudo = pseudo_bin(depth)
+    first_leaf = ((1 << (3 * depth)) - 1) // 7
+    ret = {}
+    for ref in range(n_ref):
+        bins, pos = parse_bins(buf, pos, True)
+        leaves = sorted((b_num - first_leaf, loffset) for b_num, (loffset, _) in bins.items()
+                        if first_leaf <= b_num < pseudo)
+        starts = [leaf << min_shift for leaf, _ in leaves]
+        offsets = contig_offsets(bins, starts, [_ for __, _ in leaves], pseudo)
+        if offsets is not None and ref < len(names):
+            ret[names[ref]] = offsets
+    return ret
+
+
+def read_vcf_index(vcf_fn, contigs=None):
+    """
+    Read the compressed offsets of each contig in a VCF's tabix/CSI index
+
+    :param `vcf_fn`: Path to the VCF
+    :type `vcf_fn`: string
+    :param `contigs`: Contig names in header order, needed for BCF indexes
+    :type `contigs`: list, optional
+
+    :return: dictionary with contig keys and :class:`ContigOffsets` values, or None if there's no readable index
+    :rtype: dict
+    """
+    idx_fn = index_filename(os.fsdecode(vcf_fn))
+    if idx_fn is None:
+        return None
+    try:
+        with gzip.open(idx_fn, 'rb') as fh:
+            buf = fh.read()
+        if buf[:4] == b"TBI\1":
+            return parse_tbi(buf)
+        if buf[:4] == b"CSI\1":
+            return parse_csi(buf, contigs)
+        logging.debug("Unknown index format %s", idx_fn)
+    except (OSError, ValueError, EOFError, struct.error) as e:
+        logging.debug("Unable to read index %s: %s", idx_fn, e)
+    return None
+
+
+def offsets_at(contig, positions):
+    """
+    Compressed offsets where reading records overlapping positions begins
+    """
+    idx = np.searchsorted(contig.starts, positions, side='right') - 1
+    return np.where(idx >= 0, contig.offsets[np.maximum(idx, 0)], contig.begin) if len(contig.starts) else \
+        np.full(len(positions), contig.begin)
+
+
+def offsets_after(contig, positions):
+    """
+    Compressed offsets where reading records starting before positions ends
+    """
+    idx = np.searchsorted(contig.starts, positions, side='right')
+    return np.where(idx < len(contig.starts), contig.offsets[np.minimum(idx, len(contig.starts) - 1)],
+                    contig.end) if len(contig.starts) else np.full(len(positions), contig.end)
+
+
+def plan_fetches(contig, begins, ends, max_ends):
+    """
+    Group sorted regions into fetch windows. Consecutive regions are fetched together when they don't overlap and
+    the bytes between them cost less than another fetch.
+
+    :param `contig`: Offsets of the regions' contig, or None if it isn't indexed
+    :type `contig`: :class:`ContigOffsets`
+    :param `begins`: Sorted begins of the regions
+    :type `begins`: :class:`numpy.ndarray`
+    :param `ends`: Ends of the regions
+    :type `ends`: :class:`numpy.ndarray`
+    :param `max_ends`: Running max of the ends
+    :type `max_ends`: :class:`numpy.ndarray`
+
+    :return: positions of the regions starting each window and the estimated compressed bytes the fetches read
+    :rtype: tuple (:class:`numpy.ndarray`, int)
+    """
+    if len(begins) == 0:
+        return np.zeros(0, dtype=np.int64), 0
+    if contig is None:
+        return np.arange(len(begins)), FETCH_COST_BYTES * len(begins)
+    begin_offs = offsets_at(contig, begins)
+    end_offs = offsets_after(contig, ends)
+    joins = (begins[1:] >= max_ends[:-1]) & (begin_offs[1:] - end_offs[:-1] < FETCH_COST_BYTES)
+    firsts = np.flatnonzero(np.concatenate([[True], ~joins]))
+    lasts = np.concatenate([firsts[1:], [len(begins)]]) - 1
+    window_ends = np.maximum.accumulate(end_offs)[lasts]
+    cost = int((window_ends - begin_offs[firsts]).sum()) + FETCH_COST_BYTES * len(firsts)
+    return firsts, cost
+
+
+def stream_cost(contig):
+    """
+    Estimated compressed bytes streaming a contig reads
+    """
+    if contig is None:
+        return FETCH_COST_BYTES
+    return contig.end - contig.begin + FETCH_COST_BYTES